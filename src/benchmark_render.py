@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks du pipeline de rendu
+-------------------------------
+Mesure le temps de rendu des différentes étapes à partir des données fictives,
+sans connexion à l'API Reddit ni au service TTS.
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+
+import numpy as np
+import soundfile as sf
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Importer les modules du projet
+try:
+    from utils.modern_video import TikTokVideoMaker
+    from utils.modern_captions import CommentCardCreator
+    from utils.video_effects import ZoomEffect
+    from utils.ffmpeg_tools import rendition_path
+    from utils.modern_audio import TTSGenerator
+    from utils.tts_backends import create_tts_backend
+    from utils.tts_cache import TTSCache
+    from mock_data import get_mock_posts
+    import config
+except ImportError as e:
+    logging.error(f"Erreur d'importation: {e}")
+    logging.error("Assurez-vous d'exécuter le script depuis le dossier src")
+    sys.exit(1)
+
+
+def prepare_assets(work_dir, comment_duration=5, size=None):
+    """
+    Crée les cartes et une piste audio synthétique pour le post fictif.
+
+    Args:
+        work_dir: Dossier de travail du benchmark
+        comment_duration: Durée de chaque carte en secondes
+        size: Taille des cartes (width, height), celle de VIDEO_CONFIG par défaut
+
+    Returns:
+        dict: Chemins des images, de l'audio et durées des segments
+    """
+    images_dir = os.path.join(work_dir, 'images')
+    audio_dir = os.path.join(work_dir, 'audio')
+    os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(audio_dir, exist_ok=True)
+
+    post = get_mock_posts(1)[0]
+    width, height = size or (config.VIDEO_CONFIG.get('width', 1080), config.VIDEO_CONFIG.get('height', 1920))
+    caption_maker = CommentCardCreator(width=width, height=height)
+
+    images = [caption_maker.create_title_card(
+        title=post['title'],
+        subreddit='askreddit',
+        author=post['author'],
+        output_path=os.path.join(images_dir, 'title.png')
+    )]
+    for i, comment in enumerate(post['comments']):
+        images.append(caption_maker.create_comment_card(
+            comment_text=comment['body'],
+            author=comment['author'],
+            upvotes=comment['score'],
+            output_path=os.path.join(images_dir, f'comment_{i}.png')
+        ))
+
+    durations = [comment_duration] * len(images)
+
+    # Piste audio synthétique (pas d'appel réseau au service TTS)
+    sample_rate = 44100
+    t = np.arange(int(sum(durations) * sample_rate)) / sample_rate
+    tone = 0.2 * np.sin(2 * np.pi * 220 * t)
+    audio_path = os.path.join(audio_dir, 'audio.wav')
+    sf.write(audio_path, tone.astype(np.float32), sample_rate)
+
+    return {'images': images, 'durations': durations, 'audio': audio_path}
+
+
+def create_video_maker(output_path, **kwargs):
+    """Crée un TikTokVideoMaker configuré comme dans main.py"""
+    kwargs.setdefault('output_size', (config.VIDEO_CONFIG.get('width', 1080), config.VIDEO_CONFIG.get('height', 1920)))
+    kwargs.setdefault('fps', config.VIDEO_CONFIG.get('fps', 30))
+    return TikTokVideoMaker(output_path=output_path, **kwargs)
+
+
+def profile_options(settings):
+    """Paramètres de TikTokVideoMaker correspondant à un profil de rendu (comme main.py)"""
+    return {
+        'output_size': (settings.get('width', 1080), settings.get('height', 1920)),
+        'fps': settings.get('fps', 30),
+        'video_codec': settings.get('video_codec', 'libx264'),
+        'video_bitrate': settings.get('video_bitrate', '5000k'),
+        'render_engine': settings.get('render_engine', 'moviepy'),
+        'render_workers': settings.get('render_workers', 1),
+        'zoom_effect': settings.get('enable_zoom_effect', False),
+        'zoom_ratio': settings.get('zoom_ratio', 1.08),
+        'transition': settings.get('transition', 'none'),
+        'transition_duration': settings.get('transition_duration', 0.0),
+        'video_preset': settings.get('video_preset', 'veryfast'),
+        'video_crf': settings.get('video_crf'),
+        'video_tune': settings.get('video_tune'),
+        'still_tune': settings.get('still_tune', 'stillimage'),
+        'still_fps': settings.get('still_fps'),
+    }
+
+
+def render_silent_video(assets, output_path, **kwargs):
+    """
+    Rend la vidéo sans audio et renvoie le temps écoulé.
+
+    Returns:
+        float: Temps de rendu en secondes, ou None en cas d'échec
+    """
+    video_maker = create_video_maker(output_path, **kwargs)
+    for image, duration in zip(assets['images'], assets['durations']):
+        video_maker.add_image(image, duration=duration)
+
+    start = time.perf_counter()
+    success = video_maker.render()
+    elapsed = time.perf_counter() - start
+    video_maker.clean_resources()
+    return elapsed if success else None
+
+
+def benchmark_mux(work_dir, assets, repeat=1):
+    """Compare l'ajout d'audio par ré-encodage moviepy et par copie du flux vidéo"""
+    silent_video = os.path.join(work_dir, 'silent.mp4')
+    if render_silent_video(assets, silent_video) is None:
+        logging.error("Impossible de rendre la vidéo de référence")
+        return []
+
+    results = []
+    for mode in ('reencode', 'copy'):
+        video_maker = create_video_maker(silent_video, mux_mode=mode)
+        timings = []
+        for _ in range(repeat):
+            output_path = os.path.join(work_dir, f'mux_{mode}.mp4')
+            start = time.perf_counter()
+            success = video_maker.add_audio_to_video(silent_video, assets['audio'], output_path)
+            timings.append(time.perf_counter() - start)
+            if not success:
+                logging.error(f"Échec du multiplexage en mode {mode}")
+                break
+        results.append((f"mux {mode}", min(timings), os.path.getsize(output_path) if success else 0))
+    return results
+
+
+def benchmark_engines(work_dir, assets, repeat=1):
+    """Compare les moteurs de rendu de la vidéo sans audio"""
+    variants = [
+        ('moviepy', {'render_engine': 'moviepy'}),
+        ('segments', {'render_engine': 'segments', 'render_workers': 1}),
+        (f'segments x{os.cpu_count()}', {'render_engine': 'segments', 'render_workers': 0}),
+        ('pipe', {'render_engine': 'pipe'}),
+        ('filtergraph', {'render_engine': 'filtergraph'}),
+    ]
+
+    results = []
+    for name, kwargs in variants:
+        output_path = os.path.join(work_dir, f"engine_{name.replace(' ', '_')}.mp4")
+        timings = [render_silent_video(assets, output_path, **kwargs) for _ in range(repeat)]
+        if None in timings:
+            logging.error(f"Échec du rendu avec le moteur {name}")
+            continue
+        results.append((f"rendu {name}", min(timings), os.path.getsize(output_path)))
+    return results
+
+
+def benchmark_zoom(work_dir, assets, repeat=1):
+    """
+    Mesure le coût du zoom progressif : temps de calcul d'une image comparé au
+    budget configuré, puis rendu complet de chaque moteur avec et sans zoom.
+    """
+    width = config.VIDEO_CONFIG.get('width', 1080)
+    height = config.VIDEO_CONFIG.get('height', 1920)
+    budget = config.VIDEO_CONFIG.get('zoom_frame_budget_ms')
+    frame_count = int(assets['durations'][0] * config.VIDEO_CONFIG.get('fps', 30))
+
+    video_maker = create_video_maker(os.path.join(work_dir, 'zoom.mp4'))
+    card = ZoomEffect.prepare(video_maker._load_card(assets['images'][0])[0])
+    output = np.empty_like(card)
+    best = None
+    for _ in range(repeat):
+        effect = ZoomEffect((width, height), frame_count, zoom_end=config.VIDEO_CONFIG.get('zoom_ratio', 1.08))
+        for i in range(frame_count):
+            effect.render(card, i, output)
+        best = effect.average_frame_ms if best is None else min(best, effect.average_frame_ms)
+    status = 'non défini' if budget is None else ('respecté' if best <= budget else 'DÉPASSÉ')
+    print(f"Zoom: {best:.2f} ms/image (budget {budget} ms: {status})")
+
+    results = []
+    for engine in ('segments', 'pipe', 'moviepy'):
+        for zoom in (False, True):
+            name = f"{engine} {'zoom' if zoom else 'fixe'}"
+            output_path = os.path.join(work_dir, f"zoom_{name.replace(' ', '_')}.mp4")
+            timings = [render_silent_video(assets, output_path, render_engine=engine, render_workers=1,
+                                           zoom_effect=zoom,
+                                           zoom_ratio=config.VIDEO_CONFIG.get('zoom_ratio', 1.08),
+                                           zoom_frame_budget_ms=budget)
+                       for _ in range(repeat)]
+            if None in timings:
+                logging.error(f"Échec du rendu {name}")
+                continue
+            results.append((f"rendu {name}", min(timings), os.path.getsize(output_path)))
+    return results
+
+
+def benchmark_transitions(work_dir, assets, repeat=1):
+    """Compare les coupes franches et les transitions pour les moteurs ffmpeg"""
+    duration = config.VIDEO_CONFIG.get('transition_duration', 0.8)
+    results = []
+    for engine in ('segments', 'pipe'):
+        for transition in ('none', 'crossfade', 'slide'):
+            name = f"{engine} {transition}"
+            output_path = os.path.join(work_dir, f"transition_{name.replace(' ', '_')}.mp4")
+            timings = [render_silent_video(assets, output_path, render_engine=engine, render_workers=1,
+                                           transition=transition, transition_duration=duration)
+                       for _ in range(repeat)]
+            if None in timings:
+                logging.error(f"Échec du rendu {name}")
+                continue
+            results.append((f"rendu {name}", min(timings), os.path.getsize(output_path)))
+    return results
+
+
+def benchmark_profiles(work_dir, assets, repeat=1):
+    """Compare les profils de rendu (temps par minute de vidéo et taille du fichier)"""
+    results = []
+    for profile in config.RENDER_PROFILES:
+        settings = config.get_render_settings(profile)
+        # Cartes dessinées à la taille du profil, comme dans main.py
+        profile_assets = prepare_assets(os.path.join(work_dir, profile), assets['durations'][0],
+                                        size=(settings['width'], settings['height']))
+        output_path = os.path.join(work_dir, f"profile_{profile}.mp4")
+        timings = [render_silent_video(profile_assets, output_path, **profile_options(settings)) for _ in range(repeat)]
+        if None in timings:
+            logging.error(f"Échec du rendu avec le profil {profile}")
+            continue
+        label = f"profil {profile} ({settings['width']}x{settings['height']}@{settings['fps']})"
+        results.append((label, min(timings), os.path.getsize(output_path), settings['fps']))
+    return results
+
+
+def benchmark_renditions(work_dir, assets, repeat=1):
+    """
+    Compare la production des rendus supplémentaires (VIDEO_CONFIG["renditions"]) :
+    un rendu complet par taille, ou une seule passe dupliquée vers plusieurs encodeurs.
+    """
+    renditions = config.VIDEO_CONFIG.get('renditions') or [{'name': '720p', 'width': 720, 'height': 1280}]
+    results = []
+    for engine in ('segments', 'pipe', 'filtergraph'):
+        # Un rendu par taille
+        total, size = 0.0, 0
+        for rendition in [None] + renditions:
+            kwargs = {'render_engine': engine}
+            if rendition:
+                kwargs['output_size'] = (rendition['width'], rendition['height'])
+                kwargs['video_crf'] = rendition.get('video_crf')
+            output_path = os.path.join(work_dir, f"separate_{engine}_{rendition['name'] if rendition else 'main'}.mp4")
+            timings = [render_silent_video(assets, output_path, **kwargs) for _ in range(repeat)]
+            if None in timings:
+                logging.error(f"Échec du rendu séparé avec le moteur {engine}")
+                break
+            total += min(timings)
+            size += os.path.getsize(output_path)
+        else:
+            results.append((f"{engine} {len(renditions) + 1} rendus séparés", total, size))
+
+        # Une seule passe
+        output_path = os.path.join(work_dir, f"single_{engine}.mp4")
+        timings = [render_silent_video(assets, output_path, render_engine=engine, renditions=renditions)
+                   for _ in range(repeat)]
+        if None in timings:
+            logging.error(f"Échec du rendu multi-sorties avec le moteur {engine}")
+            continue
+        size = os.path.getsize(output_path) + sum(os.path.getsize(rendition_path(output_path, r)) for r in renditions)
+        results.append((f"{engine} {len(renditions) + 1} rendus en une passe", min(timings), size))
+    return results
+
+
+def benchmark_still_fps(work_dir, assets, repeat=1):
+    """Compare les cartes fixes encodées à cadence constante et à cadence variable (moteur "segments")"""
+    results = []
+    for transition in ('none', 'crossfade'):
+        for still_fps in (None, config.VIDEO_CONFIG.get('still_fps') or 1):
+            name = f"{transition} {'cadence variable' if still_fps else 'cadence constante'}"
+            output_path = os.path.join(work_dir, f"still_fps_{transition}_{still_fps or 0}.mp4")
+            timings = [render_silent_video(assets, output_path, render_engine='segments', still_fps=still_fps,
+                                           transition=transition,
+                                           transition_duration=config.VIDEO_CONFIG.get('transition_duration', 0.8))
+                       for _ in range(repeat)]
+            if None in timings:
+                logging.error(f"Échec du rendu {name}")
+                continue
+            results.append((f"segments {name}", min(timings), os.path.getsize(output_path)))
+    return results
+
+
+def benchmark_segment_cache(work_dir, assets, repeat=1):
+    """
+    Mesure le cache de segments du moteur "segments" : premier rendu, rendu
+    identique, puis rendu avec une seule carte modifiée.
+    """
+    settings = config.VIDEO_CONFIG
+    cache_dir = os.path.join(work_dir, 'segment_cache')
+    edited_images = list(assets['images'])
+    caption_maker = CommentCardCreator(width=settings.get('width', 1080), height=settings.get('height', 1920))
+    edited_images[1] = caption_maker.create_comment_card(
+        comment_text="Commentaire modifié entre deux rendus",
+        author='benchmark',
+        upvotes=1,
+        output_path=os.path.join(work_dir, 'edited_comment.png')
+    )
+    scenarios = [
+        ('cache segments vide', assets),
+        ('cache segments identique', assets),
+        ('cache segments 1 carte modifiée', {**assets, 'images': edited_images}),
+    ]
+
+    results = []
+    for _ in range(repeat):
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        for i, (name, scenario_assets) in enumerate(scenarios):
+            output_path = os.path.join(work_dir, f"segment_cache_{i}.mp4")
+            elapsed = render_silent_video(scenario_assets, output_path, render_engine='segments',
+                                          transition=settings.get('transition', 'none'),
+                                          transition_duration=settings.get('transition_duration', 0.0),
+                                          cache_dir=cache_dir, segment_cache_size_mb=512)
+            if elapsed is None:
+                logging.error(f"Échec du rendu {name}")
+                return []
+            if len(results) < len(scenarios):
+                results.append([name, elapsed, os.path.getsize(output_path)])
+            else:
+                results[i][1] = min(results[i][1], elapsed)
+    return [tuple(result) for result in results]
+
+
+def benchmark_tts(work_dir, assets, repeat=1):
+    """
+    Mesure la génération des voix du post fictif avec les moteurs locaux
+    (bips "tone", espeak-ng s'il est installé), sans puis avec le cache des voix.
+    """
+    post = get_mock_posts(1)[0]
+    texts = [post['title']] + [comment['body'] for comment in post['comments']]
+    backends = ['tone'] + (['espeak'] if shutil.which('espeak-ng') else [])
+
+    results = []
+    for name in backends:
+        options = config.AUDIO_CONFIG.get('tts_backend_options', {}).get(name, {})
+        for cached in (False, True):
+            timings = []
+            for _ in range(repeat):
+                cache_dir = os.path.join(work_dir, 'tts_cache')
+                shutil.rmtree(cache_dir, ignore_errors=True)
+                generator = TTSGenerator(temp_dir=os.path.join(work_dir, 'tts'),
+                                         backend=create_tts_backend(name, **options),
+                                         cache=TTSCache(cache_dir) if cached else None,
+                                         max_workers=config.AUDIO_CONFIG.get('tts_workers', 1))
+                items = [(text, os.path.join(work_dir, 'tts', f"voice_{i}{generator.extension}"))
+                         for i, text in enumerate(texts)]
+                if cached:
+                    generator.generate_batch(items)
+                start = time.perf_counter()
+                voices = generator.generate_batch(items)
+                timings.append(time.perf_counter() - start)
+            if any(voice['error'] for voice in voices):
+                logging.error(f"Échec de la synthèse {name}")
+                break
+            size = sum(os.path.getsize(voice['path']) for voice in voices)
+            results.append((f"tts {name} {len(texts)} voix{' (cache)' if cached else ''}", min(timings), size))
+    return results
+
+
+BENCHMARKS = {
+    'mux': benchmark_mux,
+    'engines': benchmark_engines,
+    'zoom': benchmark_zoom,
+    'transitions': benchmark_transitions,
+    'profiles': benchmark_profiles,
+    'renditions': benchmark_renditions,
+    'segment_cache': benchmark_segment_cache,
+    'still_fps': benchmark_still_fps,
+    'tts': benchmark_tts,
+}
+
+
+def print_results(results, video_duration):
+    """Affiche un tableau des résultats"""
+    print(f"\n{'Scénario':<40} {'Temps (s)':>10} {'s / min':>10} {'images/s':>10} {'Taille (Mo)':>12}")
+    print('-' * 87)
+    for name, elapsed, size, *fps in results:
+        frame_count = video_duration * (fps[0] if fps else config.VIDEO_CONFIG.get('fps', 30))
+        per_minute = elapsed * 60 / video_duration if video_duration else 0
+        frames_per_second = frame_count / elapsed if elapsed else 0
+        print(f"{name:<40} {elapsed:>10.2f} {per_minute:>10.2f} {frames_per_second:>10.1f} {size / (1024 * 1024):>12.2f}")
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description='Benchmarks du rendu Reddit Video Maker')
+    parser.add_argument('benchmarks', nargs='*', default=list(BENCHMARKS.keys()),
+                        choices=list(BENCHMARKS.keys()), help='Benchmarks à exécuter')
+    parser.add_argument('--repeat', type=int, default=1, help='Nombre de répétitions (le meilleur temps est gardé)')
+    parser.add_argument('--keep', action='store_true', help='Conserver les fichiers générés')
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    work_dir = os.path.join(base_dir, 'temp', 'benchmark')
+    os.makedirs(work_dir, exist_ok=True)
+
+    try:
+        assets = prepare_assets(work_dir)
+        video_duration = sum(assets['durations'])
+
+        results = []
+        for name in args.benchmarks:
+            results.extend(BENCHMARKS[name](work_dir, assets, repeat=args.repeat))
+
+        print_results(results, video_duration)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
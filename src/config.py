@@ -43,10 +43,111 @@ VIDEO_CONFIG = {
     "max_duration": 60,  # Maximum video duration in seconds
     "title_duration": 5,  # Duration for title cards in seconds
     "comment_duration": 8,  # Duration for comment cards in seconds
+    "transition": "crossfade",  # Transition entre les cartes: "crossfade" (fondu enchaîné), "slide" (glissement) ou "none"
     "transition_duration": 0.8,  # Duration of transitions in seconds
     "enable_zoom_effect": True,  # Enable zoom effects on images
+    "zoom_ratio": 1.08,  # Facteur de zoom atteint à la fin de chaque carte
+    "zoom_frame_budget_ms": 10,  # Temps maximal de calcul d'une image zoomée (avertissement si dépassé)
     "video_codec": "libx264",
     "video_bitrate": "2500k",
+    "render_engine": "segments",  # "segments": cartes fixes encodées par ffmpeg, "pipe": images NumPy envoyées à ffmpeg, "filtergraph": une seule commande ffmpeg (audio compris), "moviepy": composition moviepy
+    "render_workers": 0,  # Segments encodés en parallèle par le moteur "segments" (0 = nombre de coeurs)
+    "still_fps": 1,  # Cadence effective des cartes fixes du moteur "segments" (cadence variable, None = cadence constante)
+    "segment_cache_size_mb": 2048,  # Cache des segments encodés (cache/segments), réutilisés d'un rendu à l'autre (0 = désactivé)
+    "render_profile": "standard",  # Profil par défaut (voir RENDER_PROFILES), remplaçable par --profile
+    "export_formats": ["portrait", "square", "landscape"],  # Formats exportés (voir EXPORT_FORMATS), le premier sans suffixe
+    "renditions": [  # Rendus supplémentaires encodés dans la même passe que la vidéo principale
+        {"name": "720p", "width": 720, "height": 1280},
+        {"name": "small", "width": 270, "height": 480, "video_crf": 30},
+    ],
+    "thumbnails": [  # Miniatures écrites à côté de chaque vidéo (carte de titre redimensionnée), adaptées au ratio du format
+        {"name": "poster", "width": 1080, "height": 1920},
+        {"name": "thumb", "width": 360, "height": 640},
+    ],
+    "bumpers": {"intro": "bumpers/intro.mp4", "outro": "bumpers/outro.mp4"},  # Relatifs à resources/, encodés une fois par profil (cache/bumpers), ignorés s'ils n'existent pas
+    "mp4_layout": "faststart",  # Fichiers finaux: "faststart" (index en tête), "fragmented" (fragments écrits pendant l'encodage), "standard"
+    "mux_mode": "copy",  # "copy": copie du flux H.264 lors de l'ajout de l'audio, "reencode": ré-encodage moviepy
+}
+
+# Render Profiles (valeurs qui remplacent celles de VIDEO_CONFIG)
+RENDER_PROFILES = {
+    "preview": {  # Aperçu (--preview) : quart de la largeur et de la hauteur, pour vérifier rythme et contenu
+        "width": 270,
+        "height": 480,
+        "fps": 12,
+        "video_preset": "ultrafast",
+        "video_crf": 32,
+        "video_tune": "animation",
+        "still_tune": "stillimage",
+        "output_suffix": "preview",
+        "export_formats": ["portrait"],
+        "renditions": [],
+        "bumpers": None,
+    },
+    "draft": {  # Relecture rapide : quart de la surface, encodage le plus rapide
+        "width": 540,
+        "height": 960,
+        "fps": 24,
+        "video_preset": "ultrafast",
+        "video_crf": 30,
+        "video_tune": "animation",
+        "still_tune": "stillimage",
+        "export_formats": ["portrait"],
+        "renditions": [],
+        "bumpers": None,
+    },
+    "standard": {
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "video_preset": "veryfast",
+        "video_crf": 23,
+        "video_tune": "animation",
+        "still_tune": "stillimage",
+    },
+    "final": {  # Mise en ligne : meilleure compression, encodage plus lent
+        "width": 1080,
+        "height": 1920,
+        "fps": 30,
+        "video_preset": "slow",
+        "video_crf": 18,
+        "video_tune": "animation",
+        "still_tune": "stillimage",
+    },
+}
+
+
+# Export Formats (ratio largeur:hauteur ; le petit côté est celui du profil de rendu)
+EXPORT_FORMATS = {
+    "portrait": (9, 16),
+    "square": (1, 1),
+    "landscape": (16, 9),
+}
+
+
+def get_render_settings(profile=None):
+    """
+    Renvoie les paramètres vidéo d'un profil de rendu.
+
+    Args:
+        profile: Nom du profil (preview, draft, standard, final), VIDEO_CONFIG["render_profile"] par défaut
+
+    Returns:
+        dict: VIDEO_CONFIG complété par les valeurs du profil (output_suffix = nom du profil par défaut)
+    """
+    profile = profile or VIDEO_CONFIG.get("render_profile", "standard")
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Profil de rendu inconnu: {profile} (disponibles: {', '.join(RENDER_PROFILES)})")
+    # Fichiers suffixés par le nom du profil (sauf output_suffix explicite) : un profil n'écrase ni ne
+    # compile jamais les vidéos d'un autre
+    return {**VIDEO_CONFIG, "output_suffix": profile, **RENDER_PROFILES[profile], "render_profile": profile}
+
+
+# Background Video Configuration
+BACKGROUND_CONFIG = {
+    "enabled": False,  # Cartes superposées à une fenêtre aléatoire d'une vidéo de resources/backgrounds
+    "proxy_keyframe_interval": 1.0,  # Intervalle entre images clés des proxies (secondes)
+    "proxy_crf": 23,  # Qualité x264 des proxies
 }
 
 # Audio Configuration
@@ -59,6 +160,19 @@ AUDIO_CONFIG = {
     "fade_duration": 1000,  # Fade duration in milliseconds
     "silence_between_segments": 0.8,  # Silence entre segments en secondes
     "audio_codec": "aac",
+    "tts_backend": "gtts",  # Moteur de synthèse: "gtts" (réseau), "espeak" ou "piper" (locaux), "tone" (bips, tests hors ligne)
+    "tts_backend_options": {  # Réglages de chaque moteur (voir utils/tts_backends.py)
+        "espeak": {"binary": "espeak-ng", "voice": None, "words_per_minute": 175},
+        "piper": {"binary": "piper", "model": None},  # model: chemin du modèle de voix .onnx
+        "tone": {},
+    },
+    "tts_workers": 4,  # Voix synthétisées en parallèle (titre et commentaires d'un post)
+    "tts_rate_limit": 4,  # Requêtes par seconde au service de synthèse (None = pas de limite)
+    "tts_burst": 4,  # Requêtes autorisées d'un coup après une pause
+    "tts_chunk_threshold": 200,  # Textes plus longs synthétisés phrase par phrase en parallèle (None = en une requête)
+    "tts_max_chunk_chars": 300,  # Longueur maximale d'une phrase synthétisée (coupée aux virgules au-delà)
+    "tts_sentence_gap": 0.25,  # Silence entre deux phrases assemblées, en secondes
+    "tts_cache_size_mb": 256,  # Cache des voix de synthèse (cache/tts), réutilisées d'un rendu à l'autre (0 = désactivé)
 }
 
 # Content Limits
@@ -83,6 +197,14 @@ OUTPUT_CONFIG = {
     "unique_id_format": "{subreddit}_{title}_{timestamp}"  # Format pour les identifiants uniques
 }
 
+# Compilations (vidéos longues des posts du jour, --compile)
+COMPILATION_CONFIG = {
+    "max_duration": 600,  # Durée maximale en secondes (au moins un post est toujours inclus)
+    "intro": "bumpers/intro.mp4",  # Relatif à resources/, ignoré s'il n'existe pas
+    "outro": "bumpers/outro.mp4",
+    "directory": "compilations",  # Sous-dossier de output/
+}
+
 # Logging Configuration
 LOGGING_CONFIG = {
     "level": "INFO",  # DEBUG, INFO, WARNING, ERROR, CRITICAL
@@ -24,6 +24,7 @@ logging.basicConfig(
 # Importer les modules du projet
 try:
     from utils.modern_audio import ModernAudioMaker
+    from utils.audio_assembly import segment_durations
     from utils.modern_video import TikTokVideoMaker
     from utils.modern_captions import ModernCaptionMaker
     from mock_data import get_mock_posts
@@ -124,34 +125,35 @@ def create_test_video():
     audio_paths = []
     
     # Audio pour le titre
-    title_audio = os.path.join(audio_dir, "title.mp3")
+    title_audio = os.path.join(audio_dir, f"title{audio_maker.extension}")
     audio_maker.create_audio_for_text(post["title"], title_audio)
     audio_paths.append(title_audio)
     
     # Audio pour les commentaires
     for i, comment in enumerate(post["comments"]):
-        comment_audio = os.path.join(audio_dir, f"comment_{i}.mp3")
+        comment_audio = os.path.join(audio_dir, f"comment_{i}{audio_maker.extension}")
         audio_maker.create_audio_for_text(comment["body"], comment_audio)
         audio_paths.append(comment_audio)
     
     # Combiner tous les audios
     combined_audio = os.path.join(audio_dir, "combined.wav")
-    result, audio_durations = audio_maker.combine_audio_files(
+    audio_segments = audio_maker.combine_audio_files(
         audio_paths, 
         combined_audio, 
         background_volume=config.AUDIO_CONFIG.get("background_music_volume", 0.2)
     )
     
-    if not result:
+    if not audio_segments:
         logging.error("Erreur lors de la création de l'audio")
         return None
         
-    # Ajouter un peu de marge pour chaque segment (pour éviter les coupures trop abruptes)
-    # Une marge minimale de 2 secondes pour chaque segment
-    segment_durations = [max(duration + 0.5, 2.0) for duration in audio_durations]
+    # Chaque carte dure jusqu'au début de la voix suivante (silence entre les voix compris),
+    # la dernière jusqu'à la fin de sa voix : les cartes suivent exactement la piste audio
+    audio_durations = [end - start for start, end in audio_segments]
+    card_durations = segment_durations(audio_segments, fps=video_maker.fps)
     
     logging.info(f"Durées des segments audio: {', '.join([f'{d:.2f}s' for d in audio_durations])}")
-    logging.info(f"Durées finales des segments vidéo: {', '.join([f'{d:.2f}s' for d in segment_durations])}")
+    logging.info(f"Durées finales des segments vidéo: {', '.join([f'{d:.2f}s' for d in card_durations])}")
     
     # Créer les métadonnées
     with open(os.path.join(post_dir, 'metadata.txt'), 'w', encoding='utf-8') as f:
@@ -160,25 +162,18 @@ def create_test_video():
         f.write(f"Créé le: {time.ctime()}\n")
         f.write(f"Nombre de commentaires: {len(post['comments'])}\n")
     
-    # Ajouter les images à la vidéo avec les durées audio correspondantes
-    # Titre avec sa durée audio
-    logging.info(f"Ajout du titre avec durée: {segment_durations[0]:.2f}s")
-    video_maker.add_image_clip(title_image, segment_durations[0])
-    
-    # Commentaires avec leurs durées audio respectives
-    for i, comment_image in enumerate(comment_images):
-        # Si nous avons des durées audio pour ce commentaire (index+1 car 0 est le titre)
-        if i+1 < len(segment_durations):
-            duration = segment_durations[i+1]
-            logging.info(f"Ajout du commentaire {i} avec durée: {duration:.2f}s")
-            video_maker.add_image_clip(comment_image, duration)
-        else:
-            # Fallback au cas où nous aurions plus de commentaires que de segments audio
-            logging.warning(f"Pas de durée audio pour le commentaire {i}, utilisation de 5s par défaut")
-            video_maker.add_image_clip(comment_image, 5)
+    # Ajouter les images à la vidéo avec les durées de leurs voix dans la piste
+    # (une carte dont la voix manque a une durée nulle et n'est pas affichée)
+    cards = [("titre", title_image)] + [(f"commentaire {i}", image) for i, image in enumerate(comment_images)]
+    for (label, image), duration in zip(cards, card_durations):
+        if duration <= 0:
+            logging.warning(f"Pas de voix pour le {label}, carte ignorée")
+            continue
+        logging.info(f"Ajout du {label} avec durée: {duration:.2f}s")
+        video_maker.add_image(image, duration)
     
     # Ajouter l'audio
-    video_maker.add_audio(combined_audio)
+    video_maker.set_audio(combined_audio)
     
     # Rendre la vidéo
     logging.info("Rendu de la vidéo en cours...")
@@ -8,6 +8,7 @@ Ce script principal coordonne le processus de creation de videos a partir de pos
 """
 
 import os
+import re
 import sys
 import logging
 import time
@@ -33,9 +34,17 @@ logging.basicConfig(
 # Importer les modules du projet
 try:
     from utils.modern_audio import ModernAudioMaker, TTSGenerator
+    from utils.audio_assembly import segment_durations
     from utils.modern_video import TikTokVideoMaker
     from utils.modern_captions import ModernCaptionMaker, CommentCardCreator
     from utils.redditScrape import RedditScraper
+    from utils.background_proxy import BackgroundProxyCache
+    from utils.ffmpeg_tools import rendition_path, master_path, stream_timings, MP4_LAYOUT_BFRAMES
+    from utils.compilation import CompilationBuilder
+    from utils.bumpers import BumperLibrary
+    from utils.tts_cache import TTSCache
+    from utils.tts_backends import default_tts_backend
+    from utils.card_layout import TextLayoutCache, MediaThumbnailCache, aspect_size
     import config
 except ImportError as e:
     logging.error(f"Erreur d'importation: {e}")
@@ -75,13 +84,17 @@ def sanitize_filename(filename):
 class RedditTikTokCreator:
     """Classe principale pour coordonner la création de vidéos TikTok à partir de Reddit."""
     
-    def __init__(self, output_dir=None):
+    def __init__(self, output_dir=None, profile=None):
         """
         Initialise le créateur de vidéos TikTok.
         
         Args:
             output_dir: Répertoire de sortie pour les vidéos générées
+            profile: Profil de rendu (preview, draft, standard, final), celui de VIDEO_CONFIG par défaut
         """
+        # Paramètres vidéo du profil de rendu
+        self.render_settings = config.get_render_settings(profile)
+        
         # Initialiser les chemins
         self.base_dir = os.path.dirname(os.path.dirname(__file__))
         
@@ -101,14 +114,33 @@ class RedditTikTokCreator:
         self.backgrounds_dir = os.path.join(self.resources_dir, 'backgrounds')
         self.icons_dir = os.path.join(self.resources_dir, 'icons')
         
+        # Caches persistants entre les exécutions (cartes, proxies d'arrière-plan...)
+        self.cache_dir = os.path.join(self.base_dir, 'cache')
+        
         # Garder trace des posts déjà traités
         self.processed_posts_file = os.path.join(self.output_dir, 'processed_posts.json')
         
         # Initialiser les composants
         self.reddit_scraper = RedditScraper()
-        self.tts_generator = TTSGenerator()
-        
-        logging.info(f"RedditTikTokCreator initialisé avec répertoire de sortie: {self.output_dir}")
+        # Voix de synthèse réutilisées d'un rendu à l'autre (re-rendus, aperçus, formats d'export)
+        tts_cache_size_mb = config.AUDIO_CONFIG.get('tts_cache_size_mb', 0)
+        self.tts_cache = TTSCache(os.path.join(self.cache_dir, 'tts'), tts_cache_size_mb) if tts_cache_size_mb else None
+        self.tts_generator = TTSGenerator(cache=self.tts_cache,
+                                          backend=default_tts_backend(),
+                                          max_workers=config.AUDIO_CONFIG.get('tts_workers', 1),
+                                          rate_limit=config.AUDIO_CONFIG.get('tts_rate_limit'),
+                                          burst=config.AUDIO_CONFIG.get('tts_burst', 1),
+                                          chunk_threshold=config.AUDIO_CONFIG.get('tts_chunk_threshold'),
+                                          max_chunk_chars=config.AUDIO_CONFIG.get('tts_max_chunk_chars', 300),
+                                          sentence_gap=config.AUDIO_CONFIG.get('tts_sentence_gap', 0.25))
+        # Un cache de proxies d'arrière-plan par taille de format d'export
+        self.background_caches = {}
+        self.background_proxies = self._background_proxy_cache(self._export_formats()[0]['size'])
+        # Intros et outros encodées une fois par profil et par résolution
+        self.bumper_library = BumperLibrary(os.path.join(self.cache_dir, 'bumpers'))
+        
+        logging.info(f"RedditTikTokCreator initialisé avec répertoire de sortie: {self.output_dir}, "
+                     f"profil: {self.render_settings['render_profile']}")
     
     def create_video(self, subreddit="askreddit", timeframe="day", post_count=10, 
                     video_count=3, random_subreddit=False, allow_nsfw=False, sorting=None, comment_sort=None):
@@ -162,7 +194,20 @@ class RedditTikTokCreator:
         posts = posts[:min(len(posts), video_count)]
         
         # Initialiser les composants
-        caption_maker = CommentCardCreator()
+        # Un créateur de cartes par format d'export, dessinant directement à la taille du
+        # format ; polices, textes découpés et médias sont partagés entre les formats
+        export_formats = self._export_formats()
+        layout_cache = TextLayoutCache()
+        media_cache = MediaThumbnailCache()
+        caption_makers = {
+            export_format['name']: CommentCardCreator(
+                width=export_format['size'][0],
+                height=export_format['size'][1],
+                layout_cache=layout_cache,
+                media_cache=media_cache
+            )
+            for export_format in export_formats
+        }
         audio_maker = ModernAudioMaker(
             output_dir=self.temp_dir, 
             background_music_dir=self.music_dir
@@ -189,107 +234,47 @@ class RedditTikTokCreator:
                 os.makedirs(images_dir, exist_ok=True)
                 os.makedirs(video_dir, exist_ok=True)
                 
-                # Fichiers de sortie
-                output_video = os.path.join(video_dir, f"{post_id}_video.mp4")  # Vidéo sans audio
-                output_audio = os.path.join(audio_dir, f"{post_id}_audio.mp3")  # Audio combiné séparé
-                
-                # Initialiser le créateur de vidéos
-                video_maker = TikTokVideoMaker(
-                    output_path=output_video,
-                    output_size=(config.VIDEO_CONFIG.get('width', 1080), config.VIDEO_CONFIG.get('height', 1920)),
-                    fps=config.VIDEO_CONFIG.get('fps', 30)
-                )
-                
-                # Créer les images
-                logging.info("Création des images...")
-                
-                # Image du titre
-                title_image = os.path.join(images_dir, "title.png")
-                caption_maker.create_title_card(
-                    title=post.get('title', ''),
-                    subreddit=subreddit,
-                    author=post.get('author', 'unknown'),
-                    output_path=title_image
-                )
-                
-                # Images des commentaires
-                comment_images = []
-                for j, comment in enumerate(post.get('comments', [])):
-                    comment_image = os.path.join(images_dir, f"comment_{j}.png")
-                    caption_maker.create_comment_card(
-                        comment_text=comment.get('body', ''),
-                        author=comment.get('author', 'unknown'),
-                        upvotes=comment.get('score', 0),
-                        output_path=comment_image,
-                        media=comment.get('media', None)  # Passer les informations de médias
-                    )
-                    comment_images.append(comment_image)
+                # Fichier de sortie
+                output_audio = os.path.join(audio_dir, f"{post_id}_audio.wav")  # Audio combiné séparé (PCM)
                 
-                # Créer l'audio
+                # Créer l'audio (partagé par tous les formats d'export)
                 logging.info("Création de l'audio...")
                 
-                # Générer l'audio pour le titre
-                title_audio = os.path.join(audio_dir, "title.mp3")
-                self.tts_generator.generate_tts(
-                    post.get('title', ''),
-                    title_audio
-                )
+                # Générer l'audio du titre et de chaque commentaire en parallèle
+                title_audio = os.path.join(audio_dir, f"title{self.tts_generator.extension}")
+                comment_audios = [os.path.join(audio_dir, f"comment_{i}{self.tts_generator.extension}")
+                                  for i in range(len(post.get('comments', [])[:5]))]  # Limiter à 5 commentaires
+                texts = [post.get('title', '')] + [comment.get('body', '') for comment in post.get('comments', [])[:5]]
+                tts_results = self.tts_generator.generate_batch(zip(texts, [title_audio] + comment_audios))
+                failed = [result for result in tts_results if result['error']]
+                if failed:
+                    logging.warning(f"[TTS] {len(failed)}/{len(tts_results)} voix n'ont pas pu être générées")
                 
-                # Générer l'audio pour chaque commentaire
-                comment_audios = []
-                for i, comment in enumerate(post.get('comments', [])[:5]):  # Limiter à 5 commentaires
-                    comment_audio = os.path.join(audio_dir, f"comment_{i}.mp3")
-                    self.tts_generator.generate_tts(
-                        comment.get('body', ''),
-                        comment_audio
-                    )
-                    comment_audios.append(comment_audio)
+                if self.tts_cache is not None:
+                    logging.info(f"[TTS] Cache des voix: {self.tts_cache.hits} réutilisées, "
+                                 f"{self.tts_cache.misses} synthétisées")
+                    self.tts_cache.evict()
                 
-                # Combiner tous les fichiers audio
-                all_audio_files = [title_audio] + comment_audios
-                if not self.tts_generator.combine_audio_files(all_audio_files, output_audio):
+                # Combiner tous les fichiers audio, séparés par le silence configuré
+                # (chemins renvoyés par la génération : les voix assemblées phrase par phrase sont en .wav)
+                all_audio_files = [result['path'] or path
+                                   for result, path in zip(tts_results, [title_audio] + comment_audios)]
+                audio_segments = self.tts_generator.combine_audio_files(
+                    all_audio_files, output_audio,
+                    silence=config.AUDIO_CONFIG.get('silence_between_segments', 0.0))
+                if not audio_segments:
                     logging.error("Erreur lors de la combinaison des fichiers audio")
                     continue
+                logging.info("[AUDIO] Positions des voix: " +
+                             ", ".join(f"{start:.3f}-{end:.3f}s" for start, end in audio_segments))
                 
-                # Ajouter les images à la vidéo
-                video_maker.add_image(title_image, duration=5)
-                for image in comment_images:
-                    video_maker.add_image(image, duration=5)
-                
-                # Rendre la vidéo
-                if not video_maker.render():
-                    logging.error("Erreur lors du rendu de la vidéo")
-                    continue
-                
-                # Ajouter l'audio à la vidéo
-                if os.path.exists(output_audio) and os.path.getsize(output_audio) > 0:
-                    logging.info(f"[VIDEO] Début de l'ajout d'audio")
-                    final_video_path = os.path.join(video_dir, f"{post_id}_final.mp4")
-                    
-                    if video_maker.add_audio_to_video(output_video, output_audio, final_video_path):
-                        videos_created.append({
-                            'path': final_video_path,
-                            'audio': output_audio,
-                            'title': post.get('title', '')[:50]
-                        })
-                    else:
-                        logging.error("Erreur lors de l'ajout de l'audio à la vidéo")
-                        # En cas d'échec, essayer de conserver au moins la vidéo sans audio
-                        if os.path.exists(output_video) and os.path.getsize(output_video) > 0:
-                            videos_created.append({
-                                'path': output_video,
-                                'audio': None,
-                                'title': post.get('title', '')[:50]
-                            })
-                else:
-                    logging.error("Fichier audio manquant ou vide, impossible d'ajouter l'audio à la vidéo")
-                    # Conserver la vidéo sans audio si elle existe
-                    if os.path.exists(output_video) and os.path.getsize(output_video) > 0:
-                        videos_created.append({
-                            'path': output_video,
-                            'audio': None,
-                            'title': post.get('title', '')[:50]
-                        })
+                # Exporter chaque format à partir de la même ligne de temps et du même audio
+                for export_format in export_formats:
+                    video = self._export_format(export_format, caption_makers[export_format['name']], post,
+                                                subreddit, post_id, images_dir, video_dir, output_audio,
+                                                audio_segments)
+                    if video:
+                        videos_created.append(video)
                 
             except Exception as e:
                 logging.error(f"Erreur lors de la création de la vidéo pour le post: {e}")
@@ -316,9 +301,339 @@ class RedditTikTokCreator:
         # Afficher le résumé
         elapsed_time = time.time() - start_time
         logging.info(f"Processus terminé en {elapsed_time:.2f} secondes.")
-        logging.info(f"Vidéos créées: {len(videos_created)}/{video_count}")
+        logging.info(f"Vidéos créées: {len(videos_created)} ({len(posts)} posts x {len(export_formats)} formats)")
         
         return videos_created
+
+    def create_compilation(self, date=None, max_duration=None):
+        """
+        Compile les vidéos finies d'une journée en une vidéo longue avec chapitres.
+
+        Les posts de output/ sont repris dans l'ordre de création, entre l'intro
+        et l'outro de COMPILATION_CONFIG, jusqu'à la durée maximale. Les vidéos
+        sont jointes sans ré-encodage quand leurs paramètres correspondent au
+        profil de rendu ; seules les autres sont ré-encodées.
+
+        Args:
+            date: Jour des posts (YYYYMMDD), aujourd'hui par défaut
+            max_duration: Durée maximale en secondes, celle de COMPILATION_CONFIG par défaut
+
+        Returns:
+            dict: Résultat de CompilationBuilder.build, ou None si aucune vidéo n'est disponible
+        """
+        settings = self.render_settings
+        compilation_config = config.COMPILATION_CONFIG
+        date = date or datetime.now().strftime("%Y%m%d")
+        max_duration = max_duration or compilation_config.get('max_duration', 600)
+        output_suffix = settings['output_suffix']
+
+        # Dossiers de posts "{subreddit}_{titre}_{YYYYMMDD}_{HHMMSS}" du jour, dans l'ordre de création
+        posts = []
+        for name in os.listdir(self.output_dir):
+            match = re.match(r"(.+)_(\d{8})_(\d{6})$", name)
+            video_path = os.path.join(self.output_dir, name, 'video', f"{name}_{output_suffix}.mp4")
+            # Version sans bumpers si la vidéo en a reçu : la compilation ajoute les siens
+            if os.path.exists(master_path(video_path)):
+                video_path = master_path(video_path)
+            if match and match.group(2) == date and os.path.exists(video_path):
+                posts.append((match.group(2) + match.group(3), match.group(1), video_path))
+        posts.sort()
+
+        parts, total_duration = [], 0.0
+        for _, label, video_path in posts:
+            timings = stream_timings(video_path)
+            if not timings or 'video' not in timings:
+                logging.warning(f"[COMPILATION] Vidéo illisible ignorée: {video_path}")
+                continue
+            duration = timings['video'][1] - max(timings['video'][0], 0.0)
+            if parts and total_duration + duration > max_duration:
+                break
+            subreddit, _, title = label.partition('_')
+            parts.append({'path': video_path, 'title': f"r/{subreddit}: {title.replace('_', ' ')}"})
+            total_duration += duration
+
+        if not parts:
+            logging.error(f"[COMPILATION] Aucune vidéo '{output_suffix}' trouvée pour le {date} dans {self.output_dir}")
+            return None
+
+        mp4_layout = settings.get('mp4_layout', 'faststart')
+        builder = CompilationBuilder(
+            output_size=self._export_formats()[0]['size'],
+            fps=settings.get('fps', 30),
+            video_codec=settings.get('video_codec', 'libx264'),
+            video_bitrate=settings.get('video_bitrate', '5000k'),
+            video_preset=settings.get('video_preset', 'veryfast'),
+            video_crf=settings.get('video_crf'),
+            video_bframes=MP4_LAYOUT_BFRAMES.get(mp4_layout),
+            mp4_layout=mp4_layout
+        )
+
+        # Intro et outro pré-encodées aux paramètres de la compilation : copiées sans ré-encodage
+        fingerprint = BumperLibrary.fingerprint(
+            size=(builder.width, builder.height), fps=builder.fps, video_codec=builder.video_codec,
+            video_bitrate=builder.video_bitrate, video_crf=builder.video_crf, video_preset=builder.video_preset,
+            video_tune=settings.get('video_tune'), video_bframes=builder.video_bframes,
+            audio_sample_rate=builder.audio_sample_rate, audio_bitrate=builder.audio_bitrate
+        )
+        for key, title in (('intro', 'Intro'), ('outro', 'Outro')):
+            bumper = compilation_config.get(key)
+            if bumper and os.path.exists(os.path.join(self.resources_dir, bumper)):
+                source = os.path.join(self.resources_dir, bumper)
+                part = {'path': self.bumper_library.get(source, fingerprint) or source, 'title': title}
+                if key == 'intro':
+                    parts.insert(0, part)
+                else:
+                    parts.append(part)
+        compilation_dir = os.path.join(self.output_dir, compilation_config.get('directory', 'compilations'))
+        os.makedirs(compilation_dir, exist_ok=True)
+        output_path = os.path.join(compilation_dir, f"compilation_{date}_{output_suffix}.mp4")
+        return builder.build(parts, output_path, title=f"Compilation du {date[6:8]}/{date[4:6]}/{date[:4]}")
+
+    def _export_formats(self):
+        """
+        Formats d'export (VIDEO_CONFIG["export_formats"]) à la résolution du profil de rendu.
+        
+        Le petit côté de chaque format est celui du profil ; les rendus
+        supplémentaires sont adaptés au ratio de chaque format.
+        
+        Returns:
+            list: [{'name', 'size', 'suffix', 'renditions', 'thumbnails'}], le premier format sans suffixe
+        """
+        settings = self.render_settings
+        short_side = min(settings.get('width', 1080), settings.get('height', 1920))
+        formats = []
+        for index, name in enumerate(settings.get('export_formats') or ['portrait']):
+            ratio = config.EXPORT_FORMATS[name]
+            renditions = []
+            for rendition in settings.get('renditions', []):
+                width, height = aspect_size(ratio, min(rendition['width'], rendition['height']))
+                renditions.append({**rendition, 'width': width, 'height': height})
+            # Miniatures jamais plus grandes que la vidéo (la carte de titre est à la taille de sortie)
+            thumbnails = []
+            for thumbnail in settings.get('thumbnails', []):
+                width, height = aspect_size(ratio, min(thumbnail['width'], thumbnail['height'], short_side))
+                thumbnails.append({**thumbnail, 'width': width, 'height': height})
+            formats.append({
+                'name': name,
+                'size': aspect_size(ratio, short_side),
+                'suffix': '' if index == 0 else f"_{name}",
+                'renditions': renditions,
+                'thumbnails': thumbnails
+            })
+        return formats
+    
+    def _background_proxy_cache(self, size):
+        """Cache des proxies d'arrière-plan à la taille d'un format d'export"""
+        cache = self.background_caches.get(size)
+        if cache is None:
+            cache = self.background_caches[size] = BackgroundProxyCache(
+                os.path.join(self.cache_dir, 'backgrounds'),
+                output_size=size,
+                fps=self.render_settings.get('fps', 30),
+                keyframe_interval=config.BACKGROUND_CONFIG.get('proxy_keyframe_interval', 1.0),
+                crf=config.BACKGROUND_CONFIG.get('proxy_crf', 23)
+            )
+        return cache
+    
+    def _export_format(self, export_format, caption_maker, post, subreddit, post_id, images_dir, video_dir,
+                       output_audio, audio_segments):
+        """
+        Crée les cartes, rend la vidéo et ajoute l'audio d'un post dans un format d'export.
+        
+        Args:
+            export_format: Format {'name', 'size', 'suffix', 'renditions', 'thumbnails'} (voir _export_formats)
+            caption_maker: CommentCardCreator à la taille du format
+            post: Post Reddit
+            subreddit: Nom du subreddit
+            post_id: Identifiant du post (préfixe des fichiers)
+            images_dir: Dossier des images du post
+            video_dir: Dossier des vidéos du post
+            output_audio: Audio combiné du post, partagé par tous les formats
+            audio_segments: Positions (début, fin) des voix du titre et des commentaires dans
+                            output_audio (voir TTSGenerator.combine_audio_files)
+            
+        Returns:
+            dict: Vidéo créée {'path', 'audio', 'title', 'renditions', 'thumbnails', 'format'}, ou None en cas d'échec
+        """
+        settings = self.render_settings
+        output_suffix = settings['output_suffix'] + export_format['suffix']
+        output_video = os.path.join(video_dir, f"{post_id}{export_format['suffix']}_video.mp4")  # Vidéo sans audio
+        
+        # Cartes du format principal dans images/, celles des autres formats dans un sous-dossier
+        if export_format['suffix']:
+            images_dir = os.path.join(images_dir, export_format['name'])
+            os.makedirs(images_dir, exist_ok=True)
+        
+        # Initialiser le créateur de vidéos
+        video_maker = TikTokVideoMaker(
+            output_path=output_video,
+            output_size=export_format['size'],
+            fps=settings.get('fps', 30),
+            video_codec=settings.get('video_codec', 'libx264'),
+            video_bitrate=settings.get('video_bitrate', '5000k'),
+            mux_mode=settings.get('mux_mode', 'copy'),
+            render_engine=settings.get('render_engine', 'moviepy'),
+            render_workers=settings.get('render_workers', 1),
+            cache_dir=self.cache_dir,
+            zoom_effect=settings.get('enable_zoom_effect', False),
+            zoom_ratio=settings.get('zoom_ratio', 1.08),
+            zoom_frame_budget_ms=settings.get('zoom_frame_budget_ms'),
+            transition=settings.get('transition', 'none'),
+            transition_duration=settings.get('transition_duration', 0.0),
+            video_preset=settings.get('video_preset', 'veryfast'),
+            video_crf=settings.get('video_crf'),
+            video_tune=settings.get('video_tune'),
+            still_tune=settings.get('still_tune', 'stillimage'),
+            renditions=export_format['renditions'],
+            segment_cache_size_mb=settings.get('segment_cache_size_mb', 0),
+            still_fps=settings.get('still_fps'),
+            mp4_layout=settings.get('mp4_layout', 'faststart'),
+            thumbnails=export_format['thumbnails']
+        )
+        
+        # Durée de chaque carte d'après la position de sa voix dans la piste : jusqu'au début
+        # de la voix suivante, la dernière jusqu'à la fin de sa voix. Les commentaires sans voix
+        # (au-delà des voix générées) gardent 5 secondes ; une carte dont la voix manque est retirée
+        voice_durations = segment_durations(audio_segments, fps=settings.get('fps', 30))
+        card_durations = [voice_durations[i] if i < len(voice_durations) else 5
+                          for i in range(1 + len(post.get('comments', [])))]
+        
+        # Choisir une fenêtre aléatoire de vidéo d'arrière-plan si le mode est activé
+        # (même tirage pour tous les formats du post : même source, même image clé)
+        background_window = None
+        if config.BACKGROUND_CONFIG.get('enabled', False):
+            total_duration = sum(card_durations)
+            background_window = self._background_proxy_cache(export_format['size']).pick_window(
+                self.backgrounds_dir, total_duration, rng=random.Random(post_id))
+            if background_window:
+                video_maker.set_background_video(
+                    background_window['path'],
+                    start=background_window['start'],
+                    loop=background_window['loop'],
+                    source_duration=background_window['source_duration']
+                )
+        
+        # Cartes transparentes pour laisser voir l'arrière-plan vidéo
+        caption_maker.transparent_background = background_window is not None
+        
+        # Créer les images
+        logging.info(f"Création des images ({export_format['name']})...")
+        
+        # Image du titre
+        title_image = os.path.join(images_dir, "title.png")
+        caption_maker.create_title_card(
+            title=post.get('title', ''),
+            subreddit=subreddit,
+            author=post.get('author', 'unknown'),
+            output_path=title_image
+        )
+        
+        # Images des commentaires
+        comment_images = []
+        for j, comment in enumerate(post.get('comments', [])):
+            comment_image = os.path.join(images_dir, f"comment_{j}.png")
+            caption_maker.create_comment_card(
+                comment_text=comment.get('body', ''),
+                author=comment.get('author', 'unknown'),
+                upvotes=comment.get('score', 0),
+                output_path=comment_image,
+                media=comment.get('media', None)  # Passer les informations de médias
+            )
+            comment_images.append(comment_image)
+        
+        # Ajouter les images à la vidéo, calées sur les voix
+        for image, duration in zip([title_image] + comment_images, card_durations):
+            if duration <= 0:
+                logging.warning(f"[VIDEO] Carte sans voix retirée: {os.path.basename(image)}")
+                continue
+            video_maker.add_image(image, duration=duration)
+        
+        # Le moteur filtergraph mixe l'audio pendant le rendu
+        video_maker.set_audio(output_audio, music_volume=config.AUDIO_CONFIG.get('background_music_volume', -15))
+        
+        # Rendre la vidéo
+        if not video_maker.render():
+            logging.error(f"Erreur lors du rendu de la vidéo ({export_format['name']})")
+            return None
+        
+        # Ajouter l'audio à la vidéo et à chacun de ses rendus supplémentaires
+        final_video_path = os.path.join(video_dir, f"{post_id}_{output_suffix}.mp4")
+        outputs = [(output_video, final_video_path)] + [
+            (rendition_path(output_video, r), rendition_path(final_video_path, r))
+            for r in video_maker.renditions
+        ]
+        renditions = {r['name']: rendition_path(final_video_path, r) for r in video_maker.renditions}
+        
+        # Miniatures tirées de la carte de titre, sans décoder la vidéo
+        thumbnails = video_maker.write_thumbnails(final_video_path)
+        if video_maker.last_render_has_audio:
+            for video_path, final_path in outputs:
+                os.replace(video_path, final_path)
+            self._add_bumpers(video_maker, final_video_path)
+            return {
+                'path': final_video_path,
+                'audio': output_audio,
+                'title': post.get('title', '')[:50],
+                'renditions': renditions,
+                'thumbnails': thumbnails,
+                'format': export_format['name']
+            }
+        elif os.path.exists(output_audio) and os.path.getsize(output_audio) > 0:
+            logging.info(f"[VIDEO] Début de l'ajout d'audio")
+        
+            if all(video_maker.add_audio_to_video(video_path, output_audio, final_path)
+                   for video_path, final_path in outputs):
+                self._add_bumpers(video_maker, final_video_path)
+                return {
+                    'path': final_video_path,
+                    'audio': output_audio,
+                    'title': post.get('title', '')[:50],
+                    'renditions': renditions,
+                    'thumbnails': thumbnails,
+                    'format': export_format['name']
+                }
+            else:
+                logging.error("Erreur lors de l'ajout de l'audio à la vidéo")
+                # En cas d'échec, essayer de conserver au moins la vidéo sans audio
+                if os.path.exists(output_video) and os.path.getsize(output_video) > 0:
+                    return {
+                        'path': output_video,
+                        'audio': None,
+                        'title': post.get('title', '')[:50],
+                        'format': export_format['name']
+                    }
+        else:
+            logging.error("Fichier audio manquant ou vide, impossible d'ajouter l'audio à la vidéo")
+            # Conserver la vidéo sans audio si elle existe
+            if os.path.exists(output_video) and os.path.getsize(output_video) > 0:
+                return {
+                    'path': output_video,
+                    'audio': None,
+                    'title': post.get('title', '')[:50],
+                    'format': export_format['name']
+                }
+        return None
+    
+    def _add_bumpers(self, video_maker, final_video_path):
+        """
+        Ajoute l'intro et l'outro du profil (VIDEO_CONFIG["bumpers"]) à une vidéo finale et à ses rendus.
+
+        La vidéo principale sans bumpers est conservée à côté (voir master_path) :
+        les compilations la reprennent entre leurs propres intro et outro.
+
+        Args:
+            video_maker: TikTokVideoMaker qui a rendu la vidéo
+            final_video_path: Vidéo finale (avec audio)
+        """
+        bumpers = self.render_settings.get('bumpers') or {}
+        intro, outro = (os.path.join(self.resources_dir, bumpers[key]) if bumpers.get(key) else None
+                        for key in ('intro', 'outro'))
+        if not any(path and os.path.exists(path) for path in (intro, outro)):
+            return
+        for rendition in [None] + video_maker.renditions:
+            path = rendition_path(final_video_path, rendition) if rendition else final_video_path
+            video_maker.add_bumpers(path, self.bumper_library, intro=intro, outro=outro, rendition=rendition,
+                                    master_path=None if rendition else master_path(final_video_path))
     
     def _cleanup_temp_files(self):
         """Supprime les fichiers temporaires mais conserve les dossiers dans output."""
@@ -424,6 +739,18 @@ def main():
         parser.add_argument('--output', type=str, help='Alias pour --output-dir')
         parser.add_argument('--cleanup', action='store_true', 
                           help='Nettoyer les dossiers vides sans générer de vidéos')
+        parser.add_argument('--profile', type=str, default=None, choices=list(config.RENDER_PROFILES.keys()),
+                            help='Profil de rendu: preview (aperçu), draft (relecture rapide), standard ou final (mise en ligne)')
+        parser.add_argument('--preview', action='store_true',
+                            help="Aperçu basse résolution (profil preview) pour vérifier le rythme et le contenu")
+        parser.add_argument('--warm-backgrounds', action='store_true',
+                          help="Créer les proxies des vidéos d'arrière-plan sans générer de vidéos")
+        parser.add_argument('--compile', action='store_true',
+                          help="Compiler les vidéos finies du jour (intro, posts, outro, chapitres) sans générer de vidéos")
+        parser.add_argument('--compile-date', type=str, default=None,
+                          help="Jour des posts à compiler (YYYYMMDD, aujourd'hui par défaut)")
+        parser.add_argument('--compile-duration', type=float, default=None,
+                          help="Durée maximale de la compilation en secondes (COMPILATION_CONFIG par défaut)")
         
         args = parser.parse_args()
         
@@ -434,17 +761,44 @@ def main():
             args.sorting = args.sort
         if args.output and not args.output_dir:
             args.output_dir = args.output
+        if args.preview:
+            args.profile = 'preview'
         
         if args.cleanup:
             # Nettoyer les dossiers vides sans générer de vidéos
-            creator = RedditTikTokCreator(output_dir=args.output_dir)
+            creator = RedditTikTokCreator(output_dir=args.output_dir, profile=args.profile)
             empty_dirs_removed = creator._clean_output_directory(creator.output_dir, remove_all=True)
             temp_removed = creator._clean_output_directory(creator.temp_dir, remove_all=True)
             print(f"Nettoyage termine: {empty_dirs_removed[1]} dossiers vides et {temp_removed[0]} fichiers temporaires supprimes")
             return
         
+        if args.warm_backgrounds:
+            # Préparer les proxies des arrière-plans sans générer de vidéos
+            creator = RedditTikTokCreator(output_dir=args.output_dir, profile=args.profile)
+            proxies = {}
+            for export_format in creator._export_formats():
+                cache = creator._background_proxy_cache(export_format['size'])
+                proxies.update({f"{source} ({export_format['name']})": proxy
+                                for source, proxy in cache.warm(creator.backgrounds_dir).items()})
+            for source, proxy in proxies.items():
+                print(f"{os.path.basename(source)} -> {proxy if proxy else 'ECHEC'}")
+            print(f"Proxies prets: {sum(1 for p in proxies.values() if p)}/{len(proxies)}")
+            return
+        
+        if args.compile:
+            # Joindre les vidéos déjà générées sans générer de vidéos
+            creator = RedditTikTokCreator(output_dir=args.output_dir, profile=args.profile)
+            compilation = creator.create_compilation(date=args.compile_date, max_duration=args.compile_duration)
+            if not compilation:
+                print("Echec de la compilation")
+                sys.exit(1)
+            print(f"Compilation: {compilation['path']} ({compilation['duration']:.0f}s, "
+                  f"{compilation['copied']} copiees, {compilation['reencoded']} re-encodees)")
+            print(f"Chapitres: {compilation['chapters_path']}")
+            return
+        
         # Créer l'instance et générer les vidéos
-        creator = RedditTikTokCreator(output_dir=args.output_dir)
+        creator = RedditTikTokCreator(output_dir=args.output_dir, profile=args.profile)
         
         print(f"Recuperation des posts depuis r/{args.subreddit} (tri: {args.sorting or 'default'})...")
         videos = creator.create_video(
@@ -462,8 +816,12 @@ def main():
         if videos:
             print("\nVideos generees avec succes:")
             for i, video in enumerate(videos):
-                print(f"{i+1}. {os.path.basename(video['path'])}")
+                print(f"{i+1}. {os.path.basename(video['path'])} [{video.get('format', 'portrait')}]")
                 print(f"   Audio: {os.path.basename(video['audio']) if video['audio'] else 'None'}")
+                for name, path in video.get('renditions', {}).items():
+                    print(f"   {name}: {os.path.basename(path)}")
+                for name, path in video.get('thumbnails', {}).items():
+                    print(f"   Miniature {name}: {os.path.basename(path)}")
                 print(f"   Titre: {video['title'][:50]}...")
             
             print(f"\nTotal: {len(videos)} videos")
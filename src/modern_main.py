@@ -185,7 +185,7 @@ class RedditTikTokCreator:
             audio_dir.mkdir(parents=True, exist_ok=True)
             
             # Générer l'audio du titre
-            title_audio_path = audio_dir / "title_audio.mp3"
+            title_audio_path = audio_dir / f"title_audio{self.audio_maker.extension}"
             title_audio = self.audio_maker.create_audio_for_text(
                 f"From {author} on Reddit: {post.title}", 
                 title_audio_path
@@ -194,7 +194,7 @@ class RedditTikTokCreator:
             # Générer l'audio pour chaque commentaire
             comment_audios = []
             for i, comment in enumerate(comments):
-                comment_audio_path = audio_dir / f"comment_{i}_audio.mp3"
+                comment_audio_path = audio_dir / f"comment_{i}_audio{self.audio_maker.extension}"
                 comment_audio = self.audio_maker.create_audio_for_text(
                     comment["text"],
                     comment_audio_path
@@ -227,7 +227,7 @@ class RedditTikTokCreator:
                 self.video_maker.add_image_clip(str(image_path), comment_duration)
                 
             # Ajouter l'audio
-            self.video_maker.add_audio(final_audio)
+            self.video_maker.add_audio(str(final_audio_path))
             
             # Rendre la vidéo finale
             output_path = video_dir / f"{sanitized_title}_video.mp4"
@@ -0,0 +1,101 @@
+"""
+Assemblage des voix d'un post en une seule piste PCM.
+
+Chaque segment (titre, commentaires) est décodé une seule fois par ffmpeg à
+une fréquence d'échantillonnage commune, puis copié à sa position dans un
+tableau NumPy alloué une fois pour toute la piste, avec le silence configuré
+entre deux segments. La piste est écrite en WAV : le seul encodage compressé
+est celui du mux final. Les positions de chaque segment sont exactes à
+l'échantillon près ; segment_durations en déduit la durée d'affichage de
+la carte de chaque segment.
+"""
+
+import os
+import math
+import logging
+
+import numpy as np
+import soundfile as sf
+
+from .ffmpeg_tools import decode_audio
+
+
+def assemble_segments(audio_files, output_path, silence=0.0, sample_rate=44100, channels=2):
+    """
+    Assemble des fichiers audio les uns après les autres dans un WAV.
+
+    Args:
+        audio_files: Chemins des segments, dans l'ordre (les fichiers absents ou
+                     illisibles donnent un segment vide, sans silence ajouté)
+        output_path: Chemin du fichier WAV écrit
+        silence: Silence entre deux segments, en secondes
+        sample_rate: Fréquence d'échantillonnage de la piste
+        channels: Nombre de canaux de la piste
+
+    Returns:
+        list: Positions (début, fin) de chaque segment en secondes, dans l'ordre
+              de audio_files, ou None si aucun segment n'a pu être décodé
+    """
+    segments = []
+    for path in audio_files:
+        samples = None
+        if os.path.exists(path):
+            samples, _ = decode_audio(path, sample_rate, channels)
+        if samples is None:
+            logging.warning(f"[AUDIO] Segment ignoré (absent ou illisible): {path}")
+        segments.append(samples)
+
+    decoded = [samples for samples in segments if samples is not None]
+    if not decoded:
+        logging.error("[AUDIO] Aucun fichier audio valide à assembler")
+        return None
+
+    gap = int(round(silence * sample_rate))
+    total = sum(len(samples) for samples in decoded) + gap * (len(decoded) - 1)
+    track = np.zeros((total, channels), dtype=np.float32)
+
+    offsets, position, placed = [], 0, 0
+    for samples in segments:
+        if samples is None:
+            offsets.append((position / sample_rate, position / sample_rate))
+            continue
+        if placed:
+            position += gap
+        track[position:position + len(samples)] = samples
+        offsets.append((position / sample_rate, (position + len(samples)) / sample_rate))
+        position += len(samples)
+        placed += 1
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    # Écrêtage explicite : la conversion en 16 bits ne sature pas d'elle-même
+    np.clip(track, -1.0, 1.0, out=track)
+    sf.write(output_path, track, sample_rate, format='WAV', subtype='PCM_16')
+    logging.info(f"[AUDIO] {len(decoded)} segments assemblés ({total / sample_rate:.2f}s): {output_path}")
+    return offsets
+
+
+def segment_durations(offsets, fps=None):
+    """
+    Durée d'affichage de chaque segment d'après sa position dans la piste : jusqu'au
+    début du segment suivant (silence compris), le dernier jusqu'à sa propre fin.
+
+    Args:
+        offsets: Positions (début, fin) des segments en secondes (voir assemble_segments)
+        fps: Images par seconde ; si défini, les limites sont arrondies à l'image près
+             pour que l'arrondi de chaque carte ne décale pas les suivantes (la fin du
+             dernier segment à l'image supérieure, pour ne pas couper la piste)
+
+    Returns:
+        list: Durée de chaque segment en secondes, 0 pour un segment vide (voix absente)
+    """
+    def snap(seconds, up=False):
+        if not fps:
+            return seconds
+        return (math.ceil(seconds * fps - 1e-6) if up else round(seconds * fps)) / fps
+
+    durations = [0.0] * len(offsets)
+    voiced = [i for i, (start, end) in enumerate(offsets) if end > start]
+    for i, following in zip(voiced, voiced[1:] + [None]):
+        stop = offsets[following][0] if following is not None else offsets[i][1]
+        durations[i] = snap(stop, up=following is None) - snap(offsets[i][0])
+    return durations
@@ -0,0 +1,282 @@
+"""
+Cache de proxies pour les vidéos d'arrière-plan.
+
+Les vidéos de resources/backgrounds peuvent être en 4K paysage. Chaque source
+est transcodée une seule fois en proxy portrait, à la résolution de sortie et
+avec des images clés rapprochées ; les rendus ne lisent ensuite que le proxy.
+
+Un index des images clés est enregistré avec chaque proxy : une fenêtre
+aléatoire commence toujours sur une image clé, la recherche ne décode donc
+jamais le début du fichier, quelle que soit sa longueur.
+"""
+
+import os
+import json
+import random
+import bisect
+import hashlib
+import logging
+
+from .ffmpeg_tools import run_ffmpeg, probe_media, list_keyframes
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.mkv', '.webm', '.avi')
+
+
+class BackgroundProxyCache:
+    """Transcode et met en cache les vidéos d'arrière-plan"""
+
+    def __init__(self, cache_dir, output_size=(1080, 1920), fps=30, keyframe_interval=1.0, crf=23):
+        """
+        Initialise le cache de proxies.
+
+        Args:
+            cache_dir: Dossier de stockage des proxies
+            output_size: Taille des proxies (width, height)
+            fps: Images par seconde des proxies
+            keyframe_interval: Intervalle entre deux images clés, en secondes
+            crf: Qualité x264 des proxies
+        """
+        self.cache_dir = cache_dir
+        self.width, self.height = output_size
+        self.fps = fps
+        self.keyframe_interval = keyframe_interval
+        self.crf = crf
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _load_index(self):
+        """Charge l'index des hash de sources déjà calculés"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        """Sauvegarde l'index de manière atomique"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def source_fingerprint(self, source_path):
+        """
+        Calcule l'empreinte d'une source (taille, date de modification, hash).
+
+        Le hash du contenu n'est recalculé que si la taille ou la date de
+        modification ont changé depuis le dernier calcul.
+
+        Args:
+            source_path: Chemin vers la vidéo source
+
+        Returns:
+            dict: {'size', 'mtime_ns', 'sha1'}
+        """
+        source_path = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        index = self._load_index()
+        entry = index.get(source_path)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return entry
+
+        sha1 = hashlib.sha1()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': sha1.hexdigest()}
+        index[source_path] = entry
+        self._save_index(index)
+        return entry
+
+    def proxy_path(self, source_path):
+        """
+        Chemin du proxy correspondant à une source et aux paramètres du cache.
+
+        Args:
+            source_path: Chemin vers la vidéo source
+
+        Returns:
+            str: Chemin du proxy
+        """
+        fingerprint = self.source_fingerprint(source_path)
+        params = f"{fingerprint['size']}:{fingerprint['mtime_ns']}:{fingerprint['sha1']}:" \
+                 f"{self.width}x{self.height}:{self.fps}:{self.keyframe_interval}:{self.crf}"
+        key = hashlib.sha1(params.encode()).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.cache_dir, f"{stem}_{key}.mp4")
+
+    def get_proxy(self, source_path):
+        """
+        Renvoie le proxy d'une source, en le créant si nécessaire.
+
+        Args:
+            source_path: Chemin vers la vidéo source
+
+        Returns:
+            str: Chemin du proxy, ou None en cas d'erreur
+        """
+        try:
+            proxy_path = self.proxy_path(source_path)
+        except OSError as e:
+            logging.error(f"[BACKGROUND] Source illisible {source_path}: {e}")
+            return None
+
+        if os.path.exists(proxy_path) and os.path.exists(f"{proxy_path}.json"):
+            return proxy_path
+
+        if not self.transcode(source_path, proxy_path):
+            return None
+        return proxy_path
+
+    def transcode(self, source_path, proxy_path):
+        """
+        Transcode une source en proxy portrait à la résolution de sortie.
+
+        L'image est recadrée au centre pour remplir le format portrait, et une
+        image clé est forcée toutes les `keyframe_interval` secondes.
+
+        Args:
+            source_path: Chemin vers la vidéo source
+            proxy_path: Chemin du proxy à créer
+
+        Returns:
+            bool: True si le proxy a été créé, False sinon
+        """
+        logging.info(f"[BACKGROUND] Création du proxy de {os.path.basename(source_path)}...")
+        gop = max(1, int(round(self.keyframe_interval * self.fps)))
+        tmp_path = f"{proxy_path}.{os.getpid()}.tmp.mp4"
+        args = [
+            '-i', source_path,
+            '-an',
+            '-vf', f"scale={self.width}:{self.height}:force_original_aspect_ratio=increase,"
+                   f"crop={self.width}:{self.height},fps={self.fps},format=yuv420p",
+            '-c:v', 'libx264',
+            '-preset', 'veryfast',
+            '-crf', str(self.crf),
+            '-g', str(gop),
+            '-keyint_min', str(gop),
+            '-sc_threshold', '0',
+            '-movflags', '+faststart',
+            tmp_path
+        ]
+        if not run_ffmpeg(args):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            logging.error(f"[BACKGROUND] Échec de la création du proxy: {source_path}")
+            return False
+
+        infos = probe_media(tmp_path) or {}
+        metadata = {
+            'source': os.path.abspath(source_path),
+            'duration': infos.get('video_duration') or infos.get('duration'),
+            'size': [self.width, self.height],
+            'fps': self.fps,
+            'keyframe_interval': self.keyframe_interval,
+            'keyframes': list_keyframes(tmp_path) or [0.0],
+        }
+        os.replace(tmp_path, proxy_path)
+        with open(f"{proxy_path}.json", 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+
+        logging.info(f"[BACKGROUND] Proxy créé: {proxy_path}")
+        return True
+
+    def load_metadata(self, proxy_path):
+        """Lit les métadonnées enregistrées à côté d'un proxy"""
+        try:
+            with open(f"{proxy_path}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def keyframe_index(self, proxy_path):
+        """
+        Renvoie l'index des images clés d'un proxy et sa durée.
+
+        L'index est lu depuis les métadonnées du proxy, et calculé puis
+        enregistré s'il manque (proxies créés par une version antérieure).
+
+        Args:
+            proxy_path: Chemin du proxy
+
+        Returns:
+            tuple: (liste des instants des images clés, durée du proxy)
+        """
+        metadata = self.load_metadata(proxy_path) or {}
+        if not metadata.get('keyframes') or not metadata.get('duration'):
+            infos = probe_media(proxy_path) or {}
+            metadata['duration'] = infos.get('video_duration') or infos.get('duration') or 0
+            metadata['keyframes'] = list_keyframes(proxy_path) or [0.0]
+            with open(f"{proxy_path}.json", 'w', encoding='utf-8') as f:
+                json.dump(metadata, f, indent=2)
+        return metadata['keyframes'], metadata['duration']
+
+    def pick_window(self, backgrounds_dir, duration, rng=None):
+        """
+        Choisit une fenêtre aléatoire dans une vidéo d'arrière-plan.
+
+        La fenêtre commence sur une image clé du proxy, tirée au hasard parmi
+        celles qui laissent assez de place pour toute la durée demandée.
+
+        Args:
+            backgrounds_dir: Dossier des vidéos d'arrière-plan
+            duration: Durée de la fenêtre en secondes
+            rng: Générateur aléatoire (random.Random), module random par défaut
+
+        Returns:
+            dict: {'path', 'start', 'duration', 'loop', 'source_duration'} ou None
+                  si aucun arrière-plan n'est disponible
+        """
+        rng = rng or random
+        sources = self.list_sources(backgrounds_dir)
+        rng.shuffle(sources)
+
+        for source_path in sources:
+            proxy_path = self.get_proxy(source_path)
+            if not proxy_path:
+                continue
+
+            keyframes, proxy_duration = self.keyframe_index(proxy_path)
+            if proxy_duration <= 0:
+                continue
+
+            # Proxy plus court que la vidéo : lecture en boucle depuis le début
+            if proxy_duration < duration:
+                return {'path': proxy_path, 'start': 0.0, 'duration': duration, 'loop': True,
+                        'source_duration': proxy_duration}
+
+            last_start = bisect.bisect_right(keyframes, proxy_duration - duration)
+            start = rng.choice(keyframes[:last_start]) if last_start else 0.0
+            logging.info(f"[BACKGROUND] Fenêtre {start:.2f}s-{start + duration:.2f}s de {os.path.basename(proxy_path)}")
+            return {'path': proxy_path, 'start': start, 'duration': duration, 'loop': False,
+                    'source_duration': proxy_duration}
+
+        logging.warning(f"[BACKGROUND] Aucune vidéo d'arrière-plan utilisable dans {backgrounds_dir}")
+        return None
+
+    @staticmethod
+    def list_sources(backgrounds_dir):
+        """Liste les vidéos d'arrière-plan d'un dossier"""
+        if not os.path.isdir(backgrounds_dir):
+            return []
+        return sorted(
+            os.path.join(backgrounds_dir, name)
+            for name in os.listdir(backgrounds_dir)
+            if name.lower().endswith(VIDEO_EXTENSIONS)
+        )
+
+    def warm(self, backgrounds_dir):
+        """
+        Crée à l'avance les proxies de toutes les vidéos d'un dossier.
+
+        Args:
+            backgrounds_dir: Dossier des vidéos d'arrière-plan
+
+        Returns:
+            dict: {chemin source: chemin du proxy ou None en cas d'échec}
+        """
+        results = {}
+        for source_path in self.list_sources(backgrounds_dir):
+            results[source_path] = self.get_proxy(source_path)
+        return results
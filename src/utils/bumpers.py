@@ -0,0 +1,245 @@
+"""
+Bibliothèque d'intros et d'outros (bumpers) pré-encodées.
+
+Chaque bumper de resources/bumpers est encodé une seule fois par empreinte
+d'encodeur : taille, cadence, codec et réglages x264, format de l'audio. Le
+résultat est conservé dans le cache avec son empreinte ; les vidéos rendues
+avec les mêmes paramètres reçoivent ensuite leur intro et leur outro par copie
+du flux vidéo : seul l'audio, recalé sur chaque partie, est ré-encodé.
+"""
+
+import os
+import json
+import hashlib
+import logging
+
+from .ffmpeg_tools import run_ffmpeg, video_encoder_args, mp4_layout_args, validate_timing, concat_videos
+from .ffmpeg_tools import stream_parameters, stream_timings
+
+# À incrémenter si l'encodage des bumpers change à empreinte égale
+BUMPER_VERSION = 1
+
+
+class BumperLibrary:
+    """Encode une fois et met en cache les bumpers, par empreinte d'encodeur"""
+
+    def __init__(self, cache_dir):
+        """
+        Initialise la bibliothèque de bumpers.
+
+        Args:
+            cache_dir: Dossier de stockage des bumpers encodés
+        """
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(size, fps, video_codec='libx264', video_bitrate='5000k', video_crf=None, video_preset='veryfast',
+                    video_tune=None, video_bframes=None, audio_sample_rate=44100, audio_channels='stereo',
+                    audio_bitrate='192k'):
+        """
+        Empreinte d'encodeur : tout ce qui doit être identique pour joindre un
+        bumper à une vidéo par copie du flux vidéo.
+
+        Args:
+            size: Taille de la vidéo (width, height)
+            fps: Images par seconde
+            video_codec: Codec vidéo
+            video_bitrate: Débit vidéo (ignoré si video_crf est défini)
+            video_crf: Qualité constante x264
+            video_preset: Preset de l'encodeur
+            video_tune: Réglage x264
+            video_bframes: Nombre maximal d'images B consécutives
+            audio_sample_rate: Fréquence d'échantillonnage de l'audio
+            audio_channels: Disposition des canaux ('mono', 'stereo'...)
+            audio_bitrate: Débit audio
+
+        Returns:
+            dict: Empreinte sérialisable en JSON
+        """
+        return {
+            'size': list(size), 'fps': fps, 'video_codec': video_codec,
+            'video_bitrate': None if video_crf is not None else video_bitrate, 'video_crf': video_crf,
+            'video_preset': video_preset, 'video_tune': video_tune, 'video_bframes': video_bframes,
+            'audio_sample_rate': audio_sample_rate, 'audio_channels': audio_channels, 'audio_bitrate': audio_bitrate,
+        }
+
+    def _load_index(self):
+        """Charge l'index des hash de sources déjà calculés"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        """Sauvegarde l'index de manière atomique"""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def source_hash(self, source_path):
+        """Hash du contenu d'un bumper source (recalculé seulement si sa taille ou sa date changent)"""
+        source_path = os.path.abspath(source_path)
+        stat = os.stat(source_path)
+        index = self._load_index()
+        entry = index.get(source_path)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return entry['sha1']
+
+        sha1 = hashlib.sha1()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+
+        index[source_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': sha1.hexdigest()}
+        self._save_index(index)
+        return sha1.hexdigest()
+
+    def bumper_path(self, source_path, fingerprint):
+        """
+        Chemin du bumper encodé pour une source et une empreinte.
+
+        Args:
+            source_path: Chemin du bumper source
+            fingerprint: Empreinte d'encodeur (voir fingerprint)
+
+        Returns:
+            str: Chemin du bumper encodé
+        """
+        payload = json.dumps({'version': BUMPER_VERSION, 'source': self.source_hash(source_path),
+                              **fingerprint}, sort_keys=True)
+        key = hashlib.sha1(payload.encode()).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.cache_dir, f"{stem}_{key}.mp4")
+
+    def get(self, source_path, fingerprint):
+        """
+        Renvoie le bumper encodé avec une empreinte, en l'encodant si nécessaire.
+
+        Args:
+            source_path: Chemin du bumper source
+            fingerprint: Empreinte d'encodeur (voir fingerprint)
+
+        Returns:
+            str: Chemin du bumper encodé, ou None en cas d'erreur
+        """
+        try:
+            path = self.bumper_path(source_path, fingerprint)
+        except OSError as e:
+            logging.error(f"[BUMPER] Source illisible {source_path}: {e}")
+            return None
+
+        if os.path.exists(path) and os.path.exists(f"{path}.json"):
+            return path
+
+        if not self.encode(source_path, path, fingerprint):
+            return None
+        return path
+
+    def encode(self, source_path, path, fingerprint):
+        """
+        Encode un bumper avec les paramètres d'une empreinte.
+
+        L'image est mise à l'échelle sans déformation (bandes noires si le ratio
+        diffère) ; l'audio est complété par du silence jusqu'à la fin de l'image.
+
+        Args:
+            source_path: Chemin du bumper source
+            path: Chemin du bumper encodé
+            fingerprint: Empreinte d'encodeur (voir fingerprint)
+
+        Returns:
+            bool: True si le bumper a été encodé, False sinon
+        """
+        logging.info(f"[BUMPER] Encodage de {os.path.basename(source_path)} "
+                     f"({fingerprint['size'][0]}x{fingerprint['size'][1]}, {fingerprint['fps']} i/s)...")
+        width, height = fingerprint['size']
+        sample_rate, channels = fingerprint['audio_sample_rate'], fingerprint['audio_channels']
+        parameters = stream_parameters(source_path) or {}
+        timings = stream_timings(source_path) or {}
+        if 'video' not in timings:
+            logging.error(f"[BUMPER] Aucun flux vidéo dans {source_path}")
+            return False
+        # Durée arrondie à l'image près, l'audio est coupé ou complété à la même durée
+        frame_count = max(1, int(round((timings['video'][1] - max(timings['video'][0], 0.0)) * fingerprint['fps'])))
+        duration = frame_count / fingerprint['fps']
+        tmp_path = f"{path}.{os.getpid()}.tmp.mp4"
+
+        args = ['-i', source_path]
+        audio_input = '0:a:0'
+        if not parameters.get('audio'):
+            args += ['-f', 'lavfi', '-i', f"anullsrc=r={sample_rate}:cl={channels}"]
+            audio_input = '1:a:0'
+        args += [
+            '-map', '0:v:0', '-map', audio_input,
+            '-vf', f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                   f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fingerprint['fps']},format=yuv420p",
+            '-frames:v', str(frame_count),
+            '-af', f"aresample={sample_rate},aformat=channel_layouts={channels},apad,atrim=end={duration:.6f}",
+        ]
+        args += video_encoder_args(fingerprint['video_codec'], fingerprint['video_bitrate'], fingerprint['video_crf'],
+                                   fingerprint['video_preset'], fingerprint['video_tune'], fingerprint['video_bframes'])
+        args += ['-c:a', 'aac', '-b:a', fingerprint['audio_bitrate']]
+        args += mp4_layout_args('faststart')
+        args.append(tmp_path)
+        if not run_ffmpeg(args):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            logging.error(f"[BUMPER] Échec de l'encodage: {source_path}")
+            return False
+
+        os.replace(tmp_path, path)
+        with open(f"{path}.json", 'w', encoding='utf-8') as f:
+            json.dump({'source': os.path.abspath(source_path), 'fingerprint': fingerprint}, f, indent=2)
+        logging.info(f"[BUMPER] Bumper encodé: {path}")
+        return True
+
+    @staticmethod
+    def can_splice(parameters, bumper_parameters):
+        """
+        Indique si deux fichiers peuvent être joints par copie du flux vidéo.
+
+        Args:
+            parameters: Paramètres des flux de la vidéo (voir stream_parameters)
+            bumper_parameters: Paramètres des flux du bumper
+
+        Returns:
+            bool: True si codecs, taille, cadence, format des pixels et audio sont identiques
+        """
+        if not parameters or not bumper_parameters:
+            return False
+        return all(parameters.get(kind) and bumper_parameters.get(kind)
+                   and parameters[kind] == bumper_parameters[kind] for kind in ('video', 'audio'))
+
+    def splice(self, paths, output_path, fps=30, audio_sample_rate=44100, mp4_layout='faststart'):
+        """
+        Joint des vidéos (intro, vidéo, outro) en copiant l'image.
+
+        Seul l'audio est ré-encodé, en une passe (voir concat_videos).
+
+        Args:
+            paths: Vidéos dans l'ordre, aux mêmes paramètres (voir can_splice)
+            output_path: Chemin de la vidéo jointe
+            fps: Images par seconde (tolérance de la vérification des durées)
+            audio_sample_rate: Fréquence d'échantillonnage de l'audio
+            mp4_layout: Organisation du fichier final (voir mp4_layout_args)
+
+        Returns:
+            bool: True si la vidéo a été jointe avec la durée attendue, False sinon
+        """
+        entries = []
+        for path in paths:
+            timings = stream_timings(path)
+            if not timings or 'video' not in timings:
+                logging.error(f"[BUMPER] Vidéo illisible: {path}")
+                return False
+            entries.append((path, timings['video'][1] - max(timings['video'][0], 0.0)))
+
+        if not concat_videos(entries, output_path, audio_sample_rate, mp4_layout=mp4_layout):
+            logging.error("[BUMPER] Échec de la jointure des bumpers")
+            return False
+        total_duration = sum(duration for _, duration in entries)
+        return validate_timing(output_path, total_duration, tolerance=len(entries) / fps, audio=True)
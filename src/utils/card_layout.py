@@ -0,0 +1,108 @@
+"""
+Mise en page partagée des cartes entre les formats d'export (9:16, 1:1, 16:9).
+
+Une même ligne de temps est exportée en plusieurs formats : les cartes sont
+redessinées pour chaque format, mais le découpage et la mesure du texte ne
+sont calculés qu'une fois par taille de police et largeur de ligne, et les
+médias des commentaires ne sont décodés qu'une fois pour tous les formats.
+"""
+
+import textwrap
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+def aspect_size(aspect_ratio, short_side):
+    """
+    Taille d'un format d'export à partir de son ratio et de son petit côté.
+
+    Args:
+        aspect_ratio: Ratio (largeur, hauteur), ex: (9, 16)
+        short_side: Longueur du petit côté en pixels
+
+    Returns:
+        tuple: (width, height), arrondis à un nombre pair (exigé par yuv420p)
+    """
+    ratio_w, ratio_h = aspect_ratio
+    long_side = short_side * max(ratio_w, ratio_h) / min(ratio_w, ratio_h)
+    long_side = int(round(long_side / 2)) * 2
+    short_side = int(round(short_side / 2)) * 2
+    return (short_side, long_side) if ratio_w < ratio_h else (long_side, short_side)
+
+
+class TextLayoutCache:
+    """Polices chargées et textes découpés/mesurés, partagés entre les formats"""
+
+    def __init__(self):
+        self._fonts = {}
+        self._layouts = {}
+        self._draw = ImageDraw.Draw(Image.new('L', (1, 1)))
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, font_path, size):
+        """Police TrueType chargée une seule fois par chemin et taille"""
+        key = (font_path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = ImageFont.truetype(font_path, size)
+        return font
+
+    def layout(self, text, font_path, size, max_chars=None):
+        """
+        Découpe un texte en lignes et mesure le bloc obtenu.
+
+        Args:
+            text: Texte à afficher
+            font_path: Chemin de la police
+            size: Taille de la police
+            max_chars: Nombre maximal de caractères par ligne (None = pas de découpage)
+
+        Returns:
+            tuple: (texte découpé, largeur, hauteur) du bloc de texte
+        """
+        key = (text, font_path, size, max_chars)
+        cached = self._layouts.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        wrapped = textwrap.fill(text, width=max_chars) if max_chars else text
+        bbox = self._draw.textbbox((0, 0), wrapped, font=self.font(font_path, size))
+        cached = self._layouts[key] = (wrapped, bbox[2] - bbox[0], bbox[3] - bbox[1])
+        return cached
+
+
+class MediaThumbnailCache:
+    """Médias des commentaires décodés une fois, redimensionnés une fois par largeur"""
+
+    def __init__(self):
+        self._sources = {}
+        self._thumbnails = {}
+
+    def thumbnail(self, path, width):
+        """
+        Renvoie un média redimensionné à une largeur donnée (ratio conservé).
+
+        Args:
+            path: Chemin de l'image
+            width: Largeur voulue en pixels
+
+        Returns:
+            PIL.Image: Image redimensionnée (partagée : ne pas la modifier)
+        """
+        key = (path, width)
+        thumbnail = self._thumbnails.get(key)
+        if thumbnail is not None:
+            return thumbnail
+
+        source = self._sources.get(path)
+        if source is None:
+            with Image.open(path) as img:
+                img.load()
+                source = self._sources[path] = img.copy()
+
+        height = max(1, int(source.height * width / source.width))
+        thumbnail = self._thumbnails[key] = source.resize((width, height), Image.LANCZOS)
+        return thumbnail
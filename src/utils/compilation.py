@@ -0,0 +1,221 @@
+"""
+Compilation de vidéos finies (posts du jour) en une vidéo longue avec chapitres.
+
+Les vidéos sont jointes sans ré-encodage de l'image (voir concat_videos), même
+si leurs réglages x264 diffèrent. Seules les parties dont les paramètres ne
+correspondent pas à la sortie (codec, taille, cadence, format des pixels,
+absence d'audio) sont ré-encodées au préalable. L'audio est ré-encodé en une
+seule passe : quelques secondes pour dix minutes de vidéo, sans dérive à chaque
+jointure.
+"""
+
+import os
+import time
+import shutil
+import logging
+
+from .ffmpeg_tools import run_ffmpeg, video_encoder_args, validate_timing, concat_videos
+from .ffmpeg_tools import stream_parameters, stream_timings
+
+
+class CompilationBuilder:
+    """Joint des vidéos finies, avec intro, outro et chapitres"""
+
+    def __init__(self, output_size=(1080, 1920), fps=30, video_codec='libx264', video_bitrate='5000k',
+                 video_preset='veryfast', video_crf=None, video_bframes=None, mp4_layout='faststart',
+                 audio_bitrate='192k', audio_sample_rate=44100):
+        """
+        Initialise le compilateur.
+
+        Args:
+            output_size: Taille de la compilation (width, height)
+            fps: Images par seconde
+            video_codec: Codec vidéo des parties ré-encodées
+            video_bitrate: Débit vidéo des parties ré-encodées
+            video_preset: Preset de l'encodeur des parties ré-encodées
+            video_crf: Qualité constante des parties ré-encodées (remplace le débit si définie)
+            video_bframes: Nombre maximal d'images B consécutives des parties ré-encodées
+            mp4_layout: Organisation du fichier final ('faststart', 'fragmented' ou 'standard')
+            audio_bitrate: Débit audio de la compilation
+            audio_sample_rate: Fréquence d'échantillonnage de la compilation
+        """
+        self.width, self.height = output_size
+        self.fps = fps
+        self.video_codec = video_codec
+        self.video_bitrate = video_bitrate
+        self.video_preset = video_preset
+        self.video_crf = video_crf
+        self.video_bframes = video_bframes
+        self.mp4_layout = mp4_layout
+        self.audio_bitrate = audio_bitrate
+        self.audio_sample_rate = audio_sample_rate
+
+    def is_compatible(self, parameters):
+        """
+        Indique si une vidéo peut être copiée telle quelle dans la compilation.
+
+        Args:
+            parameters: Paramètres des flux (voir stream_parameters)
+
+        Returns:
+            bool: True si le flux vidéo correspond à la sortie et qu'une piste audio existe
+        """
+        video = parameters.get('video') if parameters else None
+        if not video or not parameters.get('audio'):
+            return False
+        rate = video.get('rate') or '0'
+        rate = float(rate[:-1]) * 1000 if rate.endswith('k') else float(rate)
+        return (video['codec'] == 'h264' and self.video_codec == 'libx264'
+                and video['pix_fmt'] == 'yuv420p'
+                and video['size'] == (self.width, self.height)
+                and video['sar'] == (1, 1)
+                and abs(rate - self.fps) < 0.01)
+
+    def normalize(self, path, output_path, parameters):
+        """
+        Ré-encode une partie aux paramètres de la compilation.
+
+        L'image est mise à l'échelle sans déformation (bandes noires si le ratio
+        diffère) ; une piste silencieuse est ajoutée si la vidéo n'a pas d'audio.
+
+        Args:
+            path: Chemin de la vidéo
+            output_path: Chemin de la partie ré-encodée
+            parameters: Paramètres des flux de la vidéo (voir stream_parameters)
+
+        Returns:
+            bool: True si la partie a été ré-encodée, False sinon
+        """
+        logging.info(f"[COMPILATION] Ré-encodage de {os.path.basename(path)}")
+        args = ['-i', path]
+        audio_input = '0:a:0'
+        shortest = []
+        if not parameters.get('audio'):
+            args += ['-f', 'lavfi', '-i', f"anullsrc=r={self.audio_sample_rate}:cl=stereo"]
+            audio_input = '1:a:0'
+            # Silence infini : coupé à la fin de l'image
+            shortest = ['-shortest']
+        args += [
+            '-map', '0:v:0', '-map', audio_input,
+            '-vf', f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+                   f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={self.fps},format=yuv420p",
+        ]
+        args += video_encoder_args(self.video_codec, self.video_bitrate, self.video_crf, self.video_preset,
+                                   bframes=self.video_bframes)
+        args += ['-c:a', 'aac', '-b:a', self.audio_bitrate, '-ar', str(self.audio_sample_rate)] + shortest
+        args.append(output_path)
+        if not run_ffmpeg(args):
+            logging.error(f"[COMPILATION] Échec du ré-encodage de {path}")
+            return False
+        return True
+
+    @staticmethod
+    def _escape_metadata(value):
+        """Échappe une valeur pour un fichier FFMETADATA"""
+        for char in ('\\', '=', ';', '#', '\n'):
+            value = value.replace(char, '\\' + char)
+        return value
+
+    def write_chapters(self, metadata_path, chapters, total_duration, title=None):
+        """
+        Écrit les chapitres au format FFMETADATA (repris dans le MP4 final).
+
+        Args:
+            metadata_path: Chemin du fichier de métadonnées
+            chapters: Liste de tuples (début en secondes, titre)
+            total_duration: Durée totale de la compilation
+            title: Titre de la compilation ou None
+        """
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            f.write(";FFMETADATA1\n")
+            if title:
+                f.write(f"title={self._escape_metadata(title)}\n")
+            for i, (start, chapter_title) in enumerate(chapters):
+                end = chapters[i + 1][0] if i + 1 < len(chapters) else total_duration
+                f.write("[CHAPTER]\nTIMEBASE=1/1000\n")
+                f.write(f"START={int(round(start * 1000))}\nEND={int(round(end * 1000))}\n")
+                f.write(f"title={self._escape_metadata(chapter_title)}\n")
+
+    @staticmethod
+    def format_timestamp(seconds):
+        """Horodatage de chapitre lisible (m:ss ou h:mm:ss), pour les descriptions"""
+        seconds = int(seconds)
+        hours, rest = divmod(seconds, 3600)
+        minutes, seconds = divmod(rest, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+    def build(self, parts, output_path, title=None):
+        """
+        Construit la compilation.
+
+        Args:
+            parts: Parties dans l'ordre [{'path', 'title'}] (intro, posts, outro)
+            output_path: Chemin de la compilation
+            title: Titre de la compilation (métadonnées) ou None
+
+        Returns:
+            dict: {'path', 'duration', 'chapters': [(début, titre)], 'copied', 'reencoded',
+                   'chapters_path'}, ou None en cas d'échec
+        """
+        start_time = time.time()
+        work_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)),
+                                f".compilation_{os.path.splitext(os.path.basename(output_path))[0]}")
+        os.makedirs(work_dir, exist_ok=True)
+
+        try:
+            entries, chapters = [], []
+            copied = reencoded = 0
+            total_duration = 0.0
+            for i, part in enumerate(parts):
+                path = part['path']
+                parameters = stream_parameters(path) if os.path.exists(path) else None
+                if not parameters or not parameters.get('video'):
+                    logging.warning(f"[COMPILATION] Vidéo illisible ignorée: {path}")
+                    continue
+
+                if self.is_compatible(parameters):
+                    copied += 1
+                else:
+                    normalized_path = os.path.join(work_dir, f"part_{i:03d}.mp4")
+                    if not self.normalize(path, normalized_path, parameters):
+                        continue
+                    path = normalized_path
+                    reencoded += 1
+
+                timings = stream_timings(path)
+                if not timings or 'video' not in timings:
+                    continue
+                video_start, video_end = timings['video']
+                duration = video_end - max(video_start, 0.0)
+
+                chapters.append((total_duration, part['title']))
+                entries.append((path, duration))
+                total_duration += duration
+
+            if not entries:
+                logging.error("[COMPILATION] Aucune vidéo à compiler")
+                return None
+
+            metadata_path = os.path.join(work_dir, 'chapters.txt')
+            self.write_chapters(metadata_path, chapters, total_duration, title)
+            if not concat_videos(entries, output_path, self.audio_sample_rate, self.audio_bitrate, self.mp4_layout,
+                                 metadata_path=metadata_path):
+                logging.error("[COMPILATION] Échec de la jointure des vidéos")
+                return None
+
+            if not validate_timing(output_path, total_duration, tolerance=len(entries) / self.fps, audio=True):
+                logging.error(f"[COMPILATION] Durée ou synchronisation incorrecte: {output_path}")
+                return None
+
+            # Chapitres lisibles, à copier dans la description de la vidéo
+            chapters_path = f"{os.path.splitext(output_path)[0]}_chapters.txt"
+            with open(chapters_path, 'w', encoding='utf-8') as f:
+                for start, chapter_title in chapters:
+                    f.write(f"{self.format_timestamp(start)} {chapter_title}\n")
+
+            logging.info(f"[COMPILATION] {len(chapters)} parties ({copied} copiées, {reencoded} ré-encodées), "
+                         f"{total_duration:.1f}s de vidéo en {time.time() - start_time:.2f}s")
+            return {'path': output_path, 'duration': total_duration, 'chapters': chapters, 'copied': copied,
+                    'reencoded': reencoded, 'chapters_path': chapters_path}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
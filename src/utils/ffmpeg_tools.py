@@ -0,0 +1,521 @@
+"""
+Fonctions utilitaires pour piloter ffmpeg directement (sans passer par moviepy).
+"""
+
+import os
+import re
+import subprocess
+import logging
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+# Organisation des fichiers MP4 finaux (option -movflags du muxeur mp4)
+MP4_MOVFLAGS = {
+    'standard': None,  # Index (moov) écrit en fin de fichier
+    'faststart': '+faststart',  # Index déplacé en tête à la fin du mux : lecture progressive
+    'fragmented': '+frag_keyframe+empty_moov+default_base_moof',  # Fragments écrits au fil de l'encodage
+}
+
+# Sans liste d'édition, un MP4 fragmenté ne compense pas le retard des images B :
+# la vidéo commencerait après l'audio. Ses flux sont donc encodés sans images B.
+MP4_LAYOUT_BFRAMES = {'fragmented': 0}
+
+
+def get_ffmpeg_binary():
+    """
+    Renvoie le chemin de l'exécutable ffmpeg utilisé par moviepy.
+
+    Returns:
+        str: Chemin vers ffmpeg
+    """
+    return get_setting("FFMPEG_BINARY")
+
+
+def run_ffmpeg(args, timeout=None):
+    """
+    Exécute ffmpeg avec les arguments donnés.
+
+    Args:
+        args: Liste des arguments (sans l'exécutable)
+        timeout: Durée maximale d'exécution en secondes
+
+    Returns:
+        bool: True si ffmpeg s'est terminé sans erreur, False sinon
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y"] + [str(a) for a in args]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.error(f"[FFMPEG] Impossible d'exécuter ffmpeg: {e}")
+        return False
+
+    if result.returncode != 0:
+        error = result.stderr.decode("utf-8", errors="replace").strip()
+        logging.error(f"[FFMPEG] ffmpeg a échoué ({result.returncode}): {error[-500:]}")
+        return False
+    return True
+
+
+def video_encoder_args(video_codec='libx264', video_bitrate=None, crf=None, preset=None, tune=None, bframes=None):
+    """
+    Construit les arguments de l'encodeur vidéo.
+
+    Args:
+        video_codec: Codec vidéo
+        video_bitrate: Débit vidéo (ignoré si crf est défini)
+        crf: Qualité constante x264/x265 (None = débit fixe)
+        preset: Preset de l'encodeur (ultrafast ... veryslow)
+        tune: Réglage x264/x265 ('stillimage', 'animation'...) ou None
+        bframes: Nombre maximal d'images B consécutives (None = réglage de l'encodeur,
+                 0 = pas de réordonnancement, exigé par les MP4 fragmentés)
+
+    Returns:
+        list: Arguments ffmpeg de l'encodeur vidéo
+    """
+    args = ['-c:v', video_codec]
+    x26x = video_codec in ('libx264', 'libx265')
+    if crf is not None and x26x:
+        args += ['-crf', str(crf)]
+    elif video_bitrate:
+        args += ['-b:v', video_bitrate]
+    if preset and x26x:
+        args += ['-preset', preset]
+    if tune and x26x:
+        args += ['-tune', tune]
+    if bframes is not None and x26x:
+        args += ['-bf', str(bframes)]
+    return args + ['-pix_fmt', 'yuv420p']
+
+
+def mp4_layout_args(layout='faststart'):
+    """
+    Construit les arguments du muxeur mp4 pour une organisation de fichier.
+
+    Args:
+        layout: 'faststart' (index en tête, lisible dès le début du téléchargement),
+                'fragmented' (fragments autonomes écrits pendant l'encodage, le fichier
+                peut être envoyé avant la fin du rendu) ou 'standard' (index en fin)
+
+    Returns:
+        list: Arguments ffmpeg à placer avant le chemin de sortie
+    """
+    if layout not in MP4_MOVFLAGS:
+        raise ValueError(f"Organisation MP4 inconnue: {layout} (disponibles: {', '.join(MP4_MOVFLAGS)})")
+    movflags = MP4_MOVFLAGS[layout]
+    return ['-movflags', movflags] if movflags else []
+
+
+def rendition_path(output_path, rendition):
+    """
+    Chemin de la vidéo d'un rendu supplémentaire.
+
+    Args:
+        output_path: Chemin de la vidéo principale
+        rendition: Rendu {'name', 'width', 'height'}
+
+    Returns:
+        str: Chemin de la vidéo principale suffixé par le nom du rendu
+    """
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_{rendition['name']}{ext}"
+
+
+def master_path(output_path):
+    """
+    Chemin de la version sans intro ni outro d'une vidéo finale (reprise par les compilations).
+
+    Args:
+        output_path: Chemin de la vidéo finale
+
+    Returns:
+        str: Chemin de la vidéo finale suffixé par _master
+    """
+    stem, ext = os.path.splitext(output_path)
+    return f"{stem}_master{ext}"
+
+
+def rendition_filters(stream, renditions):
+    """
+    Duplique un flux vidéo composé pour des rendus supplémentaires.
+
+    Les images ne sont composées qu'une fois : split les duplique, chaque copie
+    est redimensionnée pour son rendu et envoyée à son propre encodeur.
+
+    Args:
+        stream: Étiquette du flux composé dans le filter_complex (ex: '[v]')
+        renditions: Rendus supplémentaires [{'name', 'width', 'height'}]
+
+    Returns:
+        tuple: (filtres à ajouter au filter_complex, étiquettes [principal, rendu 1, ...])
+    """
+    if not renditions:
+        return [], [stream]
+    copies = [f"[split{i}]" for i in range(len(renditions) + 1)]
+    # Conversion en YUV avant la duplication : une seule conversion, redimensionnements sur les plans YUV
+    filters = [f"{stream}format=yuv420p,split={len(copies)}{''.join(copies)}"]
+    labels = [copies[0]]
+    for i, rendition in enumerate(renditions, 1):
+        filters.append(f"{copies[i]}scale={rendition['width']}:{rendition['height']}:flags=area,setsar=1[out{i}]")
+        labels.append(f"[out{i}]")
+    return filters, labels
+
+
+def probe_media(path):
+    """
+    Lit les informations d'un fichier média (durée, taille, fps, audio).
+
+    Args:
+        path: Chemin vers le fichier
+
+    Returns:
+        dict: Informations renvoyées par ffmpeg, ou None en cas d'erreur
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return ffmpeg_parse_infos(path)
+    except Exception as e:
+        message = str(e).splitlines()[0] if str(e) else repr(e)
+        logging.error(f"[FFMPEG] Impossible de lire les informations de {path}: {message}")
+        return None
+
+
+def stream_parameters(path):
+    """
+    Lit les paramètres des premiers flux vidéo et audio d'un fichier.
+
+    Args:
+        path: Chemin vers le fichier
+
+    Returns:
+        dict: {'video': {'codec', 'pix_fmt', 'size', 'sar', 'rate'} ou None,
+               'audio': {'codec', 'sample_rate', 'channels'} ou None}, ou None en cas d'erreur
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-i", str(path)]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        logging.error(f"[FFMPEG] Impossible d'exécuter ffmpeg: {e}")
+        return None
+
+    output = result.stderr.decode("utf-8", errors="replace")
+    parameters = {'video': None, 'audio': None}
+    for line in output.splitlines():
+        stream = re.search(r"Stream #\d+:\d+.*?: (Video|Audio): (\w+)(.*)", line)
+        if not stream:
+            continue
+        kind, codec, details = stream.groups()
+        if kind == 'Video' and parameters['video'] is None:
+            size = re.search(r"\b(\d{2,5})x(\d{2,5})\b", details)
+            # Format des pixels : premier champ après le codec et ses précisions entre parenthèses
+            pix_fmt = re.match(r"(?:\s*\([^)]*\))*,\s*(\w+)", details)
+            sar = re.search(r"SAR (\d+):(\d+)", details)
+            rate = re.search(r"([0-9.]+k?) tbr", details)
+            parameters['video'] = {
+                'codec': codec,
+                'pix_fmt': pix_fmt.group(1) if pix_fmt else None,
+                'size': (int(size.group(1)), int(size.group(2))) if size else None,
+                # SAR absent ou 0:1 (non précisé) : pixels carrés
+                'sar': (int(sar.group(1)), int(sar.group(2))) if sar and sar.group(1) != '0' else (1, 1),
+                'rate': rate.group(1) if rate else None,
+            }
+        elif kind == 'Audio' and parameters['audio'] is None:
+            sample_rate = re.search(r"(\d+) Hz", details)
+            channels = re.search(r"Hz, ([\w.()]+)", details)
+            parameters['audio'] = {
+                'codec': codec,
+                'sample_rate': int(sample_rate.group(1)) if sample_rate else None,
+                'channels': channels.group(1) if channels else None,
+            }
+
+    if parameters['video'] is None and parameters['audio'] is None:
+        logging.error(f"[FFMPEG] Aucun flux lisible dans {path}")
+        return None
+    return parameters
+
+
+def list_keyframes(path):
+    """
+    Liste les instants des images clés d'une vidéo.
+
+    Seules les images clés sont décodées (-skip_frame nokey), ce qui reste
+    rapide même pour une longue vidéo.
+
+    Args:
+        path: Chemin vers la vidéo
+
+    Returns:
+        list: Instants des images clés en secondes, ou None en cas d'erreur
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-skip_frame", "nokey", "-i", str(path),
+           "-an", "-vf", "showinfo", "-f", "null", "-"]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        logging.error(f"[FFMPEG] Impossible d'exécuter ffmpeg: {e}")
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"[FFMPEG] Impossible de lister les images clés de {path}")
+        return None
+
+    output = result.stderr.decode("utf-8", errors="replace")
+    return [float(t) for t in re.findall(r"pts_time:\s*(-?[0-9.]+)", output)]
+
+
+def packet_keyframes(path):
+    """
+    Liste les instants des images clés d'une vidéo à partir de ses paquets, sans rien décoder.
+
+    Args:
+        path: Chemin vers la vidéo
+
+    Returns:
+        list: Instants des images clés du premier flux vidéo en secondes, ou None en cas d'erreur
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-i", str(path),
+           "-map", "0:v:0", "-c", "copy", "-f", "framecrc", "-"]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        logging.error(f"[FFMPEG] Impossible d'exécuter ffmpeg: {e}")
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"[FFMPEG] Impossible de lire les paquets de {path}")
+        return None
+
+    time_base, keyframes = None, []
+    for line in result.stdout.decode("utf-8", errors="replace").splitlines():
+        header = re.match(r"#tb 0: (\d+)/(\d+)", line)
+        if header:
+            time_base = int(header.group(1)) / int(header.group(2))
+            continue
+        # framecrc n'indique les drapeaux (F=0x...) que pour les paquets qui ne sont pas des images clés
+        fields = [field.strip() for field in line.split(",")]
+        if line.startswith("#") or len(fields) != 6 or time_base is None:
+            continue
+        keyframes.append(int(fields[2]) * time_base)
+    return sorted(keyframes)
+
+
+def extract_keyframe(path, output_path, time=0.0, size=None):
+    """
+    Extrait l'image clé la plus proche d'un instant, seule image décodée.
+
+    Les images clés sont repérées dans l'index des paquets (voir packet_keyframes),
+    puis la recherche se place exactement sur la plus proche : le coût ne dépend
+    ni de la longueur de la vidéo ni de la position demandée.
+
+    Args:
+        path: Chemin vers la vidéo
+        output_path: Chemin de l'image (JPEG ou PNG selon l'extension)
+        time: Instant recherché en secondes
+        size: Taille de l'image (width, height), celle de la vidéo si None
+
+    Returns:
+        bool: True si l'image a été extraite, False sinon
+    """
+    keyframes = packet_keyframes(path)
+    if not keyframes:
+        return False
+    keyframe = min(keyframes, key=lambda t: abs(t - time))
+
+    args = ['-ss', f"{max(keyframe, 0.0):.6f}", '-i', path, '-map', '0:v:0', '-frames:v', '1']
+    if size:
+        args += ['-vf', f"scale={size[0]}:{size[1]}:flags=lanczos"]
+    args += ['-q:v', '2', output_path]
+    if not run_ffmpeg(args):
+        return False
+    return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+
+def stream_timings(path):
+    """
+    Lit les instants de début et de fin des flux d'un fichier à partir de ses paquets.
+
+    Les paquets sont listés par ffmpeg sans être décodés (-c copy -f framecrc),
+    ce qui reste rapide et exact même pour une vidéo à cadence variable.
+
+    Args:
+        path: Chemin vers le fichier
+
+    Returns:
+        dict: {'video': (début, fin), 'audio': (début, fin)} en secondes, pour le
+              premier flux de chaque type présent, ou None en cas d'erreur
+    """
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-i", str(path),
+           "-map", "0:v:0?", "-map", "0:a:0?", "-c", "copy", "-f", "framecrc", "-"]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        logging.error(f"[FFMPEG] Impossible d'exécuter ffmpeg: {e}")
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"[FFMPEG] Impossible de lire les paquets de {path}")
+        return None
+
+    time_bases, media_types, bounds = {}, {}, {}
+    for line in result.stdout.decode("utf-8", errors="replace").splitlines():
+        header = re.match(r"#(tb|media_type) (\d+): (\S+)", line)
+        if header:
+            kind, index, value = header.groups()
+            if kind == "tb":
+                num, den = value.split("/")
+                time_bases[int(index)] = int(num) / int(den)
+            else:
+                media_types[int(index)] = value
+            continue
+        if line.startswith("#"):
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) < 4:
+            continue
+        index, pts, duration = int(fields[0]), int(fields[2]), int(fields[3])
+        start, end = bounds.get(index, (pts, pts + duration))
+        bounds[index] = (min(start, pts), max(end, pts + duration))
+
+    return {media_types.get(index, str(index)): (start * time_bases[index], end * time_bases[index])
+            for index, (start, end) in bounds.items() if index in time_bases}
+
+
+def validate_timing(path, expected_duration=None, tolerance=1 / 30, audio=False):
+    """
+    Vérifie la durée d'une vidéo et la synchronisation de son audio.
+
+    Args:
+        path: Chemin vers la vidéo
+        expected_duration: Durée attendue du flux vidéo en secondes (None = non vérifiée)
+        tolerance: Écart maximal accepté en secondes (une image par défaut)
+        audio: Si True, la vidéo doit avoir une piste audio alignée sur la vidéo
+
+    Returns:
+        bool: True si la durée du conteneur, celle du flux vidéo et la
+              synchronisation audio/vidéo sont correctes, False sinon
+    """
+    timings = stream_timings(path)
+    if not timings or 'video' not in timings:
+        logging.error(f"[FFMPEG] Aucun flux vidéo lisible dans {path}")
+        return False
+
+    video_start, video_end = timings['video']
+    valid = True
+    if expected_duration is not None and abs(video_end - video_start - expected_duration) > tolerance:
+        logging.error(f"[FFMPEG] Durée du flux vidéo de {os.path.basename(path)}: "
+                      f"{video_end - video_start:.3f}s au lieu de {expected_duration:.3f}s")
+        valid = False
+
+    # Durée du conteneur (au centième près), celle que lisent les lecteurs et les plateformes
+    container_duration = (probe_media(path) or {}).get('duration')
+    if container_duration is not None and container_duration > video_end + tolerance + 0.01:
+        logging.error(f"[FFMPEG] Durée du conteneur de {os.path.basename(path)}: "
+                      f"{container_duration:.2f}s pour {video_end:.3f}s de vidéo")
+        valid = False
+
+    if audio:
+        if 'audio' not in timings:
+            logging.error(f"[FFMPEG] Aucune piste audio dans {path}")
+            return False
+        audio_start, audio_end = timings['audio']
+        # Les paquets avant 0 (amorce de l'encodeur AAC) ne sont pas joués
+        audio_start, video_start = max(audio_start, 0.0), max(video_start, 0.0)
+        if abs(audio_start - video_start) > tolerance:
+            logging.error(f"[FFMPEG] Audio décalé de {audio_start - video_start:+.3f}s dans {os.path.basename(path)}")
+            valid = False
+        if audio_end > video_end + tolerance:
+            logging.error(f"[FFMPEG] L'audio dépasse la vidéo de {audio_end - video_end:.3f}s "
+                          f"dans {os.path.basename(path)}")
+            valid = False
+        elif audio_end < video_end - tolerance:
+            logging.warning(f"[FFMPEG] L'audio s'arrête {video_end - audio_end:.2f}s avant la fin de la vidéo "
+                            f"dans {os.path.basename(path)}")
+    return valid
+
+
+def concat_videos(entries, output_path, audio_sample_rate=44100, audio_bitrate='192k', mp4_layout='faststart',
+                  metadata_path=None):
+    """
+    Joint des vidéos H.264 bout à bout, sans ré-encoder l'image.
+
+    Le démultiplexeur concat copie le flux vidéo de chaque partie en répétant
+    ses paramètres (SPS/PPS) avant chaque image clé : des parties encodées avec
+    des réglages x264 différents se suivent sans erreur de décodage. L'audio est
+    décodé (amorce AAC retirée), recalé sur la durée exacte de chaque partie et
+    ré-encodé en une seule passe ; copié tel quel, il prendrait le retard de
+    l'amorce (environ 23 ms) à chaque jointure.
+
+    Args:
+        entries: Parties dans l'ordre [(chemin, durée du flux vidéo en secondes)],
+                 de même taille, cadence et format de pixels, toutes avec audio
+        output_path: Chemin de la vidéo jointe
+        audio_sample_rate: Fréquence d'échantillonnage de l'audio joint
+        audio_bitrate: Débit de l'audio joint
+        mp4_layout: Organisation du fichier (voir mp4_layout_args)
+        metadata_path: Fichier FFMETADATA (titre, chapitres) à inclure, ou None
+
+    Returns:
+        bool: True si la vidéo a été jointe, False sinon
+    """
+    list_path = f"{output_path}.{os.getpid()}.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path, duration in entries:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+            f.write(f"duration {duration:.6f}\n")
+
+    total_duration = sum(duration for _, duration in entries)
+    args = ['-f', 'concat', '-safe', '0', '-i', list_path]
+    if metadata_path:
+        args += ['-f', 'ffmetadata', '-i', metadata_path, '-map_metadata', '1', '-map_chapters', '1']
+    args += [
+        '-map', '0:v:0', '-map', '0:a:0',
+        '-c:v', 'copy',
+        # Audio recalé sur les horodatages : silence si une partie a un audio plus court
+        '-af', f"aresample={audio_sample_rate}:async=1:min_hard_comp=0.01:first_pts=0,apad",
+        '-c:a', 'aac', '-b:a', audio_bitrate,
+        '-t', f"{total_duration:.6f}",
+    ]
+    args += mp4_layout_args(mp4_layout)
+    args.append(output_path)
+    try:
+        return run_ffmpeg(args)
+    finally:
+        os.remove(list_path)
+
+
+def decode_audio(path, sample_rate=None, channels=1):
+    """
+    Décode le premier flux audio d'un fichier en échantillons PCM.
+
+    Args:
+        path: Chemin vers le fichier
+        sample_rate: Fréquence d'échantillonnage voulue (celle du fichier si None)
+        channels: Nombre de canaux voulu
+
+    Returns:
+        tuple: (échantillons float32 de forme (n, channels), fréquence d'échantillonnage),
+               ou (None, None) en cas d'erreur
+    """
+    if sample_rate is None:
+        parameters = stream_parameters(path)
+        sample_rate = ((parameters or {}).get('audio') or {}).get('sample_rate')
+        if not sample_rate:
+            logging.error(f"[FFMPEG] Aucun flux audio dans {path}")
+            return None, None
+
+    cmd = [get_ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-i", str(path), "-map", "0:a:0",
+           "-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(sample_rate), "-"]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        logging.error(f"[FFMPEG] Impossible d'exécuter ffmpeg: {e}")
+        return None, None
+
+    if result.returncode != 0:
+        error = result.stderr.decode("utf-8", errors="replace").strip()
+        logging.error(f"[FFMPEG] Impossible de décoder l'audio de {path}: {error[-500:]}")
+        return None, None
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, channels), sample_rate
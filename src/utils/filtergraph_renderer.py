@@ -0,0 +1,206 @@
+"""
+Rendu de toute la vidéo en une seule commande ffmpeg.
+
+La ligne de temps (cartes et leurs durées, zoom, transitions, arrière-plan,
+audio) est traduite en un graphe filter_complex : zoompan pour le zoom, xfade
+pour les transitions, overlay pour l'arrière-plan et amix pour la musique.
+Aucune image ne transite par Python.
+
+Les fenêtres de transition sont les mêmes que celles des autres moteurs
+(card_timeline) : chaque carte est prolongée sur les transitions qui
+l'entourent, et chaque xfade commence au début de sa fenêtre.
+
+Les rendus supplémentaires (720p, aperçu...) sont des sorties du même graphe :
+le flux composé est dupliqué par split, redimensionné, et chaque sortie a son
+propre encodeur.
+"""
+
+import os
+import logging
+
+from .ffmpeg_tools import run_ffmpeg, video_encoder_args, rendition_path, rendition_filters, mp4_layout_args
+from .video_effects import card_timeline
+
+XFADE_TRANSITIONS = {
+    'crossfade': 'fade',
+    'slide': 'coverleft',
+}
+
+
+class FiltergraphRenderer:
+    """Construit et exécute le graphe ffmpeg d'une vidéo complète"""
+
+    def __init__(self, output_size=(1080, 1920), fps=30, video_codec='libx264', video_bitrate='5000k',
+                 zoom_ratio=None, transition='none', transition_duration=0.0, video_preset='veryfast',
+                 video_crf=None, video_tune=None, renditions=None, mp4_layout='faststart', video_bframes=None):
+        """
+        Initialise le moteur filtergraph.
+
+        Args:
+            output_size: Taille de sortie de la vidéo (width, height)
+            fps: Images par seconde
+            video_codec: Codec vidéo
+            video_bitrate: Débit vidéo
+            zoom_ratio: Facteur de zoom atteint à la fin de chaque carte (None = pas de zoom)
+            transition: Transition entre les cartes ('none', 'crossfade' ou 'slide')
+            transition_duration: Durée de chaque transition en secondes
+            video_preset: Preset de l'encodeur
+            video_crf: Qualité constante (remplace le débit si définie)
+            video_tune: Réglage de l'encodeur ('animation', 'stillimage'...) ou None
+            renditions: Rendus supplémentaires [{'name', 'width', 'height', 'video_crf'?,
+                        'video_bitrate'?}] produits à côté de la vidéo finale
+            mp4_layout: Organisation des fichiers quand l'audio est mixé au rendu (fichiers
+                        finaux) : 'faststart', 'fragmented' ou 'standard'
+            video_bframes: Nombre maximal d'images B consécutives (None = réglage de l'encodeur)
+        """
+        self.width, self.height = output_size
+        self.fps = fps
+        self.video_codec = video_codec
+        self.video_bitrate = video_bitrate
+        self.zoom_ratio = zoom_ratio
+        self.transition = transition
+        self.transition_duration = transition_duration
+        self.video_preset = video_preset
+        self.video_crf = video_crf
+        self.video_tune = video_tune
+        self.renditions = list(renditions or [])
+        self.mp4_layout = mp4_layout
+        self.video_bframes = video_bframes
+
+    def frame_count(self, duration):
+        """Nombre d'images d'une carte (arrondi à l'image près)"""
+        return max(1, int(round(duration * self.fps)))
+
+    def transition_frames(self):
+        """Nombre d'images de chaque transition (0 = coupes franches)"""
+        if self.transition not in XFADE_TRANSITIONS:
+            return 0
+        return max(0, int(round(self.transition_duration * self.fps)))
+
+    def _card_filter(self, index, frame_count, lead_frames, card_frames, transparent):
+        """
+        Chaîne de filtres d'une carte : cadence, durée, zoom éventuel.
+
+        Args:
+            index: Index de l'entrée ffmpeg de la carte
+            frame_count: Nombre d'images affichées (transitions comprises)
+            lead_frames: Nombre d'images affichées avant le début de la carte
+            card_frames: Nombre d'images de la carte (progression du zoom)
+            transparent: True pour garder le canal alpha (arrière-plan vidéo)
+        """
+        pix_fmt = 'rgba' if transparent else 'yuv420p'
+        chain = (f"[{index}:v]fps={self.fps},trim=end_frame={frame_count},setpts=PTS-STARTPTS,"
+                 f"scale={self.width}:{self.height}:flags=lanczos,format={pix_fmt}")
+        if self.zoom_ratio:
+            span = max(1, card_frames - 1)
+            zoom = f"min(max(1+{self.zoom_ratio - 1:.6f}*(on-{lead_frames})/{span}\\,1)\\,{self.zoom_ratio})"
+            chain += (f",zoompan=z='{zoom}':x='(iw-iw/zoom)/2':y='(ih-ih/zoom)/2'"
+                      f":d=1:s={self.width}x{self.height}:fps={self.fps}")
+        # fps en fin de chaîne : xfade exige la même cadence déclarée sur ses deux entrées
+        return chain + f",setsar=1,fps={self.fps}[c{index}]"
+
+    def build_command(self, segments, output_path, background=None, audio=None):
+        """
+        Construit les arguments ffmpeg du rendu complet.
+
+        Args:
+            segments: Liste de tuples (chemin de l'image, durée en secondes)
+            output_path: Chemin de la vidéo finale
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop'} ou None
+            audio: Piste audio {'path', 'music', 'music_volume'} ou None
+
+        Returns:
+            list: Arguments ffmpeg (sans l'exécutable)
+        """
+        frame_counts = [self.frame_count(duration) for _, duration in segments]
+        starts, _, windows = card_timeline(frame_counts, self.transition_frames())
+        total_frames = sum(frame_counts)
+
+        args = []
+        filters = []
+        for i, (image_path, _) in enumerate(segments):
+            args += ['-loop', '1', '-framerate', '1', '-i', image_path]
+            visible_start = windows[i - 1][0] if i > 0 else starts[i]
+            visible_stop = windows[i][1] if i < len(windows) else starts[i] + frame_counts[i]
+            filters.append(self._card_filter(i, visible_stop - visible_start, starts[i] - visible_start,
+                                             frame_counts[i], transparent=bool(background)))
+
+        # Cartes mises bout à bout : coupe franche (concat) ou xfade au début de chaque fenêtre
+        stream = '[c0]'
+        for i, (window_start, window_stop) in enumerate(windows):
+            label = f"[x{i}]"
+            if window_stop > window_start:
+                filters.append(f"{stream}[c{i + 1}]xfade=transition={XFADE_TRANSITIONS[self.transition]}"
+                               f":duration={(window_stop - window_start) / self.fps:.6f}"
+                               f":offset={window_start / self.fps:.6f}{label}")
+            else:
+                filters.append(f"{stream}[c{i + 1}]concat=n=2:v=1:a=0{label}")
+            stream = label
+
+        input_index = len(segments)
+        if background:
+            if background.get('loop'):
+                args += ['-stream_loop', '-1']
+            args += ['-ss', f"{background['start']:.3f}", '-i', background['path']]
+            filters.append(f"[{input_index}:v]fps={self.fps},scale={self.width}:{self.height},setsar=1[bg]")
+            filters.append(f"[bg]{stream}overlay=0:0:shortest=1,format=yuv420p[v]")
+            input_index += 1
+        else:
+            filters.append(f"{stream}format=yuv420p[v]")
+
+        split_filters, video_labels = rendition_filters('[v]', self.renditions)
+        filters += split_filters
+
+        audio_labels = [None] * len(video_labels)
+        if audio:
+            args += ['-i', audio['path']]
+            voice_index = input_index
+            input_index += 1
+            if audio.get('music'):
+                args += ['-stream_loop', '-1', '-i', audio['music']]
+                filters.append(f"[{input_index}:a]volume={audio.get('music_volume', -15)}dB[music]")
+                if len(video_labels) > 1:
+                    audio_labels = [f"[a{i}]" for i in range(len(video_labels))]
+                    filters.append(f"[{voice_index}:a][music]amix=inputs=2:duration=first:normalize=0,"
+                                   f"asplit={len(audio_labels)}{''.join(audio_labels)}")
+                else:
+                    filters.append(f"[{voice_index}:a][music]amix=inputs=2:duration=first:normalize=0[a]")
+                    audio_labels = ['[a]']
+            else:
+                audio_labels = [f"{voice_index}:a:0"] * len(video_labels)
+
+        args += ['-filter_complex', ';'.join(filters)]
+        outputs = [({}, output_path)] + [(r, rendition_path(output_path, r)) for r in self.renditions]
+        for video_label, audio_label, (rendition, path) in zip(video_labels, audio_labels, outputs):
+            args += ['-map', video_label]
+            if audio_label:
+                args += ['-map', audio_label]
+            args += ['-frames:v', str(total_frames), '-t', f"{total_frames / self.fps:.6f}"]
+            args += video_encoder_args(self.video_codec, rendition.get('video_bitrate', self.video_bitrate),
+                                       rendition.get('video_crf', self.video_crf), self.video_preset,
+                                       self.video_tune, self.video_bframes)
+            if audio_label:
+                # Fichier final : index en tête ou fragments écrits au fil de l'encodage
+                args += ['-c:a', 'aac', '-b:a', '192k'] + mp4_layout_args(self.mp4_layout)
+            args.append(path)
+        return args
+
+    def render(self, segments, output_path, background=None, audio=None):
+        """
+        Rend la vidéo complète en une seule exécution de ffmpeg.
+
+        Args:
+            segments: Liste de tuples (chemin de l'image, durée en secondes)
+            output_path: Chemin de la vidéo finale (les rendus supplémentaires sont écrits à côté)
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop'} ou None
+            audio: Piste audio {'path', 'music', 'music_volume'} ou None
+
+        Returns:
+            bool: True si le rendu a réussi, False sinon
+        """
+        args = self.build_command(segments, output_path, background, audio)
+        if not run_ffmpeg(args):
+            logging.error("[VIDEO] Échec du rendu filtergraph")
+            return False
+        paths = [output_path] + [rendition_path(output_path, r) for r in self.renditions]
+        return all(os.path.exists(path) and os.path.getsize(path) > 0 for path in paths)
@@ -0,0 +1,263 @@
+"""
+Échange d'images brutes NumPy avec ffmpeg par ses entrées/sorties standard.
+
+Utilisé pour les rendus qui nécessitent un calcul image par image (zoom,
+transitions, arrière-plans) sans passer par write_videofile de moviepy.
+"""
+
+import time
+import logging
+import tempfile
+import subprocess
+
+import numpy as np
+
+from .ffmpeg_tools import get_ffmpeg_binary, video_encoder_args, rendition_path, rendition_filters
+
+
+class FramePipeWriter:
+    """
+    Envoie des images RGB (ou RGBA) 8 bits à un processus ffmpeg.
+
+    Le producteur dessine directement dans `buffer`, un tableau uint8 alloué une
+    seule fois, puis appelle write() : le buffer est transmis à ffmpeg via une
+    memoryview, sans copie intermédiaire.
+    """
+
+    def __init__(self, output_path, output_size=(1080, 1920), fps=30, video_codec='libx264', video_bitrate='5000k',
+                 extra_args=None, channels=3, background=None, video_preset='veryfast', video_crf=None,
+                 video_tune=None, renditions=None, video_bframes=None):
+        """
+        Initialise l'écrivain d'images.
+
+        Args:
+            output_path: Chemin de la vidéo de sortie
+            output_size: Taille des images (width, height)
+            fps: Images par seconde
+            video_codec: Codec vidéo
+            video_bitrate: Débit vidéo
+            extra_args: Arguments ffmpeg supplémentaires pour l'encodeur
+            channels: 3 pour des images RGB, 4 pour des images RGBA
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop'} sur
+                        laquelle ffmpeg superpose les images (canal alpha), ou None
+            video_preset: Preset de l'encodeur
+            video_crf: Qualité constante (remplace le débit si définie)
+            video_tune: Réglage de l'encodeur ('animation', 'stillimage'...) ou None
+            renditions: Rendus supplémentaires [{'name', 'width', 'height', 'video_crf'?,
+                        'video_bitrate'?}] encodés dans le même processus ffmpeg, à côté
+                        de output_path (voir rendition_path)
+            video_bframes: Nombre maximal d'images B consécutives (None = réglage de l'encodeur)
+        """
+        self.output_path = output_path
+        self.width, self.height = output_size
+        self.fps = fps
+        self.video_codec = video_codec
+        self.video_bitrate = video_bitrate
+        self.extra_args = list(extra_args or [])
+        self.channels = channels
+        self.background = background
+        self.video_preset = video_preset
+        self.video_crf = video_crf
+        self.video_tune = video_tune
+        self.renditions = list(renditions or [])
+        self.video_bframes = video_bframes
+
+        self.buffer = np.zeros((self.height, self.width, channels), dtype=np.uint8)
+        self._view = memoryview(self.buffer).cast('B')
+
+        self.frames_written = 0
+        self.returncode = None
+        self._process = None
+        self._stderr = None
+        self._start_time = None
+        self._elapsed = 0.0
+
+    def build_command(self):
+        """Construit la ligne de commande ffmpeg"""
+        cmd = [
+            get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgba' if self.channels == 4 else 'rgb24',
+            '-s', f"{self.width}x{self.height}",
+            '-r', str(self.fps),
+            '-i', '-',
+        ]
+        filters = []
+        stream = '[0:v]'
+        if self.background:
+            if self.background.get('loop'):
+                cmd += ['-stream_loop', '-1']
+            cmd += ['-ss', f"{self.background['start']:.3f}", '-i', self.background['path']]
+            filters += [f"[1:v]fps={self.fps},scale={self.width}:{self.height},setsar=1[bg]",
+                        f"[bg][0:v]overlay=0:0:shortest=1,format=yuv420p[v]"]
+            stream = '[v]'
+
+        # Images composées une seule fois, puis dupliquées pour chaque rendu
+        split_filters, labels = rendition_filters(stream, self.renditions)
+        filters += split_filters
+        if filters:
+            cmd += ['-filter_complex', ';'.join(filters)]
+
+        outputs = [({}, self.output_path)] + [(r, rendition_path(self.output_path, r)) for r in self.renditions]
+        for label, (rendition, path) in zip(labels, outputs):
+            if filters:
+                cmd += ['-map', label]
+            cmd.append('-an')
+            cmd += video_encoder_args(self.video_codec, rendition.get('video_bitrate', self.video_bitrate),
+                                      rendition.get('video_crf', self.video_crf), self.video_preset, self.video_tune,
+                                      self.video_bframes)
+            cmd += self.extra_args + [path]
+        return cmd
+
+    def open(self):
+        """Démarre le processus ffmpeg"""
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(self.build_command(), stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL, stderr=self._stderr)
+        self.frames_written = 0
+        self._start_time = time.perf_counter()
+        return self
+
+    def write(self, frame=None):
+        """
+        Envoie une image à ffmpeg.
+
+        Args:
+            frame: Image à envoyer (si None, le contenu actuel de `buffer` est envoyé).
+                   Une image différente du buffer y est d'abord copiée.
+        """
+        if frame is not None and frame is not self.buffer:
+            np.copyto(self.buffer, frame)
+        self._process.stdin.write(self._view)
+        self.frames_written += 1
+
+    def write_repeated(self, count):
+        """Envoie `count` fois le contenu actuel du buffer (images fixes)"""
+        for _ in range(count):
+            self._process.stdin.write(self._view)
+        self.frames_written += count
+
+    def close(self):
+        """
+        Termine l'encodage.
+
+        Returns:
+            bool: True si ffmpeg s'est terminé sans erreur, False sinon
+        """
+        if self._process is None:
+            return False
+
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        returncode = self._process.wait()
+        self._elapsed = time.perf_counter() - self._start_time
+        self.returncode = returncode
+
+        if returncode != 0:
+            self._stderr.seek(0)
+            error = self._stderr.read().decode('utf-8', errors='replace').strip()
+            logging.error(f"[FFMPEG] ffmpeg a échoué ({returncode}): {error[-500:]}")
+        self._stderr.close()
+        self._process = None
+
+        logging.info(f"[VIDEO] {self.frames_written} images écrites en {self._elapsed:.2f}s "
+                     f"({self.frames_per_second:.1f} images/s)")
+        return returncode == 0
+
+    @property
+    def frames_per_second(self):
+        """Débit moyen d'images envoyées à ffmpeg"""
+        elapsed = self._elapsed or (time.perf_counter() - self._start_time if self._start_time else 0)
+        return self.frames_written / elapsed if elapsed > 0 else 0.0
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self._process is not None:
+            if exc_type is not None:
+                self._process.kill()
+            self.close()
+        return False
+
+
+class FramePipeReader:
+    """
+    Lit les images RGB 8 bits d'une vidéo décodée par ffmpeg.
+
+    Chaque image est lue directement dans `buffer` (readinto), un tableau uint8
+    alloué une seule fois.
+    """
+
+    def __init__(self, path, output_size=(1080, 1920), fps=30, start=0.0, loop=False):
+        """
+        Initialise le lecteur d'images.
+
+        Args:
+            path: Chemin de la vidéo
+            output_size: Taille des images (width, height)
+            fps: Images par seconde lues
+            start: Instant de départ en secondes (recherche rapide avant décodage)
+            loop: Si True, la vidéo est lue en boucle
+        """
+        self.path = path
+        self.width, self.height = output_size
+        self.fps = fps
+        self.start = start
+        self.loop = loop
+
+        self.buffer = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self._view = memoryview(self.buffer).cast('B')
+        self._process = None
+
+    def open(self):
+        """Démarre le processus ffmpeg"""
+        cmd = [get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error']
+        if self.loop:
+            cmd += ['-stream_loop', '-1']
+        cmd += [
+            '-ss', f"{self.start:.3f}",
+            '-i', self.path,
+            '-an',
+            '-vf', f"fps={self.fps},scale={self.width}:{self.height}",
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            '-'
+        ]
+        self._process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL)
+        return self
+
+    def read(self):
+        """
+        Lit l'image suivante dans le buffer.
+
+        Returns:
+            numpy.ndarray: Le buffer (la dernière image est conservée en fin de vidéo)
+        """
+        remaining = len(self._view)
+        offset = 0
+        while remaining:
+            count = self._process.stdout.readinto(self._view[offset:])
+            if not count:
+                break
+            offset += count
+            remaining -= count
+        return self.buffer
+
+    def close(self):
+        """Arrête le processus ffmpeg"""
+        if self._process is not None:
+            self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+        return False
@@ -1,90 +1,386 @@
 import os
+import re
+import time
+import uuid
 import random
+import hashlib
+import threading
 import numpy as np
-from gtts import gTTS
+import soundfile as sf
 from pathlib import Path
 import logging
-from moviepy.audio.io.AudioFileClip import AudioFileClip
-from moviepy.audio.AudioClip import CompositeAudioClip, concatenate_audioclips
+from concurrent.futures import ThreadPoolExecutor
+
+from .tts_backends import default_tts_backend
+from .ffmpeg_tools import decode_audio
+from .audio_assembly import assemble_segments
+from config import AUDIO_CONFIG
+
+# Amplitude sous laquelle un échantillon est considéré comme du silence (-50 dBFS)
+SILENCE_THRESHOLD = 10 ** (-50 / 20)
+
+
+def split_sentences(text, max_chars=300):
+    """
+    Découpe un texte en phrases, à synthétiser séparément.
+
+    Les phrases plus longues que max_chars sont coupées à la dernière virgule
+    (à défaut au dernier espace) avant la limite.
+
+    Args:
+        text: Texte à découper
+        max_chars: Longueur maximale d'un morceau
+
+    Returns:
+        list: Morceaux du texte, dans l'ordre
+    """
+    chunks = []
+    for sentence in re.split(r'(?<=[.!?…])\s+', text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(', ', 0, max_chars) + 1
+            if cut <= 0:
+                cut = sentence.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+class TokenBucket:
+    """Limiteur de débit à seau de jetons, partagé entre threads"""
+
+    def __init__(self, rate, burst=1):
+        """
+        Initialise le limiteur.
+
+        Args:
+            rate: Nombre moyen de requêtes par seconde (None ou 0 = pas de limite)
+            burst: Nombre de requêtes autorisées d'un coup après une pause
+        """
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Attend qu'un jeton soit disponible puis le consomme.
+
+        Returns:
+            float: Temps d'attente en secondes
+        """
+        if not self.rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
 
 class TTSGenerator:
-    def __init__(self, language='en', tld='com', temp_dir='temp'):
+    def __init__(self, language='en', tld='com', temp_dir='temp', cache=None, max_workers=4, rate_limit=None,
+                 burst=1, backend=None, chunk_threshold=None, max_chunk_chars=300, sentence_gap=0.25):
+        """
+        Initialise le générateur de voix.
+
+        Args:
+            language: Langue de la voix
+            tld: Domaine Google utilisé (accent)
+            temp_dir: Dossier des voix écrites sans chemin de sortie
+            cache: Cache des voix partagé entre les rendus (TTSCache), None pour toujours synthétiser
+            max_workers: Nombre maximal de synthèses simultanées (generate_batch)
+            rate_limit: Nombre maximal de requêtes au service par seconde (None = pas de limite)
+            burst: Nombre de requêtes autorisées d'un coup au-delà de rate_limit
+            backend: Moteur de synthèse (voir tts_backends), celui de AUDIO_CONFIG si None
+            chunk_threshold: Longueur au-delà de laquelle un texte est synthétisé phrase par phrase,
+                             en parallèle (None = toujours en une requête)
+            max_chunk_chars: Longueur maximale d'un morceau (voir split_sentences)
+            sentence_gap: Silence entre deux phrases assemblées, en secondes
+        """
         self.language = language
         self.tld = tld
         self.temp_dir = temp_dir
+        self.cache = cache
+        self.backend = backend or default_tts_backend()
+        self.extension = self.backend.extension
+        self.max_workers = max(1, max_workers or 1)
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+        self.chunk_threshold = chunk_threshold
+        self.max_chunk_chars = max_chunk_chars
+        self.sentence_gap = sentence_gap
         os.makedirs(temp_dir, exist_ok=True)
-        logging.info(f"TTSGenerator initialisé (langue={language}, tld={tld})")
+        logging.info(f"TTSGenerator initialisé (moteur={self.backend.name}, langue={language}, tld={tld})")
     
     def generate_tts(self, text, output_path=None, slow=False):
-        if not text or not text.strip():
-            logging.warning("Texte vide, impossible de générer TTS")
+        """
+        Génère la voix d'un texte, relue depuis le cache si elle a déjà été synthétisée.
+
+        Args:
+            text: Texte à lire
+            output_path: Chemin du fichier audio, au format du moteur (voir self.extension),
+                         dans temp_dir si None
+            slow: Lecture ralentie
+
+        Returns:
+            str: Chemin du fichier audio (extension .wav pour un texte synthétisé phrase
+                 par phrase), ou None en cas d'erreur
+        """
+        try:
+            return self._generate(text, output_path, slow)
+        except ValueError as e:
+            logging.warning(str(e))
             return None
+        except Exception as e:
+            logging.error(f"Erreur lors de la génération TTS: {str(e)}")
+            return None
+
+    def generate_batch(self, items, slow=False, max_workers=None):
+        """
+        Génère plusieurs voix en parallèle (titre et commentaires d'un ou plusieurs posts).
+
+        Chaque synthèse est un aller-retour réseau : elles sont lancées dans un
+        nombre borné de threads, et le limiteur de débit espace les requêtes pour
+        rester sous le seuil de limitation du service. Les voix déjà en cache ne
+        consomment pas de requête.
+
+        Args:
+            items: Liste de tuples (texte, chemin de sortie ou None)
+            slow: Lecture ralentie
+            max_workers: Nombre de threads (self.max_workers si None)
+
+        Returns:
+            list: Un résultat par élément, dans l'ordre d'entrée :
+                  {'text', 'path' (None en cas d'erreur), 'error' (None si la voix a été générée)}
+        """
+        items = list(items)
+        results = [None] * len(items)
+        workers = min(max_workers or self.max_workers, len(items))
+
+        def run(index):
+            text, output_path = items[index]
+            try:
+                results[index] = {'text': text, 'path': self._generate(text, output_path, slow), 'error': None}
+            except ValueError as e:
+                logging.warning(str(e))
+                results[index] = {'text': text, 'path': None, 'error': str(e)}
+            except Exception as e:
+                logging.error(f"Erreur lors de la génération TTS: {str(e)}")
+                results[index] = {'text': text, 'path': None, 'error': str(e)}
+
+        if workers <= 1:
+            for index in range(len(items)):
+                run(index)
+        else:
+            logging.info(f"[TTS] Génération de {len(items)} voix avec {workers} threads")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(run, range(len(items))))
+        return results
+
+    def _generate(self, text, output_path=None, slow=False):
+        """
+        Génère la voix d'un texte (voir generate_tts) en levant une exception en cas d'erreur.
+
+        Args:
+            text: Texte à lire
+            output_path: Chemin du fichier audio (dans temp_dir si None)
+            slow: Lecture ralentie
+
+        Returns:
+            str: Chemin du fichier audio (extension .wav pour un texte synthétisé phrase par phrase)
+        """
+        if not text or not text.strip():
+            raise ValueError("Texte vide, impossible de générer TTS")
             
         if len(text) > 5000:
             logging.warning(f"Texte trop long ({len(text)} caractères), tronqué à 5000 caractères")
             text = text[:5000] + "..."
             
         if output_path is None:
-            import hashlib
             text_hash = hashlib.md5(text.encode()).hexdigest()[:10]
-            output_path = os.path.join(self.temp_dir, f"tts_{text_hash}.mp3")
+            output_path = os.path.join(self.temp_dir, f"tts_{text_hash}{self.extension}")
         
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
+        if self.chunk_threshold and len(text) > self.chunk_threshold:
+            chunks = split_sentences(text, self.max_chunk_chars)
+            if len(chunks) > 1:
+                return self._generate_chunked(chunks, output_path, slow)
+        
+        if self.cache is None:
+            self._synthesize(text, output_path, slow)
+            logging.info(f"TTS généré avec succès: {output_path}")
+            return output_path
+        
+        if not self.cache.link(self._cached_voice(text, slow), output_path):
+            raise OSError(f"impossible de placer la voix ({output_path})")
+        return output_path
+
+    def _cached_voice(self, text, slow):
+        """
+        Renvoie la voix d'un texte depuis le cache, en la synthétisant si elle manque.
+
+        Args:
+            text: Texte à lire
+            slow: Lecture ralentie
+
+        Returns:
+            str: Chemin de la voix dans le cache
+        """
+        key = self.cache.make_key(text, self.language, self.tld, slow, self.backend.cache_id())
+        cached_path = self.cache.lookup(key, self.extension)
+        if cached_path is not None:
+            logging.info(f"[TTS] Voix relue depuis le cache pour '{text[:50]}...'")
+            return cached_path
+        
+        tmp_path = self.cache.tmp_path(key, self.extension)
         try:
-            logging.info(f"Génération TTS pour '{text[:50]}...' ({len(text)} caractères)")
-            tts = gTTS(text=text, lang=self.language, tld=self.tld, slow=slow)
-            tts.save(output_path)
-            
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                logging.info(f"TTS généré avec succès: {output_path}")
-                return output_path
-            else:
-                logging.error(f"Échec de génération TTS: fichier vide ou non créé ({output_path})")
-                return None
+            self._synthesize(text, tmp_path, slow)
+            cached_path = self.cache.store(key, tmp_path, self.extension)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if cached_path is None:
+            raise OSError(f"impossible d'enregistrer la voix de '{text[:50]}...' dans le cache")
+        logging.info(f"TTS généré avec succès: {cached_path}")
+        return cached_path
+
+    def _generate_chunked(self, chunks, output_path, slow):
+        """
+        Synthétise un long texte phrase par phrase en parallèle, puis assemble les voix.
+
+        Chaque phrase est une requête (et une entrée du cache) : la plus lente ne
+        porte plus que sur une phrase, et modifier une phrase ne fait synthétiser
+        qu'elle. Les voix sont assemblées à l'échantillon près : le silence au
+        début et à la fin de chaque phrase est remplacé par un blanc de
+        sentence_gap secondes. La voix assemblée est écrite en WAV PCM quel que
+        soit le format du moteur : pas de second encodage MP3.
+
+        Args:
+            chunks: Phrases du texte (voir split_sentences)
+            output_path: Chemin du fichier audio assemblé (son extension est remplacée par .wav)
+            slow: Lecture ralentie
+
+        Returns:
+            str: Chemin du fichier WAV assemblé
+        """
+        logging.info(f"[TTS] Synthèse de {len(chunks)} phrases en parallèle")
+        output_path = os.path.splitext(output_path)[0] + '.wav'
+        # Sans cache, chaque phrase est écrite dans un fichier temporaire
+        tmp_paths = [] if self.cache is not None else [
+            os.path.join(self.temp_dir, f"chunk_{uuid.uuid4().hex}{self.extension}") for _ in chunks]
+
+        def voice(index):
+            if self.cache is not None:
+                return self._cached_voice(chunks[index], slow)
+            self._synthesize(chunks[index], tmp_paths[index], slow)
+            return tmp_paths[index]
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+                futures = [executor.submit(voice, index) for index in range(len(chunks))]
+            self._stitch([future.result() for future in futures], output_path)
+        finally:
+            for path in tmp_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        logging.info(f"TTS généré avec succès: {output_path} ({len(chunks)} phrases)")
+        return output_path
+
+    def _stitch(self, paths, output_path):
+        """
+        Assemble des voix à l'échantillon près, séparées par sentence_gap secondes de silence.
+
+        Args:
+            paths: Voix des phrases, dans l'ordre
+            output_path: Chemin du fichier WAV assemblé (remplacé de manière atomique :
+                         il peut être un lien vers une voix du cache)
+        """
+        sample_rate, parts = None, []
+        for i, path in enumerate(paths):
+            # Toutes les phrases à la fréquence de la première
+            samples, sample_rate = decode_audio(path, sample_rate)
+            if samples is None:
+                raise RuntimeError(f"impossible de décoder la voix {path}")
+            samples = samples[:, 0]
+            voiced = np.flatnonzero(np.abs(samples) > SILENCE_THRESHOLD)
+            start = voiced[0] if i > 0 and len(voiced) else 0
+            end = voiced[-1] + 1 if i < len(paths) - 1 and len(voiced) else len(samples)
+            parts.append(samples[start:end])
+            if i < len(paths) - 1:
+                parts.append(np.zeros(int(round(self.sentence_gap * sample_rate)), dtype=np.float32))
+
+        samples = np.concatenate(parts)
+        # Écrêtage explicite : la conversion en 16 bits ne sature pas d'elle-même
+        np.clip(samples, -1.0, 1.0, out=samples)
+        stem, _ = os.path.splitext(output_path)
+        tmp_path = f"{stem}.{os.getpid()}.{threading.get_ident()}.tmp.wav"
+        try:
+            sf.write(tmp_path, samples, sample_rate, format='WAV', subtype='PCM_16')
+            os.replace(tmp_path, output_path)
         except Exception as e:
-            logging.error(f"Erreur lors de la génération TTS: {str(e)}")
-            return None
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise RuntimeError(f"impossible d'écrire la voix assemblée {output_path}: {e}")
+
+    def _synthesize(self, text, output_path, slow):
+        """
+        Appelle le moteur de synthèse (pour un service distant, une requête soumise au limiteur de débit).
+
+        Args:
+            text: Texte à lire
+            output_path: Chemin du fichier audio écrit
+            slow: Lecture ralentie
+        """
+        if self.backend.remote:
+            waited = self.rate_limiter.acquire()
+            if waited:
+                logging.debug(f"[TTS] Requête retardée de {waited:.2f}s par le limiteur de débit")
+        logging.info(f"Génération TTS pour '{text[:50]}...' ({len(text)} caractères)")
+        self.backend.synthesize(text, output_path, language=self.language, tld=self.tld, slow=slow)
+        
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            raise RuntimeError(f"Échec de génération TTS: fichier vide ou non créé ({output_path})")
 
-    def combine_audio_files(self, audio_files, output_path):
+    def combine_audio_files(self, audio_files, output_path, silence=None, sample_rate=44100):
         """
-        Combine plusieurs fichiers audio en un seul en utilisant moviepy.
+        Assemble les voix d'un post les unes après les autres dans un WAV (voir assemble_segments).
         
         Args:
             audio_files: Liste des chemins vers les fichiers audio à combiner
-            output_path: Chemin de sortie pour le fichier audio combiné
+            output_path: Chemin de sortie du fichier WAV combiné
+            silence: Silence entre deux voix en secondes, AUDIO_CONFIG["silence_between_segments"] si None
+            sample_rate: Fréquence d'échantillonnage de la piste
             
         Returns:
-            bool: True si la combinaison a réussi, False sinon
+            list: Positions (début, fin) de chaque voix en secondes, ou None en cas d'échec
         """
         try:
-            # Charger tous les clips audio
-            audio_clips = [AudioFileClip(f) for f in audio_files if os.path.exists(f)]
-            
-            if not audio_clips:
-                logging.error("Aucun fichier audio valide à combiner")
-                return False
-                
-            # Concaténer les clips
-            final_clip = concatenate_audioclips(audio_clips)
-            
-            # Sauvegarder le résultat
-            final_clip.write_audiofile(output_path)
-            
-            # Nettoyer
-            final_clip.close()
-            for clip in audio_clips:
-                clip.close()
-                
-            return True
-            
+            if silence is None:
+                silence = AUDIO_CONFIG.get('silence_between_segments', 0.0)
+            return assemble_segments(audio_files, output_path, silence=silence, sample_rate=sample_rate)
         except Exception as e:
             logging.error(f"Erreur lors de la combinaison des fichiers audio: {str(e)}")
-            return False
+            return None
 
 class ModernAudioMaker:
-    def __init__(self, output_dir="output", background_music_dir=None):
+    def __init__(self, output_dir="output", background_music_dir=None, backend=None, language='fr'):
         self.output_dir = output_dir
+        # Moteur de AUDIO_CONFIG par défaut ; les voix sont au format du moteur (self.extension)
+        self.backend = backend or default_tts_backend()
+        self.extension = self.backend.extension
+        self.language = language
         if background_music_dir is None:
             self.background_music_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "resources", "music")
         else:
@@ -92,53 +388,35 @@ class ModernAudioMaker:
     
     def create_audio_for_text(self, text, output_path):
         try:
-            tts = gTTS(text=text, lang='fr')
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            tts.save(output_path)
+            self.backend.synthesize(text, output_path, language=self.language)
             return output_path
         except Exception as e:
             logging.error(f"Erreur lors de la création de l'audio: {str(e)}")
             return None
 
-    def combine_audio_files(self, audio_files, output_path, background_volume=0.3):
+    def combine_audio_files(self, audio_files, output_path, background_volume=0.3, silence=None):
+        """
+        Assemble les voix les unes après les autres dans un WAV (voir assemble_segments).
+        
+        Args:
+            audio_files: Liste des chemins vers les fichiers audio à combiner
+            output_path: Chemin de sortie du fichier WAV combiné
+            background_volume: Volume de la musique de fond (non utilisé)
+            silence: Silence entre deux voix en secondes, AUDIO_CONFIG["silence_between_segments"] si None
+            
+        Returns:
+            list: Positions (début, fin) de chaque voix en secondes, dans l'ordre de audio_files
+                  (voix absente = segment vide), ou None en cas d'échec
+        """
         try:
             logging.info("[AUDIO] Début de la combinaison des fichiers audio")
+            if silence is None:
+                silence = AUDIO_CONFIG.get('silence_between_segments', 0.0)
             
-            # Vérifier les fichiers
-            valid_files = [f for f in audio_files if os.path.exists(f)]
-            if not valid_files:
-                logging.error("[AUDIO] Aucun fichier audio valide à combiner")
-                return False, []
-            
-            # Créer le dossier de sortie
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            # Charger les clips audio
-            clips = []
-            durations = []
-            for audio_file in valid_files:
-                try:
-                    clip = AudioFileClip(audio_file)
-                    clips.append(clip)
-                    durations.append(clip.duration)
-                except Exception as e:
-                    logging.error(f"[AUDIO] Erreur lors du chargement de {audio_file}: {e}")
-            
-            if not clips:
-                logging.error("[AUDIO] Aucun clip audio chargé")
-                return False, []
-            
-            # Combiner les clips
-            final_audio = CompositeAudioClip(clips)
-            final_audio.write_audiofile(output_path, fps=44100, logger=None)
-            
-            # Nettoyer
-            final_audio.close()
-            for clip in clips:
-                clip.close()
-            
-            return True, durations
+            # Voix décodées une fois et placées les unes après les autres dans un WAV
+            return assemble_segments(audio_files, output_path, silence=silence)
             
         except Exception as e:
             logging.error(f"[AUDIO] Erreur lors de la combinaison audio: {str(e)}")
-            return False, []
+            return None
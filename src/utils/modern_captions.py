@@ -1,7 +1,6 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import numpy as np
 from pathlib import Path
-import textwrap
 import logging
 import os
 import sys
@@ -13,6 +12,7 @@ if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 from config import VIDEO_CONFIG
+from .card_layout import TextLayoutCache, MediaThumbnailCache
 
 logger = logging.getLogger("ModernCaptionMaker")
 
@@ -22,17 +22,31 @@ class CommentCardCreator:
     Supporte la génération de fichiers images.
     """
     
-    def __init__(self, width=1080, height=1920):
+    def __init__(self, width=1080, height=1920, transparent_background=False, scale=None,
+                 layout_cache=None, media_cache=None):
         """
         Initialisation du créateur de cartes
         
         Args:
             width: Largeur des images (par défaut 1080px)
             height: Hauteur des images (par défaut 1920px)
+            transparent_background: Si True, le fond est transparent (PNG RGBA) pour
+                                    composer les cartes sur une vidéo d'arrière-plan
+            scale: Échelle des polices, marges et ombres (par défaut petit côté / 1080), pour
+                   dessiner directement les cartes d'un rendu basse résolution
+            layout_cache: TextLayoutCache partagé entre les formats d'export (polices, texte découpé)
+            media_cache: MediaThumbnailCache partagé entre les formats d'export
         """
         self.width = width
         self.height = height
         self.size = (width, height)
+        self.transparent_background = transparent_background
+        self.scale = scale if scale is not None else min(width, height) / 1080
+        self.layout_cache = layout_cache or TextLayoutCache()
+        self.media_cache = media_cache or MediaThumbnailCache()
+        # Largeur de la zone de texte : toute la largeur en portrait et en carré,
+        # limitée en paysage pour garder des lignes lisibles
+        self.text_width = min(width, self._px(1600))
         
         # Couleurs du thème
         self.background_color = (25, 25, 25)  # Fond sombre
@@ -42,14 +56,18 @@ class CommentCardCreator:
         
         # Polices
         self.font_path = self._find_font()
-        self.title_font_size = 48
-        self.body_font_size = 38
-        self.meta_font_size = 30
+        self.title_font_size = self._px(48)
+        self.body_font_size = self._px(38)
+        self.meta_font_size = self._px(30)
         
         # Créer le dossier temporaire s'il n'existe pas
         os.makedirs("temp", exist_ok=True)
         
-        logger.info(f"CommentCardCreator initialisé ({width}x{height})")
+        logger.info(f"CommentCardCreator initialisé ({width}x{height}, échelle {self.scale:.2f})")
+    
+    def _px(self, value):
+        """Convertit une dimension de la mise en page 1080px à l'échelle des cartes"""
+        return max(1, int(round(value * self.scale)))
     
     def _find_font(self):
         """Trouve une police système ou utilise celle du projet."""
@@ -69,6 +87,19 @@ class CommentCardCreator:
         logger.warning("Aucune police trouvée dans le projet, utilisation d'une police système")
         return "arial.ttf"
     
+    def _new_canvas(self):
+        """Crée l'image de fond d'une carte (opaque ou transparente)"""
+        if self.transparent_background:
+            return Image.new('RGBA', self.size, (0, 0, 0, 0))
+        return Image.new('RGB', self.size, self.background_color)
+    
+    def _paste_layer(self, image, layer, position):
+        """Colle un calque RGBA sur l'image en respectant sa transparence"""
+        if image.mode == 'RGBA':
+            image.alpha_composite(layer, dest=position)
+        else:
+            image.paste(layer, position, layer)
+    
     def create_title_card(self, title, subreddit, author, output_path=None):
         """
         Crée une carte de titre pour le post Reddit.
@@ -83,51 +114,48 @@ class CommentCardCreator:
             Chemin de l'image créée
         """
         # Créer l'image
-        image = Image.new('RGB', self.size, self.background_color)
+        image = self._new_canvas()
         draw = ImageDraw.Draw(image)
         
         # Préparer les polices
-        title_font = ImageFont.truetype(self.font_path, self.title_font_size)
-        meta_font = ImageFont.truetype(self.font_path, self.meta_font_size)
+        title_font = self.layout_cache.font(self.font_path, self.title_font_size)
+        meta_font = self.layout_cache.font(self.font_path, self.meta_font_size)
         
         # Ajouter le préfixe r/ si nécessaire
         if not subreddit.startswith("r/"):
             subreddit = f"r/{subreddit}"
         
-        # Wrapper le titre pour qu'il s'adapte à l'écran
-        max_chars = int(self.width / (self.title_font_size * 0.5))
-        wrapped_title = textwrap.fill(title, width=max_chars)
+        # Wrapper le titre pour qu'il s'adapte à l'écran (découpage et mesure en cache)
+        max_chars = int(self.text_width / (self.title_font_size * 0.5))
+        wrapped_title, title_width, title_height = self.layout_cache.layout(
+            title, self.font_path, self.title_font_size, max_chars)
         
         # Créer un fond de carte
-        card_padding = 40
-        title_bbox = draw.textbbox((0, 0), wrapped_title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        title_height = title_bbox[3] - title_bbox[1]
+        card_padding = self._px(40)
         
         meta_text = f"Posted by u/{author} on {subreddit}"
-        meta_bbox = draw.textbbox((0, 0), meta_text, font=meta_font)
-        meta_height = meta_bbox[3] - meta_bbox[1]
+        _, _, meta_height = self.layout_cache.layout(meta_text, self.font_path, self.meta_font_size)
         
         # Dimensions de la carte
-        card_width = min(self.width - 80, title_width + card_padding * 2)
+        card_width = min(self.width - self._px(80), title_width + card_padding * 2)
         card_height = title_height + meta_height + card_padding * 3
         
         # Position de la carte
         card_x = (self.width - card_width) // 2
-        card_y = (self.height - card_height) // 2 - 100  # Légèrement plus haut que le centre
+        card_y = max(0, (self.height - card_height) // 2 - self._px(100))  # Légèrement plus haut que le centre
         
         # Dessiner la carte avec un effet d'ombre
-        shadow_offset = 8
+        shadow_offset = self._px(8)
         shadow = Image.new('RGBA', (card_width, card_height), (0, 0, 0, 100))
-        image.paste(shadow, (card_x + shadow_offset, card_y + shadow_offset), shadow)
+        self._paste_layer(image, shadow, (card_x + shadow_offset, card_y + shadow_offset))
         
         card = Image.new('RGBA', (card_width, card_height), self.card_bg_color)
-        image.paste(card, (card_x, card_y), card)
+        self._paste_layer(image, card, (card_x, card_y))
         
         # Dessiner une barre d'accent en haut de la carte
-        accent_bar_height = 6
+        accent_bar_height = self._px(6)
         accent_bar = Image.new('RGBA', (card_width, accent_bar_height), self.accent_color)
-        image.paste(accent_bar, (card_x, card_y), accent_bar)
+        self._paste_layer(image, accent_bar, (card_x, card_y))
         
         # Dessiner le titre
         title_x = card_x + card_padding
@@ -163,30 +191,25 @@ class CommentCardCreator:
             Chemin de l'image créée
         """
         # Créer l'image
-        image = Image.new('RGB', self.size, self.background_color)
+        image = self._new_canvas()
         draw = ImageDraw.Draw(image)
         
         # Préparer les polices
-        body_font = ImageFont.truetype(self.font_path, self.body_font_size)
-        meta_font = ImageFont.truetype(self.font_path, self.meta_font_size)
-        
-        # Wrapper le texte du commentaire
-        max_chars = int(self.width / (self.body_font_size * 0.6))
-        wrapped_comment = textwrap.fill(comment_text, width=max_chars)
+        body_font = self.layout_cache.font(self.font_path, self.body_font_size)
+        meta_font = self.layout_cache.font(self.font_path, self.meta_font_size)
         
-        # Calculer les dimensions du texte
-        comment_bbox = draw.textbbox((0, 0), wrapped_comment, font=body_font)
-        comment_width = comment_bbox[2] - comment_bbox[0]
-        comment_height = comment_bbox[3] - comment_bbox[1]
+        # Wrapper le texte du commentaire et calculer ses dimensions (en cache)
+        max_chars = int(self.text_width / (self.body_font_size * 0.6))
+        wrapped_comment, comment_width, comment_height = self.layout_cache.layout(
+            comment_text, self.font_path, self.body_font_size, max_chars)
         
         # Texte des métadonnées
         meta_text = f"u/{author} • {upvotes:,} points"
-        meta_bbox = draw.textbbox((0, 0), meta_text, font=meta_font)
-        meta_height = meta_bbox[3] - meta_bbox[1]
+        _, _, meta_height = self.layout_cache.layout(meta_text, self.font_path, self.meta_font_size)
         
         # Dimensions de la carte
-        card_padding = 40
-        card_width = min(self.width - 80, comment_width + card_padding * 2)
+        card_padding = self._px(40)
+        card_width = min(self.width - self._px(80), comment_width + card_padding * 2)
         
         # Vérifier s'il y a des médias à inclure
         media_height = 0
@@ -197,16 +220,11 @@ class CommentCardCreator:
                 # Utiliser la première image trouvée
                 media_path = media['image_files'][0]
                 
-                # Ouvrir l'image média
-                media_img = Image.open(media_path)
-                
-                # Calculer les dimensions pour conserver le ratio d'aspect
-                media_width = min(card_width - card_padding * 2, 800)  # Max width
-                ratio = media_width / media_img.width
-                media_height = int(media_img.height * ratio)
-                
-                # Redimensionner l'image média
-                media_image = media_img.resize((media_width, media_height), Image.LANCZOS)
+                # Image média redimensionnée en conservant le ratio d'aspect
+                # (décodée une seule fois pour tous les formats d'export)
+                media_width = min(card_width - card_padding * 2, self._px(800))  # Max width
+                media_image = self.media_cache.thumbnail(media_path, media_width)
+                media_height = media_image.height
                 
                 # Ajouter une marge au-dessus du média
                 media_height += card_padding
@@ -222,12 +240,12 @@ class CommentCardCreator:
         
         # Position de la carte
         card_x = (self.width - card_width) // 2
-        card_y = (self.height - card_height) // 2
+        card_y = max(0, (self.height - card_height) // 2)
         
         # Dessiner la carte avec un effet d'ombre
-        shadow_offset = 8
+        shadow_offset = self._px(8)
         shadow = Image.new('RGBA', (card_width, card_height), (0, 0, 0, 100))
-        image.paste(shadow, (card_x + shadow_offset, card_y + shadow_offset), shadow)
+        self._paste_layer(image, shadow, (card_x + shadow_offset, card_y + shadow_offset))
         
         card = Image.new('RGBA', (card_width, card_height), self.card_bg_color)
         card_draw = ImageDraw.Draw(card)
@@ -235,7 +253,7 @@ class CommentCardCreator:
         # Ajouter une bordure subtile
         card_draw.rectangle((0, 0, card_width-1, card_height-1), outline=(100, 100, 100, 128), width=1)
         
-        image.paste(card, (card_x, card_y), card)
+        self._paste_layer(image, card, (card_x, card_y))
         
         # Dessiner les métadonnées en haut
         meta_x = card_padding
@@ -264,8 +282,8 @@ class CommentCardCreator:
         card_draw.text((comment_x, comment_y), wrapped_comment, font=body_font, fill=(255, 255, 255))
         
         # Ajouter le logo de vote positif
-        upvote_size = 20
-        upvote_x = len(f"u/{author} •") * (self.meta_font_size // 2) + meta_x + 10
+        upvote_size = self._px(20)
+        upvote_x = len(f"u/{author} •") * (self.meta_font_size // 2) + meta_x + self._px(10)
         upvote_y = meta_y + (meta_height - upvote_size) // 2
         
         # Dessiner une flèche vers le haut simplifiée
@@ -275,7 +293,7 @@ class CommentCardCreator:
                         fill=self.accent_color)
         
         # Ajouter l'image combinée à l'image principale
-        image.paste(card, (card_x, card_y), card)
+        self._paste_layer(image, card, (card_x, card_y))
         
         # Sauvegarder l'image si un chemin est spécifié
         if output_path:
@@ -287,12 +305,13 @@ class CommentCardCreator:
         return image
 
 class ModernCaptionMaker:
-    def __init__(self, size=None):
+    def __init__(self, size=None, layout_cache=None):
         """
         Initialisation du créateur de cartes de titre et commentaires
         
         Args:
             size: Taille personnalisée de l'image (width, height). Par défaut utilise la configuration
+            layout_cache: TextLayoutCache partagé entre les formats d'export (polices, texte découpé)
         """
         # Utiliser la taille de la configuration ou la valeur par défaut
         if size is None:
@@ -303,6 +322,9 @@ class ModernCaptionMaker:
             self.size = size
             
         self.width, self.height = self.size
+        self.layout_cache = layout_cache or TextLayoutCache()
+        # Largeur de la zone de texte, limitée en paysage pour garder des lignes lisibles
+        self.text_width = min(self.width, int(1600 * min(self.width, self.height) / 1080))
         
         # Couleurs du thème à partir de la configuration
         self.background_color = VIDEO_CONFIG.get("background_color", (39, 41, 49))
@@ -338,17 +360,15 @@ class ModernCaptionMaker:
         draw = ImageDraw.Draw(image)
         
         # Configuration des polices
-        title_font = ImageFont.truetype(self.font_path, int(self.base_font_size * 1.2))
-        meta_font = ImageFont.truetype(self.font_path, int(self.base_font_size * 0.8))
+        title_font = self.layout_cache.font(self.font_path, int(self.base_font_size * 1.2))
+        meta_font = self.layout_cache.font(self.font_path, int(self.base_font_size * 0.8))
         
-        # Wrapper le texte (ajuster la largeur en fonction de la largeur de l'écran)
-        wrap_width = int(30 * (self.width / 1080))  # Ajuster en fonction de la largeur
-        wrapped_title = textwrap.fill(title, width=wrap_width)
+        # Wrapper le texte (ajuster la largeur en fonction de la zone de texte), découpage et mesure en cache
+        wrap_width = int(30 * (self.text_width / 1080))
+        wrapped_title, title_width, title_height = self.layout_cache.layout(
+            title, self.font_path, int(self.base_font_size * 1.2), wrap_width)
         
         # Position du titre
-        title_bbox = draw.textbbox((0, 0), wrapped_title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        title_height = title_bbox[3] - title_bbox[1]
         title_x = (self.width - title_width) // 2
         title_y = (self.height - title_height) // 2 - 100
         
@@ -420,17 +440,15 @@ class ModernCaptionMaker:
         draw = ImageDraw.Draw(image)
         
         # Configuration des polices
-        comment_font = ImageFont.truetype(self.font_path, int(self.base_font_size * 0.9))
-        author_font = ImageFont.truetype(self.font_path, int(self.base_font_size * 0.7))
+        comment_font = self.layout_cache.font(self.font_path, int(self.base_font_size * 0.9))
+        author_font = self.layout_cache.font(self.font_path, int(self.base_font_size * 0.7))
         
-        # Wrapper le texte du commentaire
-        wrap_width = int(35 * (self.width / 1080))
-        wrapped_text = textwrap.fill(text, width=wrap_width)
+        # Wrapper le texte du commentaire, découpage et mesure en cache
+        wrap_width = int(35 * (self.text_width / 1080))
+        wrapped_text, text_width, text_height = self.layout_cache.layout(
+            text, self.font_path, int(self.base_font_size * 0.9), wrap_width)
         
         # Position du commentaire (avec un léger décalage en fonction du numéro du commentaire)
-        text_bbox = draw.textbbox((0, 0), wrapped_text, font=comment_font)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
         
         # Variation de position pour créer un effet de profondeur entre les commentaires
         offset_y = (comment_num % 3) * 20  # Varie légèrement la position Y
@@ -471,7 +489,7 @@ class ModernCaptionMaker:
                          fill=self.accent_color)
         
         # Ajouter le numéro dans l'indicateur
-        indicator_font = ImageFont.truetype(self.font_path, indicator_size - 10)
+        indicator_font = self.layout_cache.font(self.font_path, indicator_size - 10)
         indicator_text = str(comment_num + 1)
         indicator_bbox = card_draw.textbbox((0, 0), indicator_text, font=indicator_font)
         indicator_width = indicator_bbox[2] - indicator_bbox[0]
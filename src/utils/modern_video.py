@@ -1,6 +1,8 @@
 import moviepy
 from moviepy.editor import VideoClip, ImageClip, ColorClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip, CompositeAudioClip, concatenate_audioclips
 from moviepy.video.io.VideoFileClip import VideoFileClip
+import moviepy.video.fx.all as vfx
+import moviepy.video.compositing.transitions as transfx
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
 from pathlib import Path
@@ -13,6 +15,16 @@ import tempfile
 import soundfile as sf
 import traceback
 import unicodedata
+import hashlib
+
+from .ffmpeg_tools import run_ffmpeg, probe_media, video_encoder_args, rendition_path, validate_timing
+from .ffmpeg_tools import mp4_layout_args, stream_parameters, extract_keyframe, MP4_LAYOUT_BFRAMES
+from .segment_encoder import StillSegmentEncoder
+from .segment_cache import SegmentCache
+from .bumpers import BumperLibrary
+from .filtergraph_renderer import FiltergraphRenderer
+from .frame_pipe import FramePipeWriter, FramePipeReader
+from .video_effects import ZoomEffect, CardLayer, CardCompositor, card_timeline
 
 # Configuration du logger
 logging.basicConfig(level=logging.INFO, 
@@ -22,7 +34,12 @@ logger = logging.getLogger('TikTokVideoMaker')
 class TikTokVideoMaker:
     """Classe pour créer des vidéos TikTok avec des clips d'images et de l'audio"""
     
-    def __init__(self, output_size=(1080, 1920), fps=30, output_path='output.mp4', video_codec='libx264', video_bitrate='5000k'):
+    def __init__(self, output_size=(1080, 1920), fps=30, output_path='output.mp4', video_codec='libx264', video_bitrate='5000k',
+                 mux_mode='copy', render_engine='moviepy', render_workers=1, cache_dir=None,
+                 zoom_effect=False, zoom_ratio=1.08, zoom_frame_budget_ms=None,
+                 transition='none', transition_duration=0.0, video_preset='veryfast', video_crf=None,
+                 video_tune=None, still_tune='stillimage', renditions=None, segment_cache_size_mb=0,
+                 still_fps=None, mp4_layout='faststart', thumbnails=None):
         """
         Initialise le créateur de vidéos.
         
@@ -32,6 +49,39 @@ class TikTokVideoMaker:
             output_path: Chemin de sortie pour la vidéo
             video_codec: Codec vidéo
             video_bitrate: Débit vidéo
+            mux_mode: Mode d'ajout de l'audio ('copy' pour copier le flux vidéo sans
+                      ré-encodage, 'reencode' pour ré-encoder la vidéo avec moviepy)
+            render_engine: Moteur de rendu ('moviepy', 'segments' pour encoder chaque
+                           carte fixe directement avec ffmpeg, 'pipe' pour envoyer
+                           les images NumPy directement à ffmpeg, ou 'filtergraph'
+                           pour rendre toute la vidéo, audio compris, en une seule
+                           commande ffmpeg)
+            render_workers: Nombre de segments encodés en parallèle par le moteur
+                            'segments' (0 = nombre de coeurs)
+            cache_dir: Dossier de cache des cartes redimensionnées
+            zoom_effect: Si True, applique un zoom progressif (Ken Burns) à chaque carte
+            zoom_ratio: Facteur de zoom atteint à la fin de chaque carte
+            zoom_frame_budget_ms: Temps maximal de calcul d'une image zoomée en millisecondes
+            transition: Transition entre les cartes ('none', 'crossfade' pour un fondu
+                        enchaîné, 'slide' pour un glissement depuis la droite)
+            transition_duration: Durée de chaque transition en secondes, centrée sur
+                                 la coupe (la durée totale de la vidéo ne change pas)
+            video_preset: Preset de l'encodeur x264 (ultrafast ... veryslow)
+            video_crf: Qualité constante x264 ; si définie, remplace video_bitrate
+            video_tune: Réglage x264 des vidéos animées (zoom, transitions, arrière-plan)
+            still_tune: Réglage x264 des vidéos composées uniquement de cartes fixes
+            renditions: Rendus supplémentaires [{'name', 'width', 'height', 'video_crf'?,
+                        'video_bitrate'?}] produits dans la même passe que output_path
+                        (voir rendition_paths)
+            segment_cache_size_mb: Taille maximale en Mo du cache des segments encodés
+                                   par le moteur 'segments' (0 = pas de cache)
+            still_fps: Cadence effective des cartes fixes du moteur 'segments', encodées
+                       à cadence variable (None = cadence constante)
+            mp4_layout: Organisation des fichiers finaux (avec audio) : 'faststart' (index
+                        en tête), 'fragmented' (fragments écrits pendant l'encodage) ou
+                        'standard' (voir mp4_layout_args)
+            thumbnails: Miniatures [{'name', 'width', 'height'}] écrites à partir de la
+                        carte de titre (voir write_thumbnails)
         """
         # Corriger le type d'output_size si nécessaire
         if isinstance(output_size, int):
@@ -49,9 +99,35 @@ class TikTokVideoMaker:
         self.output_path = output_path
         self.video_codec = video_codec
         self.video_bitrate = video_bitrate
+        self.mux_mode = mux_mode
+        self.render_engine = render_engine
+        self.render_workers = render_workers
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "cache")
+        self.cache_dir = cache_dir
         self.duration = 0
+        self.last_render_fps = None
+        self.background_video = None
+        self.zoom_effect = zoom_effect
+        self.zoom_ratio = zoom_ratio
+        self.zoom_frame_budget_ms = zoom_frame_budget_ms
+        self.last_zoom_frame_ms = None
+        self.transition = transition
+        self.transition_duration = transition_duration
+        self.video_preset = video_preset
+        self.video_crf = video_crf
+        self.video_tune = video_tune
+        self.still_tune = still_tune
+        self.renditions = list(renditions or [])
+        self.segment_cache_size_mb = segment_cache_size_mb
+        self.still_fps = still_fps
+        self.mp4_layout = mp4_layout
+        self.video_bframes = MP4_LAYOUT_BFRAMES.get(mp4_layout)
+        self.thumbnails = list(thumbnails or [])
+        self.audio_track = None
+        self.last_render_has_audio = False
         
-        logger.info(f"TikTokVideoMaker initialisé avec taille={self.output_size}, fps={fps}")
+        logger.info(f"TikTokVideoMaker initialisé avec taille={self.output_size}, fps={fps}, moteur={render_engine}")
         
     def create_background(self, color=None, duration=60):
         """
@@ -76,6 +152,38 @@ class TikTokVideoMaker:
             black_img = np.zeros((self.height, self.width, 3), dtype=np.uint8)
             return ImageClip(black_img, duration=duration)
             
+    def set_background_video(self, path, start=0.0, loop=False, source_duration=None):
+        """
+        Utilise une vidéo (proxy d'arrière-plan) comme fond animé sous les cartes.
+        
+        Args:
+            path: Chemin du proxy d'arrière-plan (à la taille de sortie)
+            start: Instant de départ dans la vidéo (de préférence une image clé)
+            loop: Si True, la vidéo est lue en boucle
+            source_duration: Durée de la vidéo, nécessaire pour la lecture en boucle
+        """
+        self.background_video = {
+            'path': path,
+            'start': start,
+            'loop': loop,
+            'source_duration': source_duration
+        }
+        logging.info(f"[VIDEO] Arrière-plan vidéo: {os.path.basename(path)} à partir de {start:.2f}s")
+        
+    def set_audio(self, path, music_path=None, music_volume=-15):
+        """
+        Définit la piste audio mixée pendant le rendu par le moteur 'filtergraph'.
+        
+        Les autres moteurs rendent une vidéo muette ; l'audio est alors ajouté
+        ensuite avec add_audio_to_video.
+        
+        Args:
+            path: Chemin de l'audio combiné (voix)
+            music_path: Chemin d'une musique de fond mixée sous la voix, ou None
+            music_volume: Volume de la musique en dB
+        """
+        self.audio_track = {'path': path, 'music': music_path, 'music_volume': music_volume}
+        
     def add_text_clip(self, text, duration=5, position='center', font_size=40):
         """
         Ajoute un clip de texte à la vidéo.
@@ -145,18 +253,17 @@ class TikTokVideoMaker:
         try:
             logging.info(f"Ajout d'image: {image_path} ({duration}s)")
             
+            # Charger l'image une seule fois à la taille de sortie
+            card_array, card_path = self._load_card(image_path)
+            
             # Créer le clip d'image
-            image_clip = ImageClip(image_path)
+            image_clip = ImageClip(card_array)
             
             # Définir la durée
             image_clip = image_clip.set_duration(duration)
             
-            # Redimensionner l'image si nécessaire
-            if image_clip.size != self.output_size:
-                image_clip = image_clip.resize(self.output_size)
-            
-            # Ajouter le clip à la liste
-            self.images.append({'path': image_clip, 'duration': duration})
+            # Ajouter le clip à la liste (en gardant l'image normalisée pour les moteurs ffmpeg)
+            self.images.append({'path': image_clip, 'duration': duration, 'source': card_path, 'array': card_array})
             self.duration += duration
             
             return True
@@ -164,6 +271,46 @@ class TikTokVideoMaker:
             logging.error(f"Erreur lors de l'ajout de l'image: {str(e)}")
             return False
 
+    def _load_card(self, image_path):
+        """
+        Charge une carte et la normalise à la taille de sortie.
+        
+        Le redimensionnement n'est fait qu'une fois : le résultat est mis en cache
+        sur disque, indexé par le hash de l'image source et la taille cible.
+        
+        Args:
+            image_path: Chemin vers l'image
+            
+        Returns:
+            tuple: (tableau RGB ou RGBA uint8, chemin d'une image à la taille de sortie)
+        """
+        with Image.open(image_path) as img:
+            # Les cartes transparentes (arrière-plan vidéo) gardent leur canal alpha
+            mode = 'RGBA' if img.mode in ('RGBA', 'LA') or 'transparency' in img.info else 'RGB'
+            if img.size == self.output_size:
+                return np.array(img.convert(mode)), image_path
+        
+        with open(image_path, 'rb') as f:
+            source_hash = hashlib.sha1(f.read()).hexdigest()
+        
+        cards_dir = os.path.join(self.cache_dir, 'cards')
+        cached_path = os.path.join(cards_dir, f"{source_hash}_{self.width}x{self.height}.png")
+        if os.path.exists(cached_path):
+            with Image.open(cached_path) as cached:
+                return np.array(cached.convert(mode)), cached_path
+        
+        logging.info(f"[VIDEO] Redimensionnement de {image_path} en {self.width}x{self.height}")
+        with Image.open(image_path) as img:
+            resized = img.convert(mode).resize(self.output_size, Image.LANCZOS)
+        
+        # Écriture atomique pour ne jamais lire une carte à moitié écrite
+        os.makedirs(cards_dir, exist_ok=True)
+        tmp_path = f"{cached_path}.{os.getpid()}.tmp.png"
+        resized.save(tmp_path)
+        os.replace(tmp_path, cached_path)
+        
+        return np.array(resized), cached_path
+
     def add_audio(self, audio_files):
         """
         Ajoute l'audio à la vidéo finale.
@@ -246,7 +393,7 @@ class TikTokVideoMaker:
                 self.output_path,
                 fps=self.fps,
                 codec=self.video_codec,
-                bitrate=self.video_bitrate,
+                **self._moviepy_encoder_options(),
                 audio_codec='aac',
                 audio_bitrate='192k',
                 threads=4,
@@ -279,7 +426,7 @@ class TikTokVideoMaker:
                 self.output_path,
                 fps=self.fps,
                 codec=self.video_codec,
-                bitrate=self.video_bitrate,
+                **self._moviepy_encoder_options(),
                 audio=False,
                 logger=None
             )
@@ -343,26 +490,518 @@ class TikTokVideoMaker:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
         
+        self.last_render_has_audio = False
+        if self.render_engine in ('segments', 'filtergraph'):
+            if all(img_data.get('source') for img_data in self.images):
+                if self.render_engine == 'filtergraph':
+                    return self._render_filtergraph()
+                return self._render_segments()
+            logging.warning("[VIDEO] Certains clips ne sont pas des images fixes, rendu avec moviepy")
+        elif self.render_engine == 'pipe':
+            return self._render_pipe()
+        
+        return self._render_moviepy()
+
+    def _render_pipe(self):
+        """
+        Rend la vidéo en écrivant les images brutes dans l'entrée de ffmpeg.
+        
+        Returns:
+            bool: True si le rendu a réussi, False sinon
+        """
+        try:
+            start_render_time = time.time()
+            logging.info(f"[VIDEO] Rendu de {len(self.images)} clips via le pipe ffmpeg...")
+            
+            # Sans arrière-plan, les images zoomées sont envoyées en RGBA (pixels de 32 bits)
+            writer = FramePipeWriter(
+                self.output_path,
+                output_size=self.output_size,
+                fps=self.fps,
+                video_codec=self.video_codec,
+                video_bitrate=self.video_bitrate,
+                channels=4 if self.zoom_effect and not self.background_video else 3,
+                **self._encoder_options()
+            )
+            background_reader = None
+            if self.background_video:
+                background_reader = FramePipeReader(
+                    self.background_video['path'],
+                    output_size=self.output_size,
+                    fps=self.fps,
+                    start=self.background_video['start'],
+                    loop=self.background_video['loop']
+                ).open()
+            
+            layers = [self._card_layer(img_data, opaque=background_reader is None) for img_data in self.images]
+            frame_counts = [self._frame_count(img_data['duration']) for img_data in self.images]
+            starts, solos, windows = card_timeline(frame_counts, self._transition_frames())
+            compositor = CardCompositor(self.output_size, self.transition)
+            
+            try:
+                with writer:
+                    for i, layer in enumerate(layers):
+                        self._write_card_frames(writer, compositor, background_reader, layer, starts[i], *solos[i])
+                        if i < len(windows):
+                            self._write_transition_frames(writer, compositor, background_reader, layer, layers[i + 1],
+                                                          starts[i], starts[i + 1], *windows[i])
+            finally:
+                if background_reader is not None:
+                    background_reader.close()
+            
+            self.last_render_fps = writer.frames_per_second
+            if writer.returncode != 0:
+                logging.error("[VIDEO] Échec du rendu via le pipe ffmpeg")
+                return False
+            
+            effects = [layer.effect for layer in layers if layer.effect is not None]
+            if effects:
+                self.last_zoom_frame_ms = sum(e.average_frame_ms for e in effects) / len(effects)
+                for effect in effects:
+                    effect.check_budget()
+            
+            render_time = time.time() - start_render_time
+            logging.info(f"[VIDEO] Rendu terminé en {render_time:.2f} secondes ({writer.frames_per_second:.1f} images/s)")
+            
+            return self._check_output()
+            
+        except Exception as e:
+            logging.error(f"[VIDEO] Erreur lors du rendu de la vidéo: {str(e)}")
+            traceback.print_exc()
+            return False
+
+    def _frame_count(self, duration):
+        """Nombre d'images d'une carte (arrondi à l'image près, comme le moteur 'segments')"""
+        return max(1, int(round(duration * self.fps)))
+
+    def _transition_frames(self):
+        """Nombre d'images de chaque transition (0 = coupes franches)"""
+        if self.transition not in ('crossfade', 'slide'):
+            return 0
+        return max(0, int(round(self.transition_duration * self.fps)))
+
+    def _write_card_frames(self, writer, compositor, background_reader, layer, card_start, start, stop):
+        """
+        Écrit les images d'une carte hors des fenêtres de transition.
+        
+        Une carte fixe sans arrière-plan n'est copiée qu'une fois dans le
+        buffer, puis répétée.
+        
+        Args:
+            writer: FramePipeWriter ouvert
+            compositor: CardCompositor du rendu
+            background_reader: FramePipeReader ouvert sur l'arrière-plan, ou None
+            layer: CardLayer de la carte
+            card_start: Première image de la carte dans la vidéo
+            start: Première image à écrire
+            stop: Image de fin (exclue)
+        """
+        if stop <= start:
+            return
+        if layer.static and background_reader is None:
+            compositor.card_frame(layer, 0, writer.buffer)
+            writer.write_repeated(stop - start)
+            return
+        
+        for frame in range(start, stop):
+            background = background_reader.read() if background_reader is not None else None
+            compositor.card_frame(layer, frame - card_start, writer.buffer, background)
+            writer.write()
+
+    def _write_transition_frames(self, writer, compositor, background_reader, outgoing, incoming,
+                                 outgoing_start, incoming_start, start, stop):
+        """
+        Écrit les images d'une fenêtre de transition entre deux cartes.
+        
+        Args:
+            writer: FramePipeWriter ouvert
+            compositor: CardCompositor du rendu
+            background_reader: FramePipeReader ouvert sur l'arrière-plan, ou None
+            outgoing: CardLayer de la carte sortante
+            incoming: CardLayer de la carte entrante
+            outgoing_start: Première image de la carte sortante dans la vidéo
+            incoming_start: Première image de la carte entrante dans la vidéo
+            start: Première image de la fenêtre
+            stop: Image de fin de la fenêtre (exclue)
+        """
+        for step, frame in enumerate(range(start, stop)):
+            background = background_reader.read() if background_reader is not None else None
+            compositor.transition_frame(outgoing, incoming, frame - outgoing_start, frame - incoming_start,
+                                        step, stop - start, writer.buffer, background)
+            writer.write()
+
+    def _zoom_effect(self, duration):
+        """Crée l'effet de zoom d'une carte de `duration` secondes"""
+        return ZoomEffect(self.output_size, self._frame_count(duration), zoom_end=self.zoom_ratio,
+                          frame_budget_ms=self.zoom_frame_budget_ms)
+
+    def _card_rgba(self, img_data, flatten=False):
+        """
+        Renvoie la carte en RGBA à la taille de sortie, prête pour ZoomEffect.
+        
+        Args:
+            img_data: Entrée de self.images
+            flatten: Si True, la transparence est aplatie sur la couleur de fond
+        """
+        card = img_data.get('array')
+        if card is None:
+            card = img_data['path'].get_frame(0)
+        if flatten or card.shape[:2] != (self.height, self.width):
+            flat = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            self._blit_frame(flat, card)
+            card = flat
+        return ZoomEffect.prepare(card)
+
+    def _card_layer(self, img_data, opaque=True):
+        """
+        Calque d'une carte pour le moteur 'pipe'.
+        
+        Args:
+            img_data: Entrée de self.images
+            opaque: Si True (pas d'arrière-plan vidéo), la carte est aplatie sur la
+                    couleur de fond et centrée
+        """
+        if self.zoom_effect:
+            return CardLayer(self._card_rgba(img_data, flatten=opaque), self._zoom_effect(img_data['duration']))
+        
+        card = img_data.get('array')
+        if card is None:
+            card = img_data['path'].get_frame(0)
+        if opaque or card.shape[:2] != (self.height, self.width):
+            flat = np.empty((self.height, self.width, 3), dtype=np.uint8)
+            self._blit_frame(flat, card)
+            card = flat
+        return CardLayer(card)
+
+    def _zoom_clip(self, img_data, lead_frames=0, duration=None):
+        """
+        Clip moviepy d'une carte avec un zoom progressif.
+        
+        Les images sont calculées à la demande par ZoomEffect dans un buffer
+        réutilisé ; le masque des cartes transparentes est lu dans le même buffer.
+        
+        Args:
+            img_data: Entrée de self.images
+            lead_frames: Nombre d'images affichées avant le début de la carte (transition)
+            duration: Durée du clip (par défaut celle de la carte)
+        """
+        effect = self._zoom_effect(img_data['duration'])
+        source = img_data.get('array')
+        transparent = source is not None and source.shape[2] == 4
+        card = self._card_rgba(img_data)
+        buffer = np.empty_like(card)
+        state = {'index': None}
+        
+        def render(t):
+            index = int(round(t * self.fps)) - lead_frames
+            if state['index'] != index:
+                effect.render(card, index, buffer)
+                state['index'] = index
+            return buffer
+        
+        if duration is None:
+            duration = img_data['duration']
+        clip = VideoClip(lambda t: render(t)[:, :, :3], duration=duration)
+        if transparent:
+            clip = clip.set_mask(VideoClip(lambda t: render(t)[:, :, 3] / 255.0, ismask=True, duration=duration))
+        return clip
+
+    def _blit_frame(self, buffer, frame):
+        """
+        Copie une image dans le buffer de sortie, centrée sur la couleur de fond
+        si sa taille est différente.
+        """
+        if frame.shape[2] == 4:
+            # Carte transparente sans arrière-plan vidéo : aplatir sur la couleur de fond
+            alpha = frame[:, :, 3:4].astype(np.uint16)
+            color = np.array(self.background_color, dtype=np.uint16)
+            frame = ((frame[:, :, :3] * alpha + color * (255 - alpha) + 127) // 255).astype(np.uint8)
+        if frame.shape == buffer.shape:
+            np.copyto(buffer, frame, casting='unsafe')
+            return
+        
+        buffer[:] = self.background_color
+        frame_h, frame_w = frame.shape[:2]
+        h, w = min(frame_h, self.height), min(frame_w, self.width)
+        src_y, src_x = (frame_h - h) // 2, (frame_w - w) // 2
+        dst_y, dst_x = (self.height - h) // 2, (self.width - w) // 2
+        np.copyto(buffer[dst_y:dst_y + h, dst_x:dst_x + w],
+                  frame[src_y:src_y + h, src_x:src_x + w], casting='unsafe')
+
+    def _render_segments(self):
+        """
+        Rend la vidéo en encodant chaque carte fixe comme un segment ffmpeg.
+        
+        Returns:
+            bool: True si le rendu a réussi, False sinon
+        """
+        try:
+            start_render_time = time.time()
+            logging.info(f"[VIDEO] Rendu de {len(self.images)} segments {'zoomés' if self.zoom_effect else 'fixes'}...")
+            
+            encoder = StillSegmentEncoder(
+                output_size=self.output_size,
+                fps=self.fps,
+                video_codec=self.video_codec,
+                video_bitrate=self.video_bitrate,
+                workers=self.render_workers,
+                zoom_ratio=self.zoom_ratio if self.zoom_effect else None,
+                zoom_frame_budget_ms=self.zoom_frame_budget_ms,
+                transition=self.transition,
+                transition_duration=self.transition_duration,
+                video_preset=self.video_preset,
+                video_crf=self.video_crf,
+                video_tune=self.video_tune,
+                still_tune=self.still_tune,
+                renditions=self.renditions,
+                segment_cache=SegmentCache(os.path.join(self.cache_dir, 'segments'), self.segment_cache_size_mb)
+                if self.segment_cache_size_mb else None,
+                still_fps=self.still_fps,
+                video_bframes=self.video_bframes
+            )
+            segments = [(img_data['source'], img_data['duration']) for img_data in self.images]
+            if not encoder.render(segments, self.output_path, background=self.background_video):
+                logging.error("[VIDEO] Échec du rendu par segments")
+                return False
+            
+            render_time = time.time() - start_render_time
+            logging.info(f"[VIDEO] Rendu terminé en {render_time:.2f} secondes")
+            
+            return self._check_output()
+            
+        except Exception as e:
+            logging.error(f"[VIDEO] Erreur lors du rendu de la vidéo: {str(e)}")
+            traceback.print_exc()
+            return False
+
+    def _encoder_tune(self):
+        """Réglage x264 adapté au contenu : cartes fixes ou vidéo animée"""
+        animated = self.zoom_effect or self.background_video or (len(self.images) > 1 and self._transition_frames())
+        return self.video_tune if animated else self.still_tune
+
+    def _encoder_options(self):
+        """Paramètres d'encodeur communs aux moteurs ffmpeg (pipe, filtergraph)"""
+        return {'video_preset': self.video_preset, 'video_crf': self.video_crf, 'video_tune': self._encoder_tune(),
+                'renditions': self.renditions, 'video_bframes': self.video_bframes}
+
+    def _moviepy_encoder_options(self):
+        """Paramètres d'encodeur pour write_videofile de moviepy"""
+        ffmpeg_params = []
+        bitrate = self.video_bitrate
+        if self.video_crf is not None and self.video_codec in ('libx264', 'libx265'):
+            ffmpeg_params += ['-crf', str(self.video_crf)]
+            bitrate = None
+        tune = self._encoder_tune()
+        if tune and self.video_codec in ('libx264', 'libx265'):
+            ffmpeg_params += ['-tune', tune]
+        if self.video_bframes is not None and self.video_codec in ('libx264', 'libx265'):
+            ffmpeg_params += ['-bf', str(self.video_bframes)]
+        return {'bitrate': bitrate, 'preset': self.video_preset or 'medium', 'ffmpeg_params': ffmpeg_params or None}
+
+    def _render_filtergraph(self):
+        """
+        Rend toute la vidéo (cartes, zoom, transitions, arrière-plan et audio)
+        en une seule exécution de ffmpeg.
+        
+        Returns:
+            bool: True si le rendu a réussi, False sinon
+        """
+        try:
+            start_render_time = time.time()
+            logging.info(f"[VIDEO] Rendu de {len(self.images)} cartes en un seul graphe ffmpeg...")
+            
+            renderer = FiltergraphRenderer(
+                output_size=self.output_size,
+                fps=self.fps,
+                video_codec=self.video_codec,
+                video_bitrate=self.video_bitrate,
+                zoom_ratio=self.zoom_ratio if self.zoom_effect else None,
+                transition=self.transition,
+                transition_duration=self.transition_duration,
+                mp4_layout=self.mp4_layout,
+                **self._encoder_options()
+            )
+            audio = self.audio_track if self.audio_track and os.path.exists(self.audio_track['path']) else None
+            segments = [(img_data['source'], img_data['duration']) for img_data in self.images]
+            if not renderer.render(segments, self.output_path, background=self.background_video, audio=audio):
+                return False
+            
+            self.last_render_has_audio = audio is not None
+            render_time = time.time() - start_render_time
+            logging.info(f"[VIDEO] Rendu terminé en {render_time:.2f} secondes")
+            
+            return self._check_output()
+            
+        except Exception as e:
+            logging.error(f"[VIDEO] Erreur lors du rendu de la vidéo: {str(e)}")
+            traceback.print_exc()
+            return False
+
+    def _background_clip(self, duration):
+        """Clip moviepy de la fenêtre de vidéo d'arrière-plan"""
+        background = VideoFileClip(self.background_video['path'], audio=False)
+        start = self.background_video['start']
+        if self.background_video['loop']:
+            return background.fx(vfx.loop, duration=duration)
+        return background.subclip(start, min(start + duration, background.duration))
+
+    def rendition_paths(self):
+        """
+        Chemins des vidéos produites par le dernier rendu.
+        
+        Returns:
+            dict: {nom du rendu: chemin}, None désignant la vidéo principale (output_path)
+        """
+        paths = {None: self.output_path}
+        for rendition in self.renditions:
+            paths[rendition['name']] = rendition_path(self.output_path, rendition)
+        return paths
+
+    def thumbnail_paths(self, video_path):
+        """
+        Chemins des miniatures d'une vidéo.
+
+        Args:
+            video_path: Chemin de la vidéo finale
+
+        Returns:
+            dict: {nom de la miniature: chemin} ([video]_[nom].jpg)
+        """
+        stem = os.path.splitext(video_path)[0]
+        return {thumbnail['name']: f"{stem}_{thumbnail['name']}.jpg" for thumbnail in self.thumbnails}
+
+    def write_thumbnails(self, video_path):
+        """
+        Écrit les miniatures d'une vidéo (image d'aperçu pour la mise en ligne).
+
+        La carte de titre est déjà en mémoire à la taille de sortie : elle est
+        seulement redimensionnée, la vidéo encodée n'est jamais décodée. Sans
+        carte fixe au début, l'image clé du début de la vidéo est extraite,
+        seule image décodée (voir extract_keyframe).
+
+        Args:
+            video_path: Chemin de la vidéo finale (les miniatures sont écrites à côté)
+
+        Returns:
+            dict: {nom de la miniature: chemin}, vide en cas d'erreur
+        """
+        paths = self.thumbnail_paths(video_path)
+        if not paths:
+            return {}
+        try:
+            card = self.images[0].get('array') if self.images else None
+            if card is not None:
+                poster = Image.fromarray(card)
+                if poster.mode == 'RGBA':
+                    # Carte transparente (arrière-plan vidéo) posée sur la couleur de fond
+                    background = Image.new('RGB', poster.size, self.background_color)
+                    background.paste(poster, mask=poster.getchannel('A'))
+                    poster = background
+            else:
+                keyframe_path = f"{os.path.splitext(video_path)[0]}_keyframe.png"
+                if not extract_keyframe(video_path, keyframe_path):
+                    logging.error(f"[VIDEO] Impossible d'extraire une image de {video_path}")
+                    return {}
+                with Image.open(keyframe_path) as keyframe:
+                    poster = keyframe.convert('RGB')
+                os.remove(keyframe_path)
+
+            for thumbnail in self.thumbnails:
+                size = (thumbnail['width'], thumbnail['height'])
+                image = poster if poster.size == size else poster.resize(size, Image.LANCZOS)
+                image.save(paths[thumbnail['name']], quality=90)
+            logging.info(f"[VIDEO] {len(paths)} miniatures écrites pour {os.path.basename(video_path)}")
+            return paths
+        except Exception as e:
+            logging.error(f"[VIDEO] Erreur lors de l'écriture des miniatures: {str(e)}")
+            return {}
+
+    def expected_duration(self):
+        """Durée exacte de la vidéo rendue : somme des cartes arrondies à l'image près"""
+        return sum(self._frame_count(img_data['duration']) for img_data in self.images) / self.fps
+
+    def _check_output(self):
+        """
+        Vérifie que la vidéo (et chaque rendu supplémentaire) a bien été créée,
+        avec la durée attendue et, si l'audio a été mixé au rendu, synchronisée.
+        """
+        for path in self.rendition_paths().values():
+            if not os.path.exists(path) or os.path.getsize(path) < 1024:
+                logging.error(f"[VIDEO] La vidéo n'a pas été créée correctement ou est vide: {path}")
+                return False
+            if not validate_timing(path, self.expected_duration(), tolerance=1 / self.fps,
+                                   audio=self.last_render_has_audio):
+                logging.error(f"[VIDEO] Durée ou synchronisation incorrecte: {path}")
+                return False
+            
+        logging.info(f"[VIDEO] Vidéo créée avec succès: {self.output_path}")
+        return True
+
+    def _transcode_renditions(self):
+        """
+        Produit les rendus supplémentaires d'une vidéo rendue par moviepy.
+        
+        moviepy n'écrit qu'une sortie : la vidéo principale est décodée une seule
+        fois par ffmpeg, chaque sortie ayant son redimensionnement et son encodeur.
+        
+        Returns:
+            bool: True si tous les rendus ont été produits, False sinon
+        """
+        args = ['-i', self.output_path]
+        options = self._encoder_options()
+        for rendition in self.renditions:
+            args += ['-map', '0:v:0', '-vf', f"scale={rendition['width']}:{rendition['height']}:flags=area,setsar=1",
+                     '-an']
+            args += video_encoder_args(self.video_codec, rendition.get('video_bitrate', self.video_bitrate),
+                                       rendition.get('video_crf', self.video_crf), options['video_preset'],
+                                       options['video_tune'], options['video_bframes'])
+            args.append(rendition_path(self.output_path, rendition))
+        if not run_ffmpeg(args):
+            logging.error("[VIDEO] Échec de l'encodage des rendus supplémentaires")
+            return False
+        return True
+
+    def _render_moviepy(self):
+        """
+        Rend la vidéo en composant tous les clips avec moviepy.
+        
+        Returns:
+            bool: True si le rendu a réussi, False sinon
+        """
         try:
             start_render_time = time.time()
             logging.info(f"[VIDEO] Rendu de {len(self.images)} images...")
             
             # Créer une liste de clips d'images
             image_clips = []
-            for img_data in self.images:
-                img_path = img_data['path']
-                duration = img_data['duration']
-                image_clips.append(img_path.set_duration(duration))
+            transition_frames = self._transition_frames() if len(self.images) > 1 else 0
+            if transition_frames:
+                image_clips = self._transition_clips(transition_frames)
+                final_clip = CompositeVideoClip(image_clips, size=self.output_size)
+            else:
+                for img_data in self.images:
+                    img_path = img_data['path']
+                    duration = img_data['duration']
+                    if self.zoom_effect:
+                        image_clips.append(self._zoom_clip(img_data))
+                    else:
+                        image_clips.append(img_path.set_duration(duration))
+                
+                # Concaténer les clips d'images
+                final_clip = concatenate_videoclips(image_clips, method="compose")
             
-            # Concaténer les clips d'images
-            final_clip = concatenate_videoclips(image_clips, method="compose")
+            # Superposer les cartes sur la vidéo d'arrière-plan
+            background_clip = None
+            if self.background_video:
+                background_clip = self._background_clip(final_clip.duration)
+                final_clip = CompositeVideoClip([background_clip, final_clip], size=self.output_size)
             
             # Sauvegarder la vidéo
             final_clip.write_videofile(
                 self.output_path,
                 fps=self.fps,
                 codec=self.video_codec,
-                bitrate=self.video_bitrate,
+                **self._moviepy_encoder_options(),
                 audio=False,
                 threads=4,
                 logger=None
@@ -370,26 +1009,56 @@ class TikTokVideoMaker:
             
             # Fermer tous les clips
             final_clip.close()
+            if background_clip is not None:
+                background_clip.close()
             for clip in image_clips:
                 clip.close()
             
+            if self.renditions and not self._transcode_renditions():
+                return False
+            
             render_time = time.time() - start_render_time
             logging.info(f"[VIDEO] Rendu terminé en {render_time:.2f} secondes")
             
-            # Vérifier que la vidéo a bien été créée
-            if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) < 1024:
-                logging.error(f"[VIDEO] La vidéo n'a pas été créée correctement ou est vide: {self.output_path}")
-                return False
-                
-            logging.info(f"[VIDEO] Vidéo créée avec succès: {self.output_path}")
-            return True
+            return self._check_output()
             
         except Exception as e:
             logging.error(f"[VIDEO] Erreur lors du rendu de la vidéo: {str(e)}")
             traceback.print_exc()
             return False
 
-    def add_audio_to_video(self, video_path, audio_path, output_path=None):
+    def _transition_clips(self, transition_frames):
+        """
+        Clips moviepy des cartes avec leurs transitions.
+        
+        Chaque carte est prolongée sur les fenêtres de transition qui l'entourent
+        et placée à sa position dans la vidéo ; la carte entrante apparaît en
+        fondu ou glisse depuis la droite par-dessus la carte sortante.
+        """
+        frame_counts = [self._frame_count(img_data['duration']) for img_data in self.images]
+        starts, solos, windows = card_timeline(frame_counts, transition_frames)
+        
+        clips = []
+        for i, img_data in enumerate(self.images):
+            visible_start = windows[i - 1][0] if i > 0 else starts[i]
+            visible_stop = windows[i][1] if i < len(windows) else starts[i] + frame_counts[i]
+            duration = (visible_stop - visible_start) / self.fps
+            
+            if self.zoom_effect:
+                clip = self._zoom_clip(img_data, lead_frames=starts[i] - visible_start, duration=duration)
+            else:
+                clip = img_data['path'].set_duration(duration)
+            
+            if i > 0 and windows[i - 1][1] > windows[i - 1][0]:
+                transition_duration = (windows[i - 1][1] - windows[i - 1][0]) / self.fps
+                if self.transition == 'slide':
+                    clip = transfx.slide_in(clip, transition_duration, 'right')
+                else:
+                    clip = clip.crossfadein(transition_duration)
+            clips.append(clip.set_start(visible_start / self.fps))
+        return clips
+
+    def add_audio_to_video(self, video_path, audio_path, output_path=None, mux_mode=None):
         """
         Ajoute un fichier audio à un fichier vidéo existant.
         
@@ -397,6 +1066,7 @@ class TikTokVideoMaker:
             video_path: Chemin vers le fichier vidéo
             audio_path: Chemin vers le fichier audio
             output_path: Chemin de sortie (si None, utilise le même que video_path)
+            mux_mode: 'copy' ou 'reencode' (si None, utilise self.mux_mode)
             
         Returns:
             bool: True si la combinaison a réussi, False sinon
@@ -413,39 +1083,31 @@ class TikTokVideoMaker:
         if output_path is None:
             output_path = video_path
             
+        if mux_mode is None:
+            mux_mode = self.mux_mode
+            
         # Créer un fichier temporaire pour la sortie
         tmp_output = f"{output_path}.tmp.mp4"
         
         try:
-            logging.info("[VIDEO] Début de l'ajout d'audio")
+            logging.info(f"[VIDEO] Début de l'ajout d'audio (mode={mux_mode})")
             
-            # Charger les fichiers vidéo et audio
-            video_clip = VideoFileClip(video_path)
-            audio_clip = AudioFileClip(audio_path)
+            success = False
+            if mux_mode == 'copy':
+                success = self._mux_stream_copy(video_path, audio_path, tmp_output)
+                if not success:
+                    logging.warning("[VIDEO] Échec de la copie du flux vidéo, ré-encodage avec moviepy")
             
-            # Vérifier si la durée de l'audio est suffisante
-            if audio_clip.duration < video_clip.duration:
-                logging.warning(f"[VIDEO] L'audio ({audio_clip.duration:.2f}s) est plus court que la vidéo ({video_clip.duration:.2f}s)")
+            if not success:
+                self._mux_reencode(video_path, audio_path, tmp_output)
             
-            # Ajouter l'audio à la vidéo
-            video_with_audio = video_clip.set_audio(audio_clip)
-            
-            # Sauvegarder la vidéo avec audio
-            logging.info("[VIDEO] Sauvegarde de la vidéo avec audio...")
-            video_with_audio.write_videofile(
-                tmp_output,
-                codec=self.video_codec,
-                bitrate=self.video_bitrate,
-                audio_codec='aac',
-                audio_bitrate='192k',
-                threads=4,
-                logger=None
-            )
-            
-            # Fermer les clips
-            video_clip.close()
-            audio_clip.close()
-            video_with_audio.close()
+            # Vérifier la durée et la synchronisation audio/vidéo avant de remplacer la sortie
+            if os.path.exists(tmp_output) and not validate_timing(
+                    tmp_output, self.expected_duration() if self.images else None,
+                    tolerance=1 / self.fps, audio=True):
+                logging.error(f"[VIDEO] Durée ou synchronisation audio/vidéo incorrecte: {output_path}")
+                os.remove(tmp_output)
+                return False
             
             # Remplacer le fichier original par le fichier temporaire
             if os.path.exists(tmp_output):
@@ -472,6 +1134,167 @@ class TikTokVideoMaker:
                     
             return False
 
+    def _mux_stream_copy(self, video_path, audio_path, output_path):
+        """
+        Multiplexe l'audio avec la vidéo en copiant le flux H.264 tel quel.
+        Seul l'audio est encodé, les images ne sont jamais décodées.
+        
+        Args:
+            video_path: Chemin vers le fichier vidéo
+            audio_path: Chemin vers le fichier audio
+            output_path: Chemin de sortie
+            
+        Returns:
+            bool: True si le multiplexage a réussi, False sinon
+        """
+        video_infos = probe_media(video_path)
+        audio_infos = probe_media(audio_path)
+        if not video_infos or not video_infos.get('video_found'):
+            logging.error(f"[VIDEO] Aucun flux vidéo trouvé dans {video_path}")
+            return False
+        
+        video_duration = video_infos.get('video_duration') or video_infos.get('duration')
+        audio_duration = audio_infos.get('duration') if audio_infos else None
+        
+        # Vérifier si la durée de l'audio est suffisante
+        if audio_duration and video_duration and audio_duration < video_duration:
+            logging.warning(f"[VIDEO] L'audio ({audio_duration:.2f}s) est plus court que la vidéo ({video_duration:.2f}s)")
+        
+        logging.info("[VIDEO] Sauvegarde de la vidéo avec audio (copie du flux vidéo)...")
+        args = [
+            '-i', video_path,
+            '-i', audio_path,
+            '-map', '0:v:0',
+            '-map', '1:a:0',
+            '-c:v', 'copy',
+            '-c:a', 'aac',
+            '-b:a', '192k',
+        ]
+        # Comme avec moviepy, la durée de la vidéo fait foi
+        if video_duration:
+            args += ['-t', f"{video_duration:.3f}"]
+        args += mp4_layout_args(self.mp4_layout)
+        args.append(output_path)
+        
+        if not run_ffmpeg(args):
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return False
+        return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+    def _mux_reencode(self, video_path, audio_path, output_path):
+        """
+        Ajoute l'audio en ré-encodant toute la vidéo avec moviepy.
+        
+        Args:
+            video_path: Chemin vers le fichier vidéo
+            audio_path: Chemin vers le fichier audio
+            output_path: Chemin de sortie
+        """
+        # Charger les fichiers vidéo et audio
+        video_clip = VideoFileClip(video_path)
+        audio_clip = AudioFileClip(audio_path)
+        
+        # Vérifier si la durée de l'audio est suffisante
+        if audio_clip.duration < video_clip.duration:
+            logging.warning(f"[VIDEO] L'audio ({audio_clip.duration:.2f}s) est plus court que la vidéo ({video_clip.duration:.2f}s)")
+        
+        # Comme pour la copie du flux, la durée de la vidéo fait foi
+        if audio_clip.duration > video_clip.duration:
+            audio_clip = audio_clip.subclip(0, video_clip.duration)
+        
+        # Ajouter l'audio à la vidéo
+        video_with_audio = video_clip.set_audio(audio_clip)
+        
+        # Sauvegarder la vidéo avec audio
+        logging.info("[VIDEO] Sauvegarde de la vidéo avec audio...")
+        options = self._moviepy_encoder_options()
+        options['ffmpeg_params'] = (options['ffmpeg_params'] or []) + mp4_layout_args(self.mp4_layout) or None
+        video_with_audio.write_videofile(
+            output_path,
+            codec=self.video_codec,
+            **options,
+            audio_codec='aac',
+            audio_bitrate='192k',
+            threads=4,
+            logger=None
+        )
+        
+        # Fermer les clips
+        video_clip.close()
+        audio_clip.close()
+        video_with_audio.close()
+
+    def add_bumpers(self, video_path, bumper_library, intro=None, outro=None, rendition=None, master_path=None):
+        """
+        Ajoute l'intro et l'outro à une vidéo finale (avec audio), sans ré-encoder l'image.
+
+        Les bumpers sont pris dans la bibliothèque à l'empreinte de la vidéo
+        (taille, cadence, réglages de l'encodeur, format de l'audio) : ils ne
+        sont encodés qu'au premier usage de cette empreinte, puis joints par
+        copie du flux vidéo.
+
+        Args:
+            video_path: Vidéo finale, remplacée par la vidéo avec bumpers
+            bumper_library: Bibliothèque de bumpers (BumperLibrary)
+            intro: Chemin de l'intro source ou None
+            outro: Chemin de l'outro source ou None
+            rendition: Rendu supplémentaire {'name', 'video_crf'?, 'video_bitrate'?} de la vidéo, None pour la principale
+            master_path: Chemin où conserver la vidéo sans bumpers (None = remplacée)
+
+        Returns:
+            bool: True si les bumpers ont été ajoutés, False sinon (vidéo inchangée)
+        """
+        try:
+            sources = [path for path in (intro, outro) if path and os.path.exists(path)]
+            if not sources:
+                return False
+
+            parameters = stream_parameters(video_path)
+            if not parameters or not parameters.get('video') or not parameters.get('audio'):
+                logging.warning(f"[BUMPER] Vidéo sans image ou sans audio, bumpers non ajoutés: {video_path}")
+                return False
+
+            rendition = rendition or {}
+            fingerprint = BumperLibrary.fingerprint(
+                size=parameters['video']['size'],
+                fps=self.fps,
+                video_codec=self.video_codec,
+                video_bitrate=rendition.get('video_bitrate', self.video_bitrate),
+                video_crf=rendition.get('video_crf', self.video_crf),
+                video_preset=self.video_preset,
+                video_tune=self.video_tune,
+                video_bframes=self.video_bframes,
+                audio_sample_rate=parameters['audio']['sample_rate'],
+                audio_channels=parameters['audio']['channels']
+            )
+            bumpers = {}
+            for path in sources:
+                bumpers[path] = bumper_library.get(path, fingerprint)
+                if not bumpers[path] or not BumperLibrary.can_splice(parameters, stream_parameters(bumpers[path])):
+                    logging.warning(f"[BUMPER] Bumper incompatible avec {video_path}: {path}")
+                    return False
+
+            paths = ([bumpers[intro]] if intro in bumpers else []) + [video_path] + \
+                ([bumpers[outro]] if outro in bumpers else [])
+            tmp_output = f"{os.path.splitext(video_path)[0]}_bumpers_tmp.mp4"
+            if not bumper_library.splice(paths, tmp_output, fps=self.fps,
+                                         audio_sample_rate=parameters['audio']['sample_rate'],
+                                         mp4_layout=self.mp4_layout):
+                if os.path.exists(tmp_output):
+                    os.remove(tmp_output)
+                return False
+
+            if master_path:
+                os.replace(video_path, master_path)
+            os.replace(tmp_output, video_path)
+            logging.info(f"[BUMPER] Bumpers ajoutés sans ré-encodage de l'image: {video_path}")
+            return True
+
+        except Exception as e:
+            logging.error(f"[BUMPER] Erreur lors de l'ajout des bumpers: {str(e)}")
+            return False
+
     def _create_temp_video(self, images, duration_per_image=5.0, loop=False, fps=30, output_path=None):
         """
         Crée une vidéo temporaire à partir d'une liste d'images.
@@ -517,7 +1340,7 @@ class TikTokVideoMaker:
                 output_path,
                 fps=fps,
                 codec=self.video_codec,
-                bitrate=self.video_bitrate,
+                **self._moviepy_encoder_options(),
                 audio=False,
                 logger=None
             )
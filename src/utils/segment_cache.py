@@ -0,0 +1,165 @@
+"""
+Cache des segments encodés par le moteur "segments", partagé entre les rendus.
+
+Chaque segment (carte ou fenêtre de transition) est indexé par le hash de son
+contenu : hash des images, durées, plage d'images, fenêtre d'arrière-plan et
+paramètres d'encodage. Re-rendre un post dont une seule carte a changé ne
+ré-encode que les segments qui la contiennent ; les autres sont relus depuis le
+cache et joints sans ré-encodage avec les nouveaux.
+
+Le dossier est plafonné en taille : les entrées les moins récemment utilisées
+sont supprimées en premier (la date de modification sert de date d'accès).
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+from .ffmpeg_tools import rendition_path
+
+# À incrémenter si le contenu des segments change à paramètres égaux
+CACHE_VERSION = 1
+
+
+class SegmentCache:
+    """Segments vidéo encodés, indexés par le hash de leur contenu (LRU plafonné en taille)"""
+
+    def __init__(self, cache_dir, max_size_mb=2048):
+        """
+        Initialise le cache de segments.
+
+        Args:
+            cache_dir: Dossier de stockage des segments
+            max_size_mb: Taille maximale du dossier en Mo (les entrées les plus
+                         anciennes sont supprimées au-delà)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._image_hashes = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def image_hash(self, image_path):
+        """Hash du contenu d'une image (calculé une fois par chemin, taille et date de modification)"""
+        stat = os.stat(image_path)
+        key = (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._image_hashes.get(key)
+        if digest is None:
+            with open(image_path, 'rb') as f:
+                digest = self._image_hashes[key] = hashlib.sha1(f.read()).hexdigest()
+        return digest
+
+    @staticmethod
+    def make_key(**params):
+        """
+        Clé d'un segment à partir de tout ce qui détermine son contenu.
+
+        Args:
+            **params: Paramètres du segment (sérialisables en JSON)
+
+        Returns:
+            str: Hash hexadécimal des paramètres
+        """
+        payload = json.dumps({'version': CACHE_VERSION, **params}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def entry_path(self, key):
+        """Chemin de la sortie principale d'une entrée (les rendus sont à côté, voir rendition_path)"""
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def lookup(self, key, renditions=()):
+        """
+        Cherche un segment dans le cache.
+
+        Args:
+            key: Clé du segment (voir make_key)
+            renditions: Rendus supplémentaires qui doivent aussi être présents
+
+        Returns:
+            str: Chemin du segment principal en cache, ou None s'il manque
+        """
+        path = self.entry_path(key)
+        paths = [path] + [rendition_path(path, r) for r in renditions]
+        if not all(os.path.exists(p) and os.path.getsize(p) > 0 for p in paths):
+            self.misses += 1
+            return None
+
+        # Date de modification = date du dernier accès pour l'éviction
+        for p in paths:
+            try:
+                os.utime(p)
+            except OSError:
+                pass
+        self.hits += 1
+        return path
+
+    def store(self, key, segment_path, renditions=()):
+        """
+        Déplace un segment fraîchement encodé (et ses rendus) dans le cache.
+
+        Chaque fichier est écrit de manière atomique : un rendu lancé en parallèle
+        ne lit jamais un segment à moitié copié.
+
+        Args:
+            key: Clé du segment (voir make_key)
+            segment_path: Segment principal encodé
+            renditions: Rendus supplémentaires encodés à côté du segment
+
+        Returns:
+            str: Chemin du segment principal en cache, ou None en cas d'erreur
+        """
+        path = self.entry_path(key)
+        try:
+            for source, target in [(segment_path, path)] + [(rendition_path(segment_path, r), rendition_path(path, r))
+                                                            for r in renditions]:
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                shutil.move(source, tmp_path)
+                os.replace(tmp_path, target)
+            return path
+        except OSError as e:
+            logging.warning(f"[CACHE] Impossible d'enregistrer le segment {segment_path}: {e}")
+            return None
+
+    def evict(self, keep=()):
+        """
+        Supprime les entrées les moins récemment utilisées au-delà de la taille maximale.
+
+        Args:
+            keep: Clés à conserver quoi qu'il arrive (segments du rendu en cours)
+
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Rendus supplémentaires nommés <clé>_<rendu>.mp4
+            key = name.split('.', 1)[0].split('_', 1)[0]
+            size, last_used, paths = entries.get(key, (0, 0, []))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime), paths + [path])
+
+        total = sum(size for size, _, _ in entries.values())
+        removed = 0
+        for key, (size, _, paths) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            removed += 1
+
+        if removed:
+            logging.info(f"[CACHE] {removed} segments supprimés du cache ({total / (1024 * 1024):.0f} Mo conservés)")
+        return removed
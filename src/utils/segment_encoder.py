@@ -0,0 +1,551 @@
+"""
+Encodage des cartes fixes (titre, commentaires) directement avec ffmpeg.
+
+Chaque carte est encodée comme une image unique bouclée dans son propre fichier
+segment, puis les segments sont joints avec le démultiplexeur concat de ffmpeg
+sans ré-encodage. Aucune image ne transite par Python pendant l'encodage.
+
+Avec une vidéo d'arrière-plan, la carte (PNG transparent) est superposée à la
+fenêtre correspondante du proxy ; la recherche rapide (-ss avant -i) tombe sur
+une image clé du proxy.
+
+Avec le zoom progressif, les images de chaque segment sont calculées par
+ZoomEffect et envoyées à ffmpeg par un FramePipeWriter (la superposition sur
+l'arrière-plan reste faite par ffmpeg).
+
+Avec des transitions, chaque fenêtre de transition (centrée sur la coupe) est
+encodée comme un court segment à part, calculé par CardCompositor ; les
+segments des cartes ne couvrent que les images hors transition.
+
+Avec des rendus supplémentaires (720p, aperçu...), chaque segment est composé
+une seule fois puis dupliqué et redimensionné par ffmpeg vers un encodeur par
+rendu ; les segments de chaque rendu sont ensuite joints séparément.
+
+Avec une cadence des cartes fixes (still_fps), les segments fixes sans
+arrière-plan ni zoom sont encodés à cadence variable : une image par période
+plus la dernière image, aux instants qu'elles auraient à cadence constante.
+Le segment garde sa durée exacte, mais l'encodeur ne traite plus que quelques
+images par seconde ; les parties animées restent à cadence constante.
+
+Les segments sont indépendants : ils peuvent être encodés en parallèle dans un
+pool de processus. Chaque segment commence par une image clé et contient un
+nombre exact d'images, la jointure tombe donc exactement sur les frontières.
+
+Avec un SegmentCache, les segments déjà encodés lors d'un rendu précédent (même
+contenu, mêmes paramètres) sont relus depuis le cache au lieu d'être ré-encodés.
+"""
+
+import os
+import shutil
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from .ffmpeg_tools import run_ffmpeg, video_encoder_args, rendition_path, rendition_filters
+from .frame_pipe import FramePipeWriter, FramePipeReader
+from .video_effects import ZoomEffect, CardLayer, CardCompositor, card_timeline
+from .segment_cache import SegmentCache
+
+
+class StillSegmentEncoder:
+    """Encode des images fixes en segments vidéo et les concatène"""
+
+    def __init__(self, output_size=(1080, 1920), fps=30, video_codec='libx264', video_bitrate='5000k', workers=1,
+                 zoom_ratio=None, zoom_frame_budget_ms=None, transition='none', transition_duration=0.0,
+                 video_preset='veryfast', video_crf=None, video_tune=None, still_tune='stillimage', renditions=None,
+                 segment_cache=None, still_fps=None, video_bframes=None):
+        """
+        Initialise l'encodeur de segments.
+
+        Args:
+            output_size: Taille de sortie de la vidéo (width, height)
+            fps: Images par seconde
+            video_codec: Codec vidéo
+            video_bitrate: Débit vidéo
+            workers: Nombre de segments encodés en parallèle (0 = nombre de coeurs)
+            zoom_ratio: Facteur de zoom atteint à la fin de chaque segment (None = pas de zoom)
+            zoom_frame_budget_ms: Temps maximal de calcul d'une image zoomée en millisecondes
+            transition: Transition entre les cartes ('none', 'crossfade' ou 'slide')
+            transition_duration: Durée de chaque transition en secondes
+            video_preset: Preset de l'encodeur
+            video_crf: Qualité constante (remplace le débit si définie)
+            video_tune: Réglage de l'encodeur pour un contenu animé (zoom, arrière-plan, transitions)
+            still_tune: Réglage de l'encodeur quand toutes les cartes sont fixes
+            renditions: Rendus supplémentaires [{'name', 'width', 'height', 'video_crf'?,
+                        'video_bitrate'?}] produits à côté de la vidéo finale
+            segment_cache: SegmentCache des segments déjà encodés, ou None
+            still_fps: Cadence effective des segments fixes, encodés à cadence variable
+                       (None = cadence constante fps)
+            video_bframes: Nombre maximal d'images B consécutives (None = réglage de l'encodeur)
+        """
+        self.width, self.height = output_size
+        self.fps = fps
+        self.video_codec = video_codec
+        self.video_bitrate = video_bitrate
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.zoom_ratio = zoom_ratio
+        self.zoom_frame_budget_ms = zoom_frame_budget_ms
+        self.transition = transition
+        self.transition_duration = transition_duration
+        self.video_preset = video_preset
+        self.video_crf = video_crf
+        self.video_tune = video_tune
+        self.still_tune = still_tune
+        self.renditions = list(renditions or [])
+        self.segment_cache = segment_cache
+        self.still_fps = still_fps
+        self.video_bframes = video_bframes
+        # Même réglage pour tous les segments d'une vidéo : la concaténation sans
+        # ré-encodage exige des paramètres de flux identiques
+        self.segment_tune = still_tune
+        self.threads = None
+
+    def frame_count(self, duration):
+        """Nombre d'images d'un segment (arrondi à l'image près)"""
+        return max(1, int(round(duration * self.fps)))
+
+    def transition_frames(self):
+        """Nombre d'images de chaque transition (0 = coupes franches)"""
+        if self.transition not in ('crossfade', 'slide'):
+            return 0
+        return max(0, int(round(self.transition_duration * self.fps)))
+
+    def still_frame_step(self):
+        """Écart en images entre deux images encodées d'un segment fixe (1 = cadence constante)"""
+        if not self.still_fps or self.still_fps >= self.fps:
+            return 1
+        return max(1, int(round(self.fps / self.still_fps)))
+
+    def encoder_args(self, frame_count, still=True, rendition=None):
+        """
+        Paramètres d'encodage du segment.
+
+        Args:
+            frame_count: Nombre d'images du segment
+            still: True si le contenu est fixe (pas de vidéo d'arrière-plan)
+            rendition: Rendu supplémentaire (débit ou qualité propres), None pour la vidéo principale
+
+        Returns:
+            list: Arguments ffmpeg pour l'encodeur vidéo
+        """
+        rendition = rendition or {}
+        args = video_encoder_args(self.video_codec, rendition.get('video_bitrate', self.video_bitrate),
+                                  rendition.get('video_crf', self.video_crf), self.video_preset, self.segment_tune,
+                                  self.video_bframes)
+        return args + self.tuning_args(frame_count, still)
+
+    def tuning_args(self, frame_count, still=True):
+        """Réglages de l'encodeur propres à chaque segment (threads, intervalle d'images clés)"""
+        args = []
+        if self.threads:
+            args += ['-threads', str(self.threads)]
+        if self.video_codec == 'libx264' and still:
+            # Une seule image clé par segment : les images suivantes sont des répétitions
+            args += ['-g', str(frame_count)]
+        return args
+
+    def writer_options(self):
+        """Paramètres d'encodeur des segments produits par un FramePipeWriter"""
+        return {'video_preset': self.video_preset, 'video_crf': self.video_crf, 'video_tune': self.segment_tune,
+                'renditions': self.renditions, 'video_bframes': self.video_bframes}
+
+    def encode_segment(self, image_path, duration, output_path, background=None, frame_range=None):
+        """
+        Encode une image fixe en segment vidéo.
+
+        L'image n'est décodée qu'une fois par seconde de segment ; le filtre fps
+        (ou la superposition sur l'arrière-plan) duplique ces images à la cadence
+        de sortie.
+
+        Args:
+            image_path: Chemin vers l'image
+            duration: Durée du segment en secondes
+            output_path: Chemin du segment encodé
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop'} ou None
+            frame_range: Plage (début, fin) des images de la carte à encoder, toutes
+                         par défaut (le reste est couvert par les transitions)
+
+        Returns:
+            bool: True si l'encodage a réussi, False sinon
+        """
+        if self.zoom_ratio:
+            return self.encode_zoom_segment(image_path, duration, output_path, background, frame_range)
+
+        first, stop = frame_range or (0, self.frame_count(duration))
+        frame_count = stop - first
+        if background:
+            args = ['-stream_loop', '-1'] if background.get('loop') else []
+            args += [
+                '-ss', f"{background['start']:.3f}",
+                '-i', background['path'],
+                '-loop', '1',
+                '-framerate', '1',
+                '-i', image_path,
+            ]
+            filters = [
+                f"[0:v]fps={self.fps},scale={self.width}:{self.height},setsar=1[bg]",
+                f"[1:v]scale={self.width}:{self.height}:flags=lanczos,format=rgba[fg]",
+                f"[bg][fg]overlay=0:0,format=yuv420p[v]",
+            ]
+        else:
+            args = [
+                '-loop', '1',
+                '-framerate', '1',
+                '-i', image_path,
+            ]
+            filters = [f"[0:v]scale={self.width}:{self.height}:flags=lanczos[v]"]
+
+        split_filters, labels = rendition_filters('[v]', self.renditions)
+        filters += split_filters
+        step = 1 if background else self.still_frame_step()
+        if not background:
+            # Rendus redimensionnés à 1 image/s, avant la duplication à la cadence de sortie
+            timing = f"fps={self.fps}"
+            if step > 1:
+                # Cadence variable : une image toutes les `step` images, plus la dernière
+                # (sa durée d'une image termine le segment à l'instant exact)
+                timing += f",trim=end_frame={frame_count},select='not(mod(n,{step}))+eq(n,{frame_count - 1})'"
+            for i, label in enumerate(labels):
+                filters.append(f"{label}{timing},format=yuv420p[o{i}]")
+            labels = [f"[o{i}]" for i in range(len(labels))]
+        args += ['-filter_complex', ';'.join(filters)]
+        for label, (rendition, path) in zip(labels, self.output_paths(output_path)):
+            args += ['-map', label]
+            args += ['-fps_mode', 'passthrough'] if step > 1 else ['-frames:v', str(frame_count)]
+            args.append('-an')
+            args += self.encoder_args(frame_count, still=not background, rendition=rendition)
+            args.append(path)
+
+        if not run_ffmpeg(args):
+            logging.error(f"[VIDEO] Échec de l'encodage du segment: {image_path}")
+            return False
+        return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+    def encode_zoom_segment(self, image_path, duration, output_path, background=None, frame_range=None):
+        """
+        Encode une image avec un zoom progressif.
+
+        Les images sont calculées par ZoomEffect dans le buffer RGBA du pipe
+        ffmpeg ; avec un arrière-plan, ffmpeg superpose la carte zoomée (canal
+        alpha) sur la fenêtre correspondante du proxy.
+
+        Args:
+            image_path: Chemin vers l'image
+            duration: Durée du segment en secondes
+            output_path: Chemin du segment encodé
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop'} ou None
+            frame_range: Plage (début, fin) des images de la carte à encoder
+
+        Returns:
+            bool: True si l'encodage a réussi, False sinon
+        """
+        first, stop = frame_range or (0, self.frame_count(duration))
+        frame_count = stop - first
+        layer = self.load_layer(image_path, duration, opaque=False)
+        writer = FramePipeWriter(
+            output_path,
+            output_size=(self.width, self.height),
+            fps=self.fps,
+            video_codec=self.video_codec,
+            video_bitrate=self.video_bitrate,
+            extra_args=['-frames:v', str(frame_count)] + self.tuning_args(frame_count, still=False),
+            channels=4,
+            background=background,
+            **self.writer_options()
+        )
+        with writer:
+            for i in range(first, stop):
+                layer.effect.render(layer.card, i, writer.buffer)
+                writer.write()
+        layer.effect.check_budget()
+
+        if writer.returncode != 0:
+            logging.error(f"[VIDEO] Échec de l'encodage du segment zoomé: {image_path}")
+            return False
+        return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+    def output_paths(self, output_path):
+        """
+        Sorties d'un segment ou de la vidéo finale : principale puis rendus supplémentaires.
+
+        Args:
+            output_path: Chemin de la sortie principale
+
+        Returns:
+            list: Tuples (rendu ou None pour la sortie principale, chemin)
+        """
+        return [(None, output_path)] + [(r, rendition_path(output_path, r)) for r in self.renditions]
+
+    def load_layer(self, image_path, duration, opaque=True):
+        """
+        Charge une carte à la taille de sortie sous forme de calque.
+
+        Args:
+            image_path: Chemin vers l'image
+            duration: Durée de la carte en secondes (pour la progression du zoom)
+            opaque: Si True, la transparence est aplatie sur du noir (pas d'arrière-plan)
+
+        Returns:
+            CardLayer: Calque de la carte (zoomée si le zoom est activé)
+        """
+        with Image.open(image_path) as img:
+            img = img.convert('RGBA')
+            if img.size != (self.width, self.height):
+                img = img.resize((self.width, self.height), Image.LANCZOS)
+            if opaque:
+                img = Image.alpha_composite(Image.new('RGBA', img.size, (0, 0, 0, 255)), img)
+            card = np.array(img)
+
+        if not self.zoom_ratio:
+            return CardLayer(np.ascontiguousarray(card[:, :, :3]) if opaque else card)
+        effect = ZoomEffect((self.width, self.height), self.frame_count(duration), zoom_end=self.zoom_ratio,
+                            frame_budget_ms=self.zoom_frame_budget_ms)
+        return CardLayer(card, effect)
+
+    def encode_transition(self, outgoing, incoming, frame_count, output_path, background=None):
+        """
+        Encode la transition entre deux cartes.
+
+        Seules les images de la fenêtre de transition sont calculées, par
+        mélange en entiers dans les buffers de CardCompositor.
+
+        Args:
+            outgoing: (chemin de l'image, durée, index de la première image) de la carte sortante
+            incoming: (chemin de l'image, durée, index de la première image) de la carte entrante
+            frame_count: Nombre d'images de la transition
+            output_path: Chemin du segment encodé
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop'} ou None
+
+        Returns:
+            bool: True si l'encodage a réussi, False sinon
+        """
+        outgoing_layer = self.load_layer(outgoing[0], outgoing[1], opaque=not background)
+        incoming_layer = self.load_layer(incoming[0], incoming[1], opaque=not background)
+        compositor = CardCompositor((self.width, self.height), self.transition)
+        writer = FramePipeWriter(
+            output_path,
+            output_size=(self.width, self.height),
+            fps=self.fps,
+            video_codec=self.video_codec,
+            video_bitrate=self.video_bitrate,
+            extra_args=['-frames:v', str(frame_count)] + self.tuning_args(frame_count, still=False),
+            **self.writer_options()
+        )
+        background_reader = None
+        if background:
+            background_reader = FramePipeReader(background['path'], output_size=(self.width, self.height),
+                                                fps=self.fps, start=background['start'],
+                                                loop=background.get('loop', False)).open()
+        try:
+            with writer:
+                for step in range(frame_count):
+                    frame = background_reader.read() if background_reader is not None else None
+                    compositor.transition_frame(outgoing_layer, incoming_layer, outgoing[2] + step,
+                                                incoming[2] + step, step, frame_count, writer.buffer, frame)
+                    writer.write()
+        finally:
+            if background_reader is not None:
+                background_reader.close()
+
+        if writer.returncode != 0:
+            logging.error(f"[VIDEO] Échec de l'encodage de la transition: {outgoing[0]} -> {incoming[0]}")
+            return False
+        return os.path.exists(output_path) and os.path.getsize(output_path) > 0
+
+    def concat_segments(self, segment_paths, output_path):
+        """
+        Joint des segments encodés avec les mêmes paramètres, sans ré-encodage.
+
+        Args:
+            segment_paths: Liste des chemins des segments, dans l'ordre
+            output_path: Chemin de la vidéo finale
+
+        Returns:
+            bool: True si la concaténation a réussi, False sinon
+        """
+        list_path = f"{output_path}.concat.txt"
+        try:
+            with open(list_path, 'w', encoding='utf-8') as f:
+                for path in segment_paths:
+                    escaped = os.path.abspath(path).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            return run_ffmpeg([
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', list_path,
+                '-c', 'copy',
+                output_path
+            ])
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+
+    def _encode_all(self, jobs):
+        """
+        Encode tous les segments, en parallèle si plusieurs workers sont configurés.
+
+        Args:
+            jobs: Liste de tuples (méthode d'encodage, arguments)
+
+        Returns:
+            bool: True si tous les segments ont été encodés, False sinon
+        """
+        workers = min(self.workers, len(jobs))
+        if workers <= 1:
+            return all(method(*args) for method, args in jobs)
+
+        # Répartir les coeurs entre les ffmpeg lancés en parallèle
+        self.threads = max(1, (os.cpu_count() or 1) // workers)
+        logging.info(f"[VIDEO] Encodage de {len(jobs)} segments avec {workers} processus")
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(method, *args) for method, args in jobs]
+                results = [future.result() for future in futures]
+        finally:
+            self.threads = None
+        return all(results)
+
+    def segment_key(self, cards, frame_count, background=None):
+        """
+        Clé de cache d'un segment : tout ce qui détermine les images encodées.
+
+        Args:
+            cards: Cartes du segment [(chemin de l'image, durée, index de la première image)],
+                   deux cartes pour une transition
+            frame_count: Nombre d'images du segment
+            background: Fenêtre d'arrière-plan du segment ou None
+
+        Returns:
+            str: Clé du segment
+        """
+        return SegmentCache.make_key(
+            cards=[(self.segment_cache.image_hash(path), self.frame_count(duration), first)
+                   for path, duration, first in cards],
+            frame_count=frame_count,
+            transition=self.transition if len(cards) > 1 else None,
+            zoom_ratio=self.zoom_ratio,
+            still_fps=self.still_frame_step() if len(cards) == 1 and not (background or self.zoom_ratio) else None,
+            background=background and (background['path'], f"{background['start']:.3f}", background.get('loop', False)),
+            size=(self.width, self.height),
+            fps=self.fps,
+            encoder=(self.video_codec, self.video_bitrate, self.video_crf, self.video_preset, self.segment_tune,
+                     self.video_bframes),
+            renditions=self.renditions,
+        )
+
+    def _schedule(self, cards, frame_count, background, segment_path, job, segment_paths, jobs, pending):
+        """
+        Ajoute un segment à la vidéo : relu depuis le cache s'il existe, sinon encodé.
+
+        Args:
+            cards: Cartes du segment (voir segment_key)
+            frame_count: Nombre d'images du segment
+            background: Fenêtre d'arrière-plan du segment ou None
+            segment_path: Chemin du segment à encoder
+            job: Tuple (méthode d'encodage, arguments) qui encode segment_path
+            segment_paths: Segments de la vidéo, dans l'ordre (complété)
+            jobs: Segments à encoder (complété)
+            pending: Segments à enregistrer dans le cache après l'encodage [(index, clé)] (complété)
+        """
+        if self.segment_cache is None:
+            segment_paths.append(segment_path)
+            jobs.append(job)
+            return
+
+        key = self.segment_key(cards, frame_count, background)
+        cached_path = self.segment_cache.lookup(key, self.renditions)
+        if cached_path:
+            segment_paths.append(cached_path)
+            return
+        pending.append((len(segment_paths), key))
+        segment_paths.append(segment_path)
+        jobs.append(job)
+
+    @staticmethod
+    def _segment_background(background, offset):
+        """Fenêtre d'arrière-plan d'un segment commençant à `offset` secondes"""
+        if not background:
+            return None
+        start = background['start'] + offset
+        if background.get('loop') and background.get('source_duration'):
+            start %= background['source_duration']
+        return {'path': background['path'], 'start': start, 'loop': background.get('loop', False)}
+
+    def render(self, segments, output_path, background=None):
+        """
+        Encode une suite de cartes (fixes ou zoomées) et produit la vidéo finale.
+
+        Args:
+            segments: Liste de tuples (chemin de l'image, durée en secondes)
+            output_path: Chemin de la vidéo finale
+            background: Fenêtre de vidéo d'arrière-plan {'path', 'start', 'loop',
+                        'source_duration'} couvrant toute la vidéo, ou None
+
+        Returns:
+            bool: True si le rendu a réussi, False sinon
+        """
+        work_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)),
+                                f".segments_{os.path.splitext(os.path.basename(output_path))[0]}")
+        os.makedirs(work_dir, exist_ok=True)
+
+        try:
+            frame_counts = [self.frame_count(duration) for _, duration in segments]
+            starts, solos, windows = card_timeline(frame_counts, self.transition_frames())
+            animated = bool(self.zoom_ratio or background or self.transition_frames())
+            self.segment_tune = self.video_tune if animated else self.still_tune
+
+            segment_paths = []
+            jobs = []
+            pending = []
+            for i, (image_path, duration) in enumerate(segments):
+                solo_start, solo_stop = solos[i]
+                if solo_stop > solo_start:
+                    segment_path = os.path.join(work_dir, f"segment_{len(segment_paths):03d}.mp4")
+                    segment_background = self._segment_background(background, solo_start / self.fps)
+                    frame_range = (solo_start - starts[i], solo_stop - starts[i])
+                    self._schedule(
+                        [(image_path, duration, frame_range[0])], solo_stop - solo_start, segment_background,
+                        segment_path,
+                        (self.encode_segment, (image_path, duration, segment_path, segment_background, frame_range)),
+                        segment_paths, jobs, pending
+                    )
+
+                if i < len(windows) and windows[i][1] > windows[i][0]:
+                    window_start, window_stop = windows[i]
+                    next_path, next_duration = segments[i + 1]
+                    segment_path = os.path.join(work_dir, f"segment_{len(segment_paths):03d}.mp4")
+                    segment_background = self._segment_background(background, window_start / self.fps)
+                    outgoing = (image_path, duration, window_start - starts[i])
+                    incoming = (next_path, next_duration, window_start - starts[i + 1])
+                    self._schedule(
+                        [outgoing, incoming], window_stop - window_start, segment_background, segment_path,
+                        (self.encode_transition, (outgoing, incoming, window_stop - window_start, segment_path,
+                                                  segment_background)),
+                        segment_paths, jobs, pending
+                    )
+
+            if self.segment_cache is not None:
+                logging.info(f"[VIDEO] Cache de segments: {len(segment_paths) - len(jobs)} réutilisés, "
+                             f"{len(jobs)} à encoder")
+
+            if jobs and not self._encode_all(jobs):
+                return False
+
+            # Segments neufs déplacés dans le cache, puis joints avec les segments relus
+            for index, key in pending:
+                segment_paths[index] = self.segment_cache.store(key, segment_paths[index],
+                                                                self.renditions) or segment_paths[index]
+
+            # Chaque rendu est joint à partir de ses propres segments
+            success = all(
+                self.concat_segments([rendition_path(p, rendition) if rendition else p for p in segment_paths], path)
+                for rendition, path in self.output_paths(output_path)
+            )
+            if self.segment_cache is not None:
+                self.segment_cache.evict(keep={os.path.splitext(os.path.basename(p))[0] for p in segment_paths})
+            return success
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,193 @@
+"""
+Moteurs de synthèse vocale (TTS) interchangeables.
+
+- "gtts" : service Google Translate (réseau, MP3), le moteur historique
+- "espeak" : espeak-ng lancé localement (WAV), sans réseau ni limite de débit
+- "piper" : voix neuronale piper lancée localement avec un modèle .onnx (WAV)
+- "tone" : bips déterministes calculés à partir du texte (WAV), pour les tests
+  et les benchmarks hors ligne
+
+Le moteur est choisi par AUDIO_CONFIG["tts_backend"] ; ses réglages sont dans
+AUDIO_CONFIG["tts_backend_options"][nom du moteur] (voir default_tts_backend).
+"""
+
+import os
+import abc
+import zlib
+import subprocess
+
+import numpy as np
+import soundfile as sf
+from gtts import gTTS
+
+from config import AUDIO_CONFIG
+
+
+class TTSBackend(abc.ABC):
+    """Interface d'un moteur de synthèse vocale (synthesize doit être implémentée)"""
+
+    name = None
+    extension = '.wav'  # Format des fichiers écrits
+    remote = False  # True si chaque synthèse est une requête réseau (soumise au limiteur de débit)
+
+    def cache_id(self):
+        """Identifiant du moteur et des réglages qui changent la voix produite (clé du cache des voix)"""
+        return self.name
+
+    @abc.abstractmethod
+    def synthesize(self, text, output_path, language='en', tld='com', slow=False):
+        """
+        Synthétise un texte dans un fichier audio.
+
+        Args:
+            text: Texte à lire
+            output_path: Chemin du fichier écrit (au format de self.extension)
+            language: Langue de la voix
+            tld: Domaine Google (accent), ignoré par les moteurs locaux
+            slow: Lecture ralentie
+
+        Raises:
+            RuntimeError: Si la synthèse a échoué
+        """
+
+
+class GTTSBackend(TTSBackend):
+    """Service Google Translate (gTTS)"""
+
+    name = 'gtts'
+    extension = '.mp3'
+    remote = True
+
+    def synthesize(self, text, output_path, language='en', tld='com', slow=False):
+        tts = gTTS(text=text, lang=language, tld=tld, slow=slow)
+        tts.save(output_path)
+
+
+def _run_engine(cmd, text, name):
+    """Lance un moteur local avec le texte sur l'entrée standard"""
+    try:
+        result = subprocess.run(cmd, input=text.encode('utf-8'), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise RuntimeError(f"{name} introuvable ({cmd[0]}): {e}")
+    if result.returncode != 0:
+        error = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"{name} a échoué ({result.returncode}): {error[-500:]}")
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (ou espeak) lancé localement"""
+
+    name = 'espeak'
+
+    def __init__(self, binary='espeak-ng', voice=None, words_per_minute=175):
+        """
+        Args:
+            binary: Exécutable espeak-ng ou espeak
+            voice: Voix espeak (ex: 'en-us', 'fr+f3'), la langue du générateur si None
+            words_per_minute: Débit de lecture (réduit d'un tiers en lecture ralentie)
+        """
+        self.binary = binary
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+
+    def cache_id(self):
+        return f"{self.name}:{self.voice}:{self.words_per_minute}"
+
+    def synthesize(self, text, output_path, language='en', tld='com', slow=False):
+        speed = int(self.words_per_minute * (2 / 3 if slow else 1))
+        # -b 1 : texte UTF-8 lu sur l'entrée standard
+        _run_engine([self.binary, '-b', '1', '-v', self.voice or language, '-s', str(speed),
+                     '-w', output_path, '--stdin'], text, self.name)
+
+
+class PiperBackend(TTSBackend):
+    """Voix neuronale piper lancée localement"""
+
+    name = 'piper'
+
+    def __init__(self, binary='piper', model=None, length_scale=1.0):
+        """
+        Args:
+            binary: Exécutable piper
+            model: Chemin du modèle de voix (.onnx), qui fixe la langue
+            length_scale: Durée relative des phonèmes (augmentée de moitié en lecture ralentie)
+        """
+        if not model:
+            raise ValueError("Le moteur piper nécessite un modèle de voix (tts_backend_options['piper']['model'])")
+        self.binary = binary
+        self.model = model
+        self.length_scale = length_scale
+
+    def cache_id(self):
+        return f"{self.name}:{os.path.basename(self.model)}:{self.length_scale}"
+
+    def synthesize(self, text, output_path, language='en', tld='com', slow=False):
+        length_scale = self.length_scale * (1.5 if slow else 1)
+        _run_engine([self.binary, '--model', self.model, '--length_scale', str(length_scale),
+                     '--output_file', output_path], text, self.name)
+
+
+class ToneBackend(TTSBackend):
+    """Bips déterministes : un bip par mot, de hauteur et de durée dérivées du mot"""
+
+    name = 'tone'
+
+    def __init__(self, sample_rate=24000, chars_per_second=15):
+        """
+        Args:
+            sample_rate: Fréquence d'échantillonnage du fichier écrit
+            chars_per_second: Débit de lecture simulé (durée d'un bip = longueur du mot / débit)
+        """
+        self.sample_rate = sample_rate
+        self.chars_per_second = chars_per_second
+
+    def cache_id(self):
+        return f"{self.name}:{self.sample_rate}:{self.chars_per_second}"
+
+    def synthesize(self, text, output_path, language='en', tld='com', slow=False):
+        rate = self.chars_per_second * (2 / 3 if slow else 1)
+        gap = np.zeros(int(0.06 * self.sample_rate), dtype=np.float32)
+        chunks = []
+        for word in text.split():
+            # Hauteur entre 180 et 400 Hz, fixée par le mot : même texte, même fichier
+            frequency = 180 + zlib.crc32(word.encode('utf-8')) % 220
+            t = np.arange(int(len(word) / rate * self.sample_rate)) / self.sample_rate
+            chunks += [(0.2 * np.sin(2 * np.pi * frequency * t)).astype(np.float32), gap]
+        sf.write(output_path, np.concatenate(chunks or [gap]), self.sample_rate, format='WAV', subtype='PCM_16')
+
+
+# Moteurs disponibles pour AUDIO_CONFIG["tts_backend"]
+TTS_BACKENDS = {
+    'gtts': GTTSBackend,
+    'espeak': EspeakBackend,
+    'piper': PiperBackend,
+    'tone': ToneBackend,
+}
+
+
+def create_tts_backend(name='gtts', **options):
+    """
+    Crée un moteur de synthèse vocale.
+
+    Args:
+        name: Nom du moteur (gtts, espeak, piper, tone)
+        **options: Réglages du moteur (voir le constructeur de chaque moteur)
+
+    Returns:
+        TTSBackend: Moteur configuré
+    """
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Moteur TTS inconnu: {name} (disponibles: {', '.join(TTS_BACKENDS)})")
+    return TTS_BACKENDS[name](**options)
+
+
+def default_tts_backend():
+    """
+    Crée le moteur choisi dans AUDIO_CONFIG["tts_backend"], avec ses réglages de
+    AUDIO_CONFIG["tts_backend_options"].
+
+    Returns:
+        TTSBackend: Moteur configuré
+    """
+    name = AUDIO_CONFIG.get('tts_backend', 'gtts')
+    return create_tts_backend(name, **AUDIO_CONFIG.get('tts_backend_options', {}).get(name, {}))
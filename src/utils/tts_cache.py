@@ -0,0 +1,190 @@
+"""
+Cache des voix de synthèse (TTS), partagé entre les rendus.
+
+Chaque fichier audio est indexé par le hash de tout ce qui détermine son
+contenu : texte, langue, domaine (tld), vitesse et moteur de synthèse. Un
+re-rendu, un aperçu ou un autre format d'export du même post relit donc ses
+voix depuis le cache au lieu de les synthétiser à nouveau. Les fichiers en
+cache sont liés (lien physique) dans le dossier audio du post, sans copie.
+
+Le dossier est plafonné en taille : les entrées les moins récemment utilisées
+sont supprimées en premier (la date de modification sert de date d'accès).
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+
+# À incrémenter si le contenu des voix change à paramètres égaux
+CACHE_VERSION = 1
+
+
+class TTSCache:
+    """Voix de synthèse indexées par le hash de leur texte et de leurs réglages (LRU plafonné en taille)"""
+
+    def __init__(self, cache_dir, max_size_mb=256):
+        """
+        Initialise le cache des voix.
+
+        Args:
+            cache_dir: Dossier de stockage des voix
+            max_size_mb: Taille maximale du dossier en Mo (les entrées les plus
+                         anciennes sont supprimées au-delà)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, language, tld, slow, backend='gtts'):
+        """
+        Clé d'une voix à partir de tout ce qui détermine son contenu.
+
+        Args:
+            text: Texte synthétisé
+            language: Langue de la voix
+            tld: Domaine Google utilisé (accent)
+            slow: Lecture ralentie
+            backend: Moteur de synthèse et ses réglages (voir TTSBackend.cache_id)
+
+        Returns:
+            str: Hash hexadécimal des paramètres
+        """
+        payload = json.dumps({'version': CACHE_VERSION, 'text': text, 'language': language, 'tld': tld,
+                              'slow': bool(slow), 'backend': backend}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def entry_path(self, key, ext='.mp3'):
+        """Chemin du fichier audio d'une entrée"""
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def tmp_path(self, key, ext='.mp3'):
+        """Chemin temporaire propre au processus et au thread, à publier avec store"""
+        return os.path.join(self.cache_dir, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp{ext}")
+
+    def lookup(self, key, ext='.mp3'):
+        """
+        Cherche une voix dans le cache.
+
+        Args:
+            key: Clé de la voix (voir make_key)
+            ext: Extension du fichier audio
+
+        Returns:
+            str: Chemin de la voix en cache, ou None si elle manque
+        """
+        path = self.entry_path(key, ext)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Date de modification = date du dernier accès pour l'éviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def store(self, key, tmp_path, ext='.mp3'):
+        """
+        Publie une voix fraîchement synthétisée dans le cache.
+
+        Le fichier est renommé de manière atomique : un rendu lancé en parallèle
+        ne lit jamais une voix à moitié écrite.
+
+        Args:
+            key: Clé de la voix (voir make_key)
+            tmp_path: Fichier synthétisé (voir tmp_path, même dossier que le cache)
+            ext: Extension du fichier audio
+
+        Returns:
+            str: Chemin de la voix en cache, ou None en cas d'erreur
+        """
+        path = self.entry_path(key, ext)
+        try:
+            os.replace(tmp_path, path)
+            return path
+        except OSError as e:
+            logging.warning(f"[TTS] Impossible d'enregistrer la voix {tmp_path} dans le cache: {e}")
+            return None
+
+    @staticmethod
+    def link(path, output_path):
+        """
+        Place une voix du cache à un autre chemin par lien physique (copie si
+        le système de fichiers ne le permet pas).
+
+        Args:
+            path: Voix en cache
+            output_path: Chemin de destination (remplacé s'il existe)
+
+        Returns:
+            bool: True si la voix a été placée, False sinon
+        """
+        tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Déjà lié (re-rendu du même post) : un renommage sur le même fichier ne ferait rien
+            if os.path.exists(output_path) and os.path.samefile(path, output_path):
+                return True
+            try:
+                os.link(path, tmp_path)
+            except OSError:
+                shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, output_path)
+            return True
+        except OSError as e:
+            logging.error(f"[TTS] Impossible de placer la voix {path} vers {output_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def evict(self, keep=()):
+        """
+        Supprime les entrées les moins récemment utilisées au-delà de la taille maximale.
+
+        Les voix déjà liées dans le dossier d'un post y restent : seule l'entrée du
+        cache disparaît.
+
+        Args:
+            keep: Clés à conserver quoi qu'il arrive (voix du rendu en cours)
+
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if '.tmp' in name:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name.split('.', 1)[0], path))
+
+        total = sum(size for _, size, _, _ in entries)
+        removed = 0
+        for _, size, key, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        if removed:
+            logging.info(f"[TTS] {removed} voix supprimées du cache ({total / (1024 * 1024):.0f} Mo conservés)")
+        return removed
@@ -0,0 +1,334 @@
+"""
+Effets image par image pour les cartes (zoom progressif, transitions).
+
+Tous les paramètres géométriques ou de mélange d'un segment sont calculés une
+seule fois à l'initialisation ; chaque image n'est ensuite qu'une opération
+NumPy vectorisée (rééchantillonnage, mélange en entiers) écrite dans un buffer
+réutilisé.
+
+Les transitions sont centrées sur la coupe entre deux cartes : la durée totale
+de la vidéo ne change pas, et seules les images de la fenêtre de transition
+sont calculées.
+"""
+
+import time
+import logging
+
+import numpy as np
+
+
+class ZoomEffect:
+    """
+    Zoom progressif (effet Ken Burns) sur une image fixe.
+
+    Les rectangles de recadrage de toutes les images du segment sont
+    précalculés sous forme d'indices de lignes et de colonnes. Une image est
+    produite par un rééchantillonnage séparable au plus proche voisin : les
+    pixels RGBA sont vus comme des entiers 32 bits, chaque image se résume donc
+    à deux np.take dans des buffers alloués une fois.
+    """
+
+    def __init__(self, output_size, frame_count, zoom_start=1.0, zoom_end=1.08, center=(0.5, 0.5),
+                 frame_budget_ms=None):
+        """
+        Initialise l'effet de zoom.
+
+        Args:
+            output_size: Taille des images (width, height)
+            frame_count: Nombre d'images du segment
+            zoom_start: Facteur de zoom de la première image
+            zoom_end: Facteur de zoom de la dernière image
+            center: Point fixe du zoom, en fraction de la largeur et de la hauteur
+            frame_budget_ms: Temps maximal par image en millisecondes (None = pas de contrôle)
+        """
+        self.width, self.height = output_size
+        self.frame_count = max(1, frame_count)
+        self.frame_budget_ms = frame_budget_ms
+
+        # Rectangles de recadrage (x, y, largeur, hauteur) de chaque image
+        progress = np.linspace(0.0, 1.0, self.frame_count) if self.frame_count > 1 else np.zeros(1)
+        zooms = zoom_start + (zoom_end - zoom_start) * progress
+        crop_w = self.width / zooms
+        crop_h = self.height / zooms
+        crop_x = (self.width - crop_w) * center[0]
+        crop_y = (self.height - crop_h) * center[1]
+        self.crop_rects = np.stack([crop_x, crop_y, crop_w, crop_h], axis=1)
+
+        # Indices source des lignes et colonnes de chaque image (centres des pixels)
+        rows = (np.arange(self.height) + 0.5) / self.height
+        cols = (np.arange(self.width) + 0.5) / self.width
+        self.row_index = np.clip((crop_y[:, None] + rows[None, :] * crop_h[:, None]).astype(np.intp),
+                                 0, self.height - 1)
+        self.col_index = np.clip((crop_x[:, None] + cols[None, :] * crop_w[:, None]).astype(np.intp),
+                                 0, self.width - 1)
+
+        self._rows_buffer = np.empty((self.height, self.width), dtype=np.uint32)
+        self.frames_rendered = 0
+        self.total_time = 0.0
+
+    @staticmethod
+    def prepare(image):
+        """
+        Convertit une image en tableau RGBA contigu utilisable par render().
+
+        Args:
+            image: Image (height, width, 3 ou 4) uint8
+
+        Returns:
+            numpy.ndarray: Image (height, width, 4) uint8, opaque si l'image était RGB
+        """
+        if image.shape[2] == 4:
+            return np.ascontiguousarray(image, dtype=np.uint8)
+        rgba = np.empty(image.shape[:2] + (4,), dtype=np.uint8)
+        rgba[:, :, :3] = image
+        rgba[:, :, 3] = 255
+        return rgba
+
+    def render(self, source, index, out):
+        """
+        Calcule l'image `index` du zoom dans `out`.
+
+        Args:
+            source: Image RGBA (height, width, 4) uint8 contiguë, à la taille de sortie
+            index: Numéro de l'image dans le segment
+            out: Buffer de sortie RGBA (height, width, 4) uint8 contigu
+
+        Returns:
+            numpy.ndarray: Le buffer de sortie
+        """
+        start = time.process_time()
+        index = min(max(index, 0), self.frame_count - 1)
+        np.take(source.view(np.uint32)[:, :, 0], self.row_index[index], axis=0, out=self._rows_buffer)
+        np.take(self._rows_buffer, self.col_index[index], axis=1, out=out.view(np.uint32)[:, :, 0])
+        self.total_time += time.process_time() - start
+        self.frames_rendered += 1
+        return out
+
+    @property
+    def average_frame_ms(self):
+        """
+        Temps CPU moyen de calcul d'une image en millisecondes.
+
+        Le temps CPU du processus est mesuré (et non le temps écoulé) pour ne
+        pas compter l'encodeur ffmpeg qui tourne en parallèle.
+        """
+        return self.total_time * 1000 / self.frames_rendered if self.frames_rendered else 0.0
+
+    def check_budget(self):
+        """
+        Vérifie que le temps moyen par image respecte le budget.
+
+        Returns:
+            bool: True si le budget est respecté (ou non défini), False sinon
+        """
+        if self.frame_budget_ms is None or not self.frames_rendered:
+            return True
+        if self.average_frame_ms > self.frame_budget_ms:
+            logging.warning(f"[VIDEO] Zoom: {self.average_frame_ms:.2f} ms/image, "
+                            f"budget de {self.frame_budget_ms:.2f} ms dépassé")
+            return False
+        return True
+
+
+TRANSITIONS = ('none', 'crossfade', 'slide')
+
+
+def card_timeline(frame_counts, transition_frames=0):
+    """
+    Calcule la position des cartes et des fenêtres de transition.
+
+    Chaque fenêtre est centrée sur la coupe entre deux cartes et ne déborde pas
+    sur les autres fenêtres : elle est limitée par la plus courte des deux cartes.
+
+    Args:
+        frame_counts: Nombre d'images de chaque carte
+        transition_frames: Nombre d'images de chaque transition (0 = coupes franches)
+
+    Returns:
+        tuple: (première image de chaque carte, plage (début, fin) affichée seule de
+                chaque carte, fenêtre (début, fin) de chaque transition)
+    """
+    starts = []
+    position = 0
+    for count in frame_counts:
+        starts.append(position)
+        position += count
+
+    windows = []
+    for i in range(len(frame_counts) - 1):
+        length = max(0, min(transition_frames, frame_counts[i], frame_counts[i + 1]))
+        cut = starts[i + 1]
+        windows.append((cut - length // 2, cut - length // 2 + length))
+
+    solos = []
+    for i, count in enumerate(frame_counts):
+        solo_start = windows[i - 1][1] if i > 0 else starts[i]
+        solo_stop = windows[i][0] if i < len(windows) else starts[i] + count
+        solos.append((solo_start, max(solo_start, solo_stop)))
+    return starts, solos, windows
+
+
+class CardLayer:
+    """
+    Calque d'une carte : image fixe, ou image zoomée recalculée à chaque index.
+    """
+
+    def __init__(self, card, effect=None):
+        """
+        Args:
+            card: Image de la carte (RGB ou RGBA) à la taille de sortie ;
+                  RGBA contiguë (ZoomEffect.prepare) si un effet est utilisé
+            effect: ZoomEffect appliqué à la carte, ou None pour une carte fixe
+        """
+        self.card = card
+        self.effect = effect
+        self.buffer = np.empty_like(card) if effect is not None else None
+        self.premultiplied = None
+
+    @property
+    def static(self):
+        """True si la carte ne change pas d'une image à l'autre"""
+        return self.effect is None
+
+    def frame(self, index):
+        """Renvoie l'image `index` de la carte (le buffer du calque si elle est zoomée)"""
+        if self.effect is None:
+            return self.card
+        return self.effect.render(self.card, index, self.buffer)
+
+
+class CardCompositor:
+    """
+    Compose les images des cartes et des transitions dans un buffer de sortie.
+
+    Sans arrière-plan, les calques sont supposés opaques et simplement copiés.
+    Avec une image d'arrière-plan, le mélange alpha est fait en entiers ; la
+    carte prémultipliée d'un calque fixe n'est calculée qu'une fois.
+    """
+
+    def __init__(self, output_size, transition='crossfade'):
+        """
+        Args:
+            output_size: Taille des images (width, height)
+            transition: Type de transition ('crossfade' ou 'slide')
+        """
+        self.width, self.height = output_size
+        self.transition = transition
+
+        self._alpha = np.empty((self.height, self.width, 1), dtype=np.uint16)
+        self._inverse_alpha = np.empty_like(self._alpha)
+        self._blend = np.empty((self.height, self.width, 3), dtype=np.uint16)
+        self._layer = np.empty_like(self._blend)
+        self._crossfade_buffers = {}
+
+    def _crossfade(self, channels):
+        """Buffers contigus du fondu enchaîné pour des images à `channels` canaux"""
+        if channels not in self._crossfade_buffers:
+            shape = (self.height, self.width, channels)
+            self._crossfade_buffers[channels] = (
+                np.empty(shape, dtype=np.uint8), np.empty(shape, dtype=np.uint8),
+                np.empty(shape, dtype=np.uint16), np.empty(shape, dtype=np.uint16)
+            )
+        return self._crossfade_buffers[channels]
+
+    def card_frame(self, layer, index, out, background=None):
+        """
+        Écrit l'image `index` d'une carte dans `out`.
+
+        Args:
+            layer: CardLayer de la carte
+            index: Index de l'image dans la carte
+            out: Buffer de sortie (height, width, 3 ou 4) uint8
+            background: Image d'arrière-plan RGB, ou None
+        """
+        if background is None and not layer.static and out.shape[2] == 4 and out.flags.c_contiguous:
+            # Image zoomée calculée directement dans le buffer de sortie
+            return layer.effect.render(layer.card, index, out)
+
+        frame = layer.frame(index)
+        if background is None:
+            channels = min(out.shape[2], frame.shape[2])
+            np.copyto(out[:, :, :channels], frame[:, :, :channels])
+            return out
+
+        if layer.static and frame.shape[2] == 4:
+            if layer.premultiplied is None:
+                alpha = frame[:, :, 3:4].astype(np.uint16)
+                layer.premultiplied = (frame[:, :, :3] * alpha + 127, 255 - alpha)
+            foreground, inverse_alpha = layer.premultiplied
+            blend = self._blend
+            np.multiply(background, inverse_alpha, out=blend)
+            blend += foreground
+            blend //= 255
+            np.copyto(out[:, :, :3], blend, casting='unsafe')
+            return out
+
+        return self.composite(frame, background, out)
+
+    def composite(self, layer, background, out):
+        """
+        Superpose un calque (RGB ou RGBA) sur un arrière-plan de même taille.
+
+        Les tailles peuvent être inférieures à la taille de sortie (bande d'une
+        transition) : les buffers de travail sont alors utilisés en partie.
+        """
+        if layer.shape[2] == 3:
+            np.copyto(out[:, :, :3], layer)
+            return out
+
+        height, width = layer.shape[:2]
+        alpha = self._alpha[:height, :width]
+        inverse_alpha = self._inverse_alpha[:height, :width]
+        blend = self._blend[:height, :width]
+        scratch = self._layer[:height, :width]
+        np.copyto(alpha, layer[:, :, 3:4])
+        np.subtract(255, alpha, out=inverse_alpha)
+        np.multiply(layer[:, :, :3], alpha, out=blend)
+        np.multiply(background, inverse_alpha, out=scratch)
+        blend += scratch
+        blend += 127
+        blend //= 255
+        np.copyto(out[:, :, :3], blend, casting='unsafe')
+        return out
+
+    def transition_frame(self, outgoing, incoming, outgoing_index, incoming_index, step, length, out,
+                         background=None):
+        """
+        Écrit une image de la transition entre deux cartes dans `out`.
+
+        Args:
+            outgoing: CardLayer de la carte sortante
+            incoming: CardLayer de la carte entrante
+            outgoing_index: Index de l'image dans la carte sortante
+            incoming_index: Index de l'image dans la carte entrante
+            step: Index de l'image dans la transition
+            length: Nombre d'images de la transition
+            out: Buffer de sortie (height, width, 3 ou 4) uint8
+            background: Image d'arrière-plan RGB, ou None
+        """
+        channels = out.shape[2]
+        progress = (step + 1) / (length + 1)
+        if self.transition == 'slide':
+            # La carte entrante glisse depuis la droite par-dessus la carte sortante
+            offset = int(round(progress * self.width))
+            self.card_frame(outgoing, outgoing_index, out, background)
+            frame = incoming.frame(incoming_index)[:, :offset]
+            band = out[:, self.width - offset:]
+            if background is None:
+                np.copyto(band, frame[:, :, :channels])
+            else:
+                self.composite(frame, band[:, :, :3], band)
+            return out
+
+        # Fondu enchaîné : (sortante * (256 - w) + entrante * w) / 256
+        weight = int(round(progress * 256))
+        first, second, blend, scratch = self._crossfade(channels)
+        self.card_frame(outgoing, outgoing_index, first, background)
+        self.card_frame(incoming, incoming_index, second, background)
+        np.multiply(first, np.uint16(256 - weight), out=blend)
+        np.multiply(second, np.uint16(weight), out=scratch)
+        blend += scratch
+        blend += 128
+        blend >>= 8
+        np.copyto(out, blend, casting='unsafe')
+        return out
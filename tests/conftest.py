@@ -0,0 +1,24 @@
+"""
+Configuration commune des tests : les modules du projet sont importés depuis src/
+"""
+
+import os
+import sys
+
+import pytest
+
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+from utils.modern_audio import TTSGenerator
+from utils.tts_backends import ToneBackend
+from utils.tts_cache import TTSCache
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """Générateur de voix hors ligne (moteur tone) avec un cache dans un dossier temporaire"""
+    cache = TTSCache(str(tmp_path / "cache"))
+    return TTSGenerator(temp_dir=str(tmp_path / "temp"), cache=cache, backend=ToneBackend(),
+                        chunk_threshold=200, max_chunk_chars=80)
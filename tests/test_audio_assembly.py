@@ -0,0 +1,89 @@
+"""
+Tests de l'assemblage des voix d'un post en une seule piste (utils/audio_assembly.py)
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from utils.audio_assembly import assemble_segments, segment_durations
+
+SAMPLE_RATE = 44100
+
+
+def write_tone(path, seconds, amplitude=0.5):
+    """Écrit un WAV stéréo constant de la durée donnée (pas de remixage des canaux à l'assemblage)"""
+    samples = np.full((int(seconds * SAMPLE_RATE), 2), amplitude, dtype=np.float32)
+    sf.write(str(path), samples, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+    return str(path)
+
+
+def test_offsets_and_gaps(tmp_path):
+    """Les voix sont placées bout à bout avec le silence demandé entre elles"""
+    files = [write_tone(tmp_path / "title.wav", 1.0), write_tone(tmp_path / "comment_0.wav", 0.5),
+             write_tone(tmp_path / "comment_1.wav", 2.0)]
+    output = str(tmp_path / "track.wav")
+
+    offsets = assemble_segments(files, output, silence=0.25)
+    assert offsets == [(0.0, 1.0), (1.25, 1.75), (2.0, 4.0)]
+
+    track, sample_rate = sf.read(output)
+    assert sample_rate == SAMPLE_RATE
+    assert track.shape == (4 * SAMPLE_RATE, 2)
+    # Silence exact entre deux voix, voix intactes autour
+    gap = track[SAMPLE_RATE:int(1.25 * SAMPLE_RATE)]
+    assert not gap.any()
+    assert np.allclose(track[:SAMPLE_RATE], 0.5, atol=1e-3)
+    assert np.allclose(track[int(1.25 * SAMPLE_RATE):int(1.75 * SAMPLE_RATE)], 0.5, atol=1e-3)
+
+
+def test_missing_segment_keeps_its_slot(tmp_path):
+    """Une voix absente donne un segment vide, sans silence ajouté"""
+    files = [write_tone(tmp_path / "title.wav", 1.0), str(tmp_path / "missing.wav"),
+             write_tone(tmp_path / "comment_1.wav", 1.0)]
+
+    offsets = assemble_segments(files, str(tmp_path / "track.wav"), silence=0.5)
+    assert offsets == [(0.0, 1.0), (1.0, 1.0), (1.5, 2.5)]
+    assert sf.info(str(tmp_path / "track.wav")).frames == int(2.5 * SAMPLE_RATE)
+
+
+def test_resampled_segments(tmp_path):
+    """Les voix à une autre fréquence sont rééchantillonnées sans changer de durée"""
+    sf.write(str(tmp_path / "voice.wav"), np.full(24000, 0.5, dtype=np.float32), 24000)
+
+    offsets = assemble_segments([str(tmp_path / "voice.wav")] * 2, str(tmp_path / "track.wav"))
+    assert [round(end - start, 3) for start, end in offsets] == [1.0, 1.0]
+    assert offsets[1][0] == offsets[0][1]
+
+
+def test_nothing_to_assemble(tmp_path):
+    """Aucune voix lisible : pas de piste"""
+    output = tmp_path / "track.wav"
+    assert assemble_segments([str(tmp_path / "missing.wav")], str(output)) is None
+    assert not output.exists()
+
+
+def test_segment_durations_follow_voices():
+    """Chaque carte dure jusqu'au début de la voix suivante, la dernière jusqu'à sa fin"""
+    offsets = [(0.0, 1.0), (1.25, 1.75), (2.0, 4.0)]
+    assert segment_durations(offsets) == [1.25, 0.75, 2.0]
+    assert sum(segment_durations(offsets)) == offsets[-1][1]
+
+
+def test_segment_durations_missing_voice():
+    """Une voix absente donne une carte de durée nulle ; la précédente va jusqu'à la voix suivante"""
+    offsets = [(0.0, 1.0), (1.0, 1.0), (1.5, 2.5)]
+    assert segment_durations(offsets) == [1.5, 0.0, 1.0]
+
+
+def test_segment_durations_snapped_to_frames():
+    """À l'image près, les cartes tombent sur la grille et la dernière ne coupe pas la piste"""
+    offsets = [(0.0, 1.01), (1.26, 2.0), (2.25, 3.333)]
+    durations = segment_durations(offsets, fps=30)
+    frames = [duration * 30 for duration in durations]
+    assert frames == pytest.approx([round(f) for f in frames])
+    assert sum(durations) >= offsets[-1][1]
+    assert sum(durations) - offsets[-1][1] < 1 / 30
+    # Chaque début de carte est à moins d'une demi-image du début de sa voix
+    starts = np.cumsum([0] + durations[:-1])
+    assert all(abs(start - voice[0]) <= 0.5 / 30 for start, voice in zip(starts, offsets))
@@ -0,0 +1,135 @@
+"""
+Tests du cache des segments encodés (utils/segment_cache.py) : clé de contenu et
+éviction des entrées les moins récemment utilisées
+"""
+
+import os
+
+import pytest
+
+from utils.segment_cache import SegmentCache
+from utils.segment_encoder import StillSegmentEncoder
+
+ENCODER_SETTINGS = {
+    'output_size': (1080, 1920),
+    'fps': 30,
+    'video_codec': 'libx264',
+    'video_bitrate': '5000k',
+    'video_preset': 'veryfast',
+    'video_crf': 23,
+    'still_tune': 'stillimage',
+    'video_bframes': 2,
+    'zoom_ratio': None,
+    'still_fps': None,
+    'renditions': None,
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SegmentCache(str(tmp_path / "segments"))
+
+
+@pytest.fixture
+def card(tmp_path):
+    path = tmp_path / "comment_0.png"
+    path.write_bytes(b"card v1")
+    return str(path)
+
+
+def segment_key(cache, card, **settings):
+    """Clé du segment d'une carte fixe de 5 secondes"""
+    encoder = StillSegmentEncoder(segment_cache=cache, **{**ENCODER_SETTINGS, **settings})
+    return encoder.segment_key([(card, 5.0, 0)], encoder.frame_count(5.0))
+
+
+def test_key_is_stable(cache, card):
+    """Mêmes cartes, mêmes réglages : même clé (le segment est réutilisé)"""
+    assert segment_key(cache, card) == segment_key(cache, card)
+    assert segment_key(cache, card) == segment_key(SegmentCache(cache.cache_dir), card)
+
+
+@pytest.mark.parametrize('setting, value', [
+    ('output_size', (720, 1280)),
+    ('fps', 60),
+    ('video_codec', 'libx265'),
+    ('video_bitrate', '8000k'),
+    ('video_preset', 'medium'),
+    ('video_crf', 18),
+    ('still_tune', 'animation'),
+    ('video_bframes', 0),
+    ('zoom_ratio', 1.08),
+    ('still_fps', 5),
+    ('renditions', [{'name': '720p', 'width': 720, 'height': 1280}]),
+])
+def test_key_follows_encoder_settings(cache, card, setting, value):
+    """Changer un paramètre d'encodage change la clé"""
+    assert segment_key(cache, card, **{setting: value}) != segment_key(cache, card)
+
+
+def test_key_follows_card_content(cache, card):
+    """Une carte modifiée au même chemin donne une autre clé"""
+    before = segment_key(cache, card)
+    with open(card, 'wb') as f:
+        f.write(b"card v2")
+    stat = os.stat(card)
+    os.utime(card, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert segment_key(cache, card) != before
+
+
+def test_key_follows_timing(cache, card):
+    """Durée et position de la carte font partie de la clé"""
+    encoder = StillSegmentEncoder(segment_cache=cache, **ENCODER_SETTINGS)
+    base = encoder.segment_key([(card, 5.0, 0)], 150)
+    assert encoder.segment_key([(card, 6.0, 0)], 150) != base
+    assert encoder.segment_key([(card, 5.0, 10)], 150) != base
+    assert encoder.segment_key([(card, 5.0, 0)], 140) != base
+
+
+def add_entry(cache, key, size, mtime, renditions=()):
+    """Crée une entrée du cache (et ses rendus) de `size` octets par fichier"""
+    paths = [cache.entry_path(key)] + [os.path.join(cache.cache_dir, f"{key}_{r}.mp4") for r in renditions]
+    for path in paths:
+        with open(path, 'wb') as f:
+            f.write(b"\0" * size)
+        os.utime(path, (mtime, mtime))
+
+
+def test_evict_least_recently_used_first(tmp_path):
+    """Les entrées les plus anciennes (avec leurs rendus) partent en premier, jusqu'à la limite"""
+    cache = SegmentCache(str(tmp_path / "segments"), max_size_mb=2500 / (1024 * 1024))
+    add_entry(cache, "a", 1000, mtime=1000)
+    add_entry(cache, "b", 500, mtime=2000, renditions=["720p"])
+    add_entry(cache, "c", 1000, mtime=3000)
+
+    assert cache.evict() == 1
+    assert sorted(os.listdir(cache.cache_dir)) == ["b.mp4", "b_720p.mp4", "c.mp4"]
+
+    # Sous la limite : rien n'est supprimé
+    assert cache.evict() == 0
+
+
+def test_lookup_refreshes_entry(tmp_path):
+    """Une entrée relue devient la plus récente et n'est plus la première supprimée"""
+    cache = SegmentCache(str(tmp_path / "segments"), max_size_mb=2500 / (1024 * 1024))
+    add_entry(cache, "a", 1000, mtime=1000)
+    add_entry(cache, "b", 1000, mtime=2000)
+    add_entry(cache, "c", 1000, mtime=3000)
+
+    assert cache.lookup("a") == cache.entry_path("a")
+    assert cache.lookup("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    assert cache.evict() == 1
+    assert sorted(os.listdir(cache.cache_dir)) == ["a.mp4", "c.mp4"]
+
+
+def test_evict_keeps_current_segments(tmp_path):
+    """Les segments du rendu en cours sont conservés même s'ils sont les plus anciens"""
+    cache = SegmentCache(str(tmp_path / "segments"), max_size_mb=2500 / (1024 * 1024))
+    add_entry(cache, "a", 1000, mtime=1000)
+    add_entry(cache, "b", 1000, mtime=2000)
+    add_entry(cache, "c", 1000, mtime=3000)
+
+    assert cache.evict(keep={"a"}) == 1
+    assert sorted(os.listdir(cache.cache_dir)) == ["a.mp4", "c.mp4"]
@@ -0,0 +1,89 @@
+"""
+Tests de la synthèse des longs textes phrase par phrase (split_sentences, assemblage
+à l'échantillon près en WAV PCM)
+"""
+
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from utils.modern_audio import split_sentences
+from utils.tts_backends import ToneBackend
+
+LONG_TEXT = " ".join(f"This is sentence number {i} of a long comment." for i in range(6))
+
+
+class Mp3ToneBackend(ToneBackend):
+    """Moteur tone qui écrit des MP3, comme gTTS"""
+
+    name = 'tone-mp3'
+    extension = '.mp3'
+
+    def synthesize(self, text, output_path, language='en', tld='com', slow=False):
+        wav_path = output_path + '.wav'
+        super().synthesize(text, wav_path, language, tld, slow)
+        samples, sample_rate = sf.read(wav_path, dtype='float32')
+        sf.write(output_path, samples, sample_rate, format='MP3')
+        os.remove(wav_path)
+
+
+def longest_silence(samples):
+    """Plus longue suite d'échantillons nuls"""
+    silent = np.concatenate([[0], (samples == 0).astype(np.int8), [0]])
+    edges = np.flatnonzero(np.diff(silent))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def test_split_sentences():
+    """Découpage aux fins de phrase, puis aux virgules et aux espaces au-delà de la limite"""
+    assert split_sentences("Short one. Second one! Third?") == ["Short one.", "Second one!", "Third?"]
+    assert split_sentences("  One sentence only  ") == ["One sentence only"]
+
+    long_sentence = "first part, " * 5 + "and the end"
+    chunks = split_sentences(long_sentence, max_chars=30)
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert all(chunk.endswith(",") for chunk in chunks[:-1])
+    assert " ".join(chunks) == long_sentence
+
+    chunks = split_sentences("word " * 20, max_chars=12)
+    assert all(len(chunk) <= 12 for chunk in chunks)
+    assert " ".join(chunks).split() == ["word"] * 20
+
+    # Sans espace ni virgule : coupure à la limite
+    assert split_sentences("x" * 25, max_chars=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_long_text_is_stitched_per_sentence(generator, tmp_path):
+    """Chaque phrase est une voix en cache ; seule la phrase modifiée est synthétisée à nouveau"""
+    sentences = split_sentences(LONG_TEXT, 80)
+    assert len(sentences) == 6
+
+    generator.generate_tts(LONG_TEXT, str(tmp_path / "comment_0.wav"))
+    assert generator.cache.misses == len(sentences)
+
+    generator.generate_tts(LONG_TEXT.replace("number 5", "number five"), str(tmp_path / "comment_1.wav"))
+    assert (generator.cache.hits, generator.cache.misses) == (len(sentences) - 1, len(sentences) + 1)
+
+
+def test_stitched_sentences_exact_gap(generator, tmp_path):
+    """Le silence au bord des phrases est remplacé par exactement sentence_gap secondes"""
+    path = generator.generate_tts(LONG_TEXT, str(tmp_path / "comment_0.wav"))
+    samples, sample_rate = sf.read(path, dtype='int16')
+    assert longest_silence(samples) == round(generator.sentence_gap * sample_rate)
+
+
+@pytest.mark.skipif('MP3' not in sf.available_formats(), reason="libsndfile sans MP3")
+def test_stitched_voice_is_pcm_wav(generator, tmp_path):
+    """Avec un moteur MP3, la voix assemblée est écrite en WAV PCM, sans second encodage MP3"""
+    generator.backend = Mp3ToneBackend()
+    generator.extension = generator.backend.extension
+
+    path = generator.generate_tts(LONG_TEXT, str(tmp_path / "comment_0.mp3"))
+    assert path == str(tmp_path / "comment_0.wav")
+    info = sf.info(path)
+    assert (info.format, info.subtype) == ("WAV", "PCM_16")
+
+    # Un texte court garde le format du moteur
+    assert generator.generate_tts("Short one.", str(tmp_path / "title.mp3")) == str(tmp_path / "title.mp3")
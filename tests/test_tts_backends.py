@@ -0,0 +1,90 @@
+"""
+Tests des moteurs de synthèse vocale (utils/tts_backends.py)
+"""
+
+import pytest
+import soundfile as sf
+
+from utils.tts_backends import (TTSBackend, EspeakBackend, PiperBackend, ToneBackend, create_tts_backend,
+                                default_tts_backend)
+import utils.tts_backends as tts_backends
+
+
+def test_unknown_backend():
+    """Un nom de moteur inconnu est refusé avec la liste des moteurs disponibles"""
+    with pytest.raises(ValueError, match="gtts, espeak, piper, tone"):
+        create_tts_backend('festival')
+
+
+def test_piper_requires_model():
+    """piper sans modèle de voix est refusé à la création"""
+    with pytest.raises(ValueError):
+        create_tts_backend('piper')
+    backend = create_tts_backend('piper', model='voices/en_US-lessac.onnx')
+    assert isinstance(backend, PiperBackend)
+    assert backend.model == 'voices/en_US-lessac.onnx'
+
+
+def test_create_with_options():
+    """Les options sont passées au constructeur du moteur"""
+    backend = create_tts_backend('espeak', voice='fr+f3', words_per_minute=150)
+    assert isinstance(backend, EspeakBackend)
+    assert (backend.voice, backend.words_per_minute) == ('fr+f3', 150)
+
+
+def test_default_backend_from_config(monkeypatch):
+    """Le moteur par défaut et ses réglages viennent d'AUDIO_CONFIG"""
+    monkeypatch.setitem(tts_backends.AUDIO_CONFIG, 'tts_backend', 'tone')
+    monkeypatch.setitem(tts_backends.AUDIO_CONFIG, 'tts_backend_options', {'tone': {'sample_rate': 16000}})
+    backend = default_tts_backend()
+    assert isinstance(backend, ToneBackend)
+    assert backend.sample_rate == 16000
+
+
+@pytest.mark.parametrize('name, options, changed', [
+    ('espeak', {'voice': 'en-us'}, {'voice': 'en-gb'}),
+    ('espeak', {'words_per_minute': 175}, {'words_per_minute': 150}),
+    ('piper', {'model': 'voices/a.onnx'}, {'model': 'voices/b.onnx'}),
+    ('piper', {'model': 'voices/a.onnx', 'length_scale': 1.0}, {'length_scale': 1.2}),
+    ('tone', {'sample_rate': 24000}, {'sample_rate': 16000}),
+    ('tone', {'chars_per_second': 15}, {'chars_per_second': 20}),
+])
+def test_cache_id_follows_settings(name, options, changed):
+    """Les réglages qui changent la voix changent l'identifiant du moteur dans le cache"""
+    base = create_tts_backend(name, **options)
+    other = create_tts_backend(name, **{**options, **changed})
+    assert base.cache_id() == create_tts_backend(name, **options).cache_id()
+    assert other.cache_id() != base.cache_id()
+    assert base.cache_id().startswith(name)
+
+
+def test_backends_have_distinct_cache_ids():
+    """Deux moteurs différents ne partagent jamais une voix en cache"""
+    ids = {create_tts_backend('gtts').cache_id(), create_tts_backend('espeak').cache_id(),
+           create_tts_backend('piper', model='a.onnx').cache_id(), create_tts_backend('tone').cache_id()}
+    assert len(ids) == 4
+
+
+def test_backend_must_implement_synthesize():
+    """Un moteur sans synthesize est refusé dès sa création"""
+    class IncompleteBackend(TTSBackend):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_tone_backend_is_deterministic(tmp_path):
+    """Même texte, même fichier ; la durée suit la longueur du texte et la vitesse"""
+    backend = ToneBackend()
+    paths = [str(tmp_path / f"{i}.wav") for i in range(4)]
+    backend.synthesize("Hello tone backend", paths[0])
+    backend.synthesize("Hello tone backend", paths[1])
+    backend.synthesize("Hello tone backend with more words", paths[2])
+    backend.synthesize("Hello tone backend", paths[3], slow=True)
+
+    first, sample_rate = sf.read(paths[0])
+    assert sample_rate == 24000
+    assert (first == sf.read(paths[1])[0]).all()
+    assert sf.info(paths[2]).duration > sf.info(paths[0]).duration
+    assert sf.info(paths[3]).duration > sf.info(paths[0]).duration
@@ -0,0 +1,94 @@
+"""
+Tests de la génération des voix en parallèle sous limiteur de débit
+(TTSGenerator.generate_batch, TokenBucket) avec une horloge simulée
+"""
+
+import os
+
+import pytest
+
+import utils.modern_audio as modern_audio
+from utils.modern_audio import TokenBucket
+from utils.tts_backends import ToneBackend
+
+
+class FakeClock:
+    """Remplace le module time de modern_audio : sleep avance l'horloge sans attendre"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RemoteToneBackend(ToneBackend):
+    """Moteur tone vu comme un service distant (soumis au limiteur de débit)"""
+
+    remote = True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(modern_audio, 'time', clock)
+    return clock
+
+
+def test_token_bucket_burst_then_rate(clock):
+    """Les premières requêtes partent d'un coup, les suivantes sont espacées de 1/rate"""
+    bucket = TokenBucket(rate=20, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert clock.sleeps == []
+
+    waits = [bucket.acquire() for _ in range(3)]
+    assert waits == pytest.approx([1 / 20] * 3)
+    assert clock.now == pytest.approx(3 / 20)
+
+
+def test_token_bucket_refills_up_to_burst(clock):
+    """Après une pause, le seau se remplit jusqu'à burst jetons, pas au-delà"""
+    bucket = TokenBucket(rate=20, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+
+    clock.now += 10
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(1 / 20)
+
+
+def test_token_bucket_without_rate(clock):
+    """Sans débit configuré, aucune attente"""
+    bucket = TokenBucket(rate=None)
+    assert [bucket.acquire() for _ in range(10)] == [0.0] * 10
+    assert clock.sleeps == []
+
+
+def test_generate_batch_keeps_order_and_errors(generator, tmp_path):
+    """Un résultat par texte, dans l'ordre, avec l'erreur des textes vides"""
+    results = generator.generate_batch([("First voice", str(tmp_path / "0.wav")),
+                                        ("   ", str(tmp_path / "1.wav")),
+                                        ("Third voice", str(tmp_path / "2.wav"))])
+    assert [result['text'] for result in results] == ["First voice", "   ", "Third voice"]
+    assert results[0]['path'] == str(tmp_path / "0.wav") and results[0]['error'] is None
+    assert results[1]['path'] is None and results[1]['error']
+    assert os.path.exists(results[2]['path'])
+
+
+def test_cached_voices_skip_rate_limiter(generator, tmp_path, clock):
+    """Seules les voix synthétisées consomment un jeton ; les voix relues du cache n'attendent pas"""
+    generator.backend = RemoteToneBackend()
+    generator.rate_limiter = TokenBucket(rate=2, burst=1)
+
+    texts = ["First voice", "Second voice", "Third voice"]
+    generator.generate_batch([(text, str(tmp_path / "a" / f"{i}.wav")) for i, text in enumerate(texts[:2])])
+    assert len(clock.sleeps) == 1
+
+    generator.generate_batch([(text, str(tmp_path / "b" / f"{i}.wav")) for i, text in enumerate(texts)])
+    assert len(clock.sleeps) == 2
+    assert (generator.cache.hits, generator.cache.misses) == (2, 3)
@@ -0,0 +1,86 @@
+"""
+Tests du cache des voix de synthèse (utils/tts_cache.py)
+"""
+
+import os
+
+import soundfile as sf
+
+from utils.tts_cache import TTSCache
+
+
+def test_lookup_counts_hits_and_misses(tmp_path):
+    """Une entrée absente ou vide est un échec, une entrée publiée est relue"""
+    cache = TTSCache(str(tmp_path / "cache"))
+    key = cache.make_key("Hello", "en", "com", False, "tone")
+    assert cache.lookup(key, ".wav") is None
+
+    voice_tmp = cache.tmp_path(key, ".wav")
+    with open(voice_tmp, 'wb') as f:
+        f.write(b"voice")
+    assert cache.store(key, voice_tmp, ".wav") == cache.entry_path(key, ".wav")
+    assert not os.path.exists(voice_tmp)
+
+    assert cache.lookup(key, ".wav") == cache.entry_path(key, ".wav")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_depends_on_every_setting():
+    """Texte, langue, domaine, vitesse et moteur font partie de la clé"""
+    base = TTSCache.make_key("Hello", "en", "com", False, "tone")
+    assert TTSCache.make_key("Hello", "en", "com", False, "tone") == base
+    for args in [("Hello!", "en", "com", False, "tone"), ("Hello", "fr", "com", False, "tone"),
+                 ("Hello", "en", "co.uk", False, "tone"), ("Hello", "en", "com", True, "tone"),
+                 ("Hello", "en", "com", False, "gtts")]:
+        assert TTSCache.make_key(*args) != base
+
+
+def test_link_is_hard_link_and_idempotent(tmp_path):
+    """La voix est placée par lien physique, et un second placement ne change rien"""
+    voice = tmp_path / "cached.wav"
+    voice.write_bytes(b"voice")
+    output = str(tmp_path / "post" / "title.wav")
+    os.makedirs(os.path.dirname(output))
+
+    assert TTSCache.link(str(voice), output)
+    assert TTSCache.link(str(voice), output)
+    assert os.path.samefile(voice, output)
+    assert os.stat(voice).st_nlink == 2
+    assert sorted(os.listdir(os.path.dirname(output))) == ["title.wav"]
+
+
+def test_evict_least_recently_used(tmp_path):
+    """Les voix les plus anciennes partent en premier ; les voix liées restent dans le post"""
+    cache = TTSCache(str(tmp_path / "cache"), max_size_mb=2500 / (1024 * 1024))
+    for mtime, key in enumerate(["a", "b", "c"], start=1):
+        path = cache.entry_path(key, ".wav")
+        with open(path, 'wb') as f:
+            f.write(b"\0" * 1000)
+        os.utime(path, (mtime * 1000, mtime * 1000))
+    linked = str(tmp_path / "title.wav")
+    TTSCache.link(cache.entry_path("a", ".wav"), linked)
+
+    assert cache.evict() == 1
+    assert sorted(os.listdir(cache.cache_dir)) == ["b.wav", "c.wav"]
+    assert os.path.getsize(linked) == 1000
+
+
+def test_generator_reuses_cached_voice(generator, tmp_path):
+    """Une voix déjà synthétisée est relue depuis le cache, par lien physique"""
+    first = generator.generate_tts("Hello from the cache", str(tmp_path / "a" / "title.wav"))
+    assert (generator.cache.hits, generator.cache.misses) == (0, 1)
+
+    second = generator.generate_tts("Hello from the cache", str(tmp_path / "b" / "title.wav"))
+    assert (generator.cache.hits, generator.cache.misses) == (1, 1)
+
+    # Les deux voix et l'entrée du cache sont le même fichier
+    assert os.path.samefile(first, second)
+    assert os.stat(first).st_nlink == 3
+
+
+def test_generator_cache_follows_speed(generator, tmp_path):
+    """Changer la vitesse de lecture donne une autre voix"""
+    generator.generate_tts("Same text", str(tmp_path / "normal.wav"))
+    generator.generate_tts("Same text", str(tmp_path / "slow.wav"), slow=True)
+    assert (generator.cache.hits, generator.cache.misses) == (0, 2)
+    assert sf.info(str(tmp_path / "slow.wav")).duration > sf.info(str(tmp_path / "normal.wav")).duration
@@ -0,0 +1,94 @@
+"""
+Tests des transitions entre cartes (utils/video_effects.py) : fenêtres de transition
+et mélange en entiers du fondu enchaîné et du glissement
+"""
+
+import numpy as np
+
+from utils.video_effects import CardCompositor, CardLayer, card_timeline
+
+SIZE = (10, 4)  # (width, height)
+
+
+def solid(value, channels=3):
+    """Carte unie de la taille de sortie"""
+    return np.full((SIZE[1], SIZE[0], channels), value, dtype=np.uint8)
+
+
+def test_windows_centred_on_cuts():
+    """Chaque fenêtre est centrée sur la coupe, limitée par la plus courte des deux cartes"""
+    starts, solos, windows = card_timeline([30, 30, 6], transition_frames=10)
+    assert starts == [0, 30, 60]
+    assert windows == [(25, 35), (57, 63)]
+    # Images affichées seules entre les fenêtres ; la dernière carte n'a pas de fenêtre après elle
+    assert solos == [(0, 25), (35, 57), (63, 66)]
+
+
+def test_odd_window_and_cuts():
+    """Fenêtre impaire : une image de plus après la coupe ; sans transition, coupes franches"""
+    _, solos, windows = card_timeline([20, 20], transition_frames=5)
+    assert windows == [(18, 23)]
+    assert solos == [(0, 18), (23, 40)]
+
+    _, solos, windows = card_timeline([20, 20, 20], transition_frames=0)
+    assert windows == [(20, 20), (40, 40)]
+    assert solos == [(0, 20), (20, 40), (40, 60)]
+
+    _, solos, windows = card_timeline([15], transition_frames=10)
+    assert windows == []
+    assert solos == [(0, 15)]
+
+
+def test_frames_outside_window_untouched():
+    """Hors transition, l'image de la carte est recopiée telle quelle"""
+    card = np.random.default_rng(0).integers(0, 256, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    layer = CardLayer(card)
+    assert layer.frame(7) is card
+
+    out = np.zeros_like(card)
+    CardCompositor(SIZE).card_frame(layer, 7, out)
+    assert np.array_equal(out, card)
+
+
+def test_crossfade_edges_and_midpoint():
+    """Fondu : (sortante * (256 - w) + entrante * w + 128) >> 8, w = 256 * (pas + 1) / (longueur + 1)"""
+    compositor = CardCompositor(SIZE, transition='crossfade')
+    outgoing, incoming = CardLayer(solid(100)), CardLayer(solid(200))
+    out = np.empty_like(solid(0))
+
+    values = []
+    for step in range(9):
+        compositor.transition_frame(outgoing, incoming, step, step, step, 9, out)
+        assert (out == out[0, 0, 0]).all()
+        values.append(int(out[0, 0, 0]))
+
+    # Bords de la fenêtre (w = 26 et 230) et milieu (w = 128)
+    assert values[0] == 110
+    assert values[4] == 150
+    assert values[8] == 190
+    assert values == sorted(values)
+
+
+def test_crossfade_identical_cards_exact():
+    """Le mélange en entiers ne dérive pas : deux cartes identiques restent identiques"""
+    card = np.random.default_rng(1).integers(0, 256, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    compositor = CardCompositor(SIZE, transition='crossfade')
+    out = np.empty_like(card)
+    for step in range(5):
+        compositor.transition_frame(CardLayer(card), CardLayer(card), 0, 0, step, 5, out)
+        assert np.array_equal(out, card)
+
+
+def test_slide_edges_and_midpoint():
+    """Glissement : la carte entrante (son bord gauche) recouvre la droite de la carte sortante"""
+    incoming_card = np.repeat(np.arange(10, 110, 10, dtype=np.uint8)[None, :, None], SIZE[1], axis=0)
+    incoming_card = np.repeat(incoming_card, 3, axis=2)
+    compositor = CardCompositor(SIZE, transition='slide')
+    outgoing, incoming = CardLayer(solid(0)), CardLayer(incoming_card)
+    out = np.empty_like(incoming_card)
+
+    # length = 3 : progression 1/4, 1/2, 3/4 de la largeur
+    for step, offset in [(0, 2), (1, 5), (2, 8)]:
+        compositor.transition_frame(outgoing, incoming, 0, 0, step, 3, out)
+        assert not out[:, :SIZE[0] - offset].any()
+        assert np.array_equal(out[:, SIZE[0] - offset:], incoming_card[:, :offset])